@@ -0,0 +1,526 @@
+# =====================================================================================
+# MÓDULO DE ARMAZENAMENTO EM MEMÓRIA
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: O `TrafficDataStore` aplica as janelas de ingestão e publica
+#            snapshots imutáveis (`StoreSnapshot`), lidos sem lock pelas rotas.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import heapq
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from modelos import ClientRecord, HistoryRecord, IngestWindow, PartitionKey, merge_client_records
+from historico import DEFAULT_HISTORY_POINTS, ClientHistory, TieredHistory
+from ranking import RankingIndex
+from persistencia import HistoryDatabase
+from mapa_persistente import EMPTY_MAP, MapWriter, PersistentMap
+
+# --- SEÇÃO 1: SNAPSHOTS DO STORE ---
+
+class StoreSnapshot:
+    """
+    Estado publicado pelo store. É imutável: o escritor monta um snapshot novo
+    e troca a referência, então os leitores o usam sem lock.
+
+    `clients` é a visão global (IPs vistos por vários produtores já somados) e
+    `partitions` guarda os clientes de cada (host, interface) separadamente,
+    ambos em `PersistentMap`s que compartilham a estrutura com a versão anterior.
+
+    `tiers` e `host_tiers` apontam para o histórico em múltiplas resoluções
+    desta versão: as rotas de histórico leem deles, e não do store, para que
+    uma troca do histórico (ver `import_state`) chegue junto com o snapshot.
+    `boot_id` identifica a sequência de versões (uma por execução do dono) e
+    compõe as ETags.
+
+    `views` guarda as respostas já serializadas desta versão (ver `cached_view`);
+    como o estado não muda, o cache nunca precisa ser invalidado, apenas
+    descartado junto com o snapshot.
+    """
+    __slots__ = ("version", "clients", "partitions", "last_windows", "history", "boot_id",
+                 "tiers", "host_tiers", "views")
+
+    def __init__(self, version: int, clients: PersistentMap,
+                 partitions: Mapping[PartitionKey, PersistentMap],
+                 last_windows: Mapping[PartitionKey, float], history: Tuple[HistoryRecord, ...],
+                 boot_id: str = "", tiers: Optional["TieredHistory"] = None,
+                 host_tiers: Mapping[str, "TieredHistory"] = MappingProxyType({})):
+        self.version = version
+        self.clients = clients
+        self.partitions = partitions
+        self.last_windows = last_windows
+        self.history = history
+        self.boot_id = boot_id
+        self.tiers = tiers
+        self.host_tiers = host_tiers
+        self.views: Dict[str, bytes] = {}
+
+_EMPTY_MAPPING: Mapping = MappingProxyType({})
+
+# Entradas do diário sem consumidor antes de ele virar um pedido de estado completo.
+JOURNAL_MAX_RECORDS = 4096
+
+class _WriteState:
+    """
+    Estado de um lote de escrita. Os clientes são alterados por `MapWriter`s
+    (só os caminhos tocados são copiados); partições e `last_windows` têm uma
+    entrada por produtor e são copiados inteiros.
+    """
+    __slots__ = ("clients", "partitions", "last_windows", "touched", "changed", "dirty", "history_points")
+
+    def __init__(self, snapshot: StoreSnapshot, journal: bool = False):
+        self.clients = MapWriter(snapshot.clients)
+        self.partitions: Dict[PartitionKey, Mapping[str, ClientRecord]] = dict(snapshot.partitions)
+        self.last_windows: Dict[PartitionKey, float] = dict(snapshot.last_windows)
+        self.touched: Dict[PartitionKey, MapWriter] = {}  # Partições em escrita no lote.
+        self.changed: Set[str] = set()  # IPs alterados na visão global.
+        # Só com o diário ativo (ver `start_journal`): IPs alterados por partição e (host, ts) das janelas.
+        self.dirty: Optional[Dict[PartitionKey, Set[str]]] = {} if journal else None
+        self.history_points: Optional[Set[Tuple[str, float]]] = set() if journal else None
+
+# --- SEÇÃO 2: STORE DE TRÁFEGO ---
+
+class TrafficDataStore:
+    """
+    Armazena e gerencia os dados de tráfego, incluindo o histórico em múltiplas
+    resoluções (`TieredHistory`). O snapshot carrega apenas os pontos recentes.
+
+    O estado é particionado por (host, interface) do produtor. A visão global é
+    mantida incrementalmente: a cada janela, só os IPs dela são recalculados, e
+    um IP visto por uma única partição reaproveita o próprio registro.
+
+    As escritas (ingestão, limpeza) são feitas por cópia: cada lote de janelas
+    gera um novo `StoreSnapshot`, publicado com uma única atribuição. Os
+    clientes ficam em `PersistentMap`s, e o lote copia só os caminhos dos IPs
+    que alterou: o tempo sob o lock acompanha o tamanho do lote, não o total de
+    clientes. As leituras apenas pegam a referência atual, sem lock.
+
+    A expiração usa um min-heap por `last_seen` com remoção preguiçosa: cada
+    cliente tem uma única entrada, criada quando aparece na partição. Ao vencer,
+    a entrada é conferida com o `last_seen` atual; se o cliente foi visto de
+    novo, ela é reagendada em vez de removida. A limpeza só toca as entradas
+    vencidas, e cada cliente ativo é reagendado no máximo uma vez por timeout.
+    """
+    def __init__(self, timeout_seconds: int = 15):
+        self.CLIENT_TIMEOUT_SECONDS = timeout_seconds
+        # Protege apenas os escritores entre si (tarefa de escrita e ingestão direta).
+        self._write_lock = threading.Lock()
+        self._last_seen: Dict[PartitionKey, Dict[str, float]] = {}
+        self._owners: Dict[str, int] = {}  # IP -> número de partições em que aparece.
+        self._expiry: List[Tuple[float, PartitionKey, str]] = []  # Heap de (last_seen, partição, IP).
+        
+        # Na resolução mais fina (5s), 12 pontos cobrem 60s.
+        self.HISTORY_LENGTH = DEFAULT_HISTORY_POINTS
+        self.history = TieredHistory()
+        self.host_history: Dict[str, TieredHistory] = {}
+        self.client_history = ClientHistory()
+        self.ranking = RankingIndex()
+        self.database: Optional[HistoryDatabase] = None
+        # Identifica esta sequência de versões nas ETags: a versão recomeça em 0 a
+        # cada início. Com estado compartilhado, os leitores adotam o do dono.
+        self.boot_id = format(time.time_ns(), "x")
+        # Diário de alterações por versão, lido pelo dono do estado compartilhado.
+        self.journal: Optional[List[dict]] = None
+        self._snapshot = StoreSnapshot(0, EMPTY_MAP, _EMPTY_MAPPING, _EMPTY_MAPPING, (), self.boot_id, self.history)
+        
+        logging.info("Gerenciador de estado iniciado. Timeout: %ss. Histórico: resoluções %s s.",
+                     self.CLIENT_TIMEOUT_SECONDS, self.history.resolutions)
+
+    @property
+    def snapshot(self) -> StoreSnapshot:
+        """ Snapshot atual (imutável); leitura sem lock. """
+        return self._snapshot
+
+    def attach_database(self, database: HistoryDatabase):
+        """
+        Liga a persistência e faz a partida a quente: carrega do banco os baldes
+        ainda dentro da retenção de cada nível e os clientes ainda ativos.
+        """
+        start = time.perf_counter()
+        loaded = 0
+        for tier in self.history.tiers:
+            since_bucket = int(time.time() // tier.resolution_s) - tier.capacity + 1
+            rows = database.load_recent_history(tier.resolution_s, since_bucket)
+            self.history.load(tier.resolution_s, rows)
+            loaded += len(rows)
+        clients = database.load_clients(time.time() - self.CLIENT_TIMEOUT_SECONDS)
+        with self._write_lock:
+            state = self._begin_write()
+            for key, ip, last_seen, record in clients:
+                self._set_client(state, key, ip, record, last_seen)
+            self.database = database
+            self.history.database = database
+            self._commit_write(state)
+        logging.info("Partida a quente: %d balde(s) de histórico e %d cliente(s) carregados em %.0f ms.",
+                     loaded, len(clients), (time.perf_counter() - start) * 1000)
+
+    def update_data(self, new_clients_data: Dict[str, ClientRecord], timestamp: float,
+                    host: str = "", iface: str = ""):
+        """
+        Atualiza os dados dos clientes e adiciona um novo ponto ao histórico.
+        Se não houver clientes, adiciona um ponto com tráfego zero.
+        """
+        self.update_many([IngestWindow(new_clients_data, timestamp, host, iface)])
+
+    def update_many(self, windows: List[IngestWindow]):
+        """
+        Aplica um lote de janelas e publica um único snapshot ao final,
+        amortizando a cópia do estado entre as janelas.
+
+        Janelas de produtores diferentes com o mesmo `window_end` caem no mesmo
+        balde do histórico e são somadas, formando o total global da janela.
+        """
+        if not windows:
+            return
+        with self._write_lock:
+            now = time.time()
+            state = self._begin_write()
+            persist = self.database is not None
+            history_rows: List[Tuple[int, int, float, int, int]] = []
+            changed: Dict[PartitionKey, Dict[str, ClientRecord]] = {}
+            for window in windows:
+                key = (window.host, window.iface)
+                total_inbound_window = 0
+                total_outbound_window = 0
+                for ip, client_data in window.clients.items():
+                    self._set_client(state, key, ip, client_data, now)
+                    total_inbound_window += client_data.in_bytes
+                    total_outbound_window += client_data.out_bytes
+                state.last_windows[key] = max(window.window_end, state.last_windows.get(key, window.window_end))
+
+                # O ponto é adicionado sempre, mesmo com os totais em zero.
+                if state.history_points is not None:
+                    state.history_points.add((window.host, window.window_end))
+                self.history.add(window.window_end, total_inbound_window, total_outbound_window)
+                host_history = self.host_history.get(window.host)
+                if host_history is None:
+                    host_history = self.host_history[window.host] = TieredHistory()
+                host_history.add(window.window_end, total_inbound_window, total_outbound_window)
+                self.client_history.add_window(window.window_end, window.clients)
+                if persist:
+                    changed.setdefault(key, {}).update(window.clients)
+                    history_rows.extend(
+                        (res, int(window.window_end // res), window.window_end,
+                         total_inbound_window, total_outbound_window)
+                        for res in self.history.resolutions)
+            self._commit_write(state)
+            if persist:
+                self.database.enqueue(history_rows, changed, now)
+
+        # Log por lote recebido: DEBUG e fora do lock, para não pesar na ingestão.
+        logging.debug("%d janela(s) aplicada(s). Histórico atualizado.", len(windows))
+
+    def detach_database(self):
+        """ Desliga a persistência (o banco é fechado por quem o abriu). """
+        with self._write_lock:
+            self.database = None
+            self.history.database = None
+
+    def get_history(self) -> List[HistoryRecord]:
+        """ Retorna os pontos recentes do histórico (resolução mais fina). """
+        return list(self._snapshot.history)
+
+    def cleanup_inactive_clients(self):
+        """
+        Remove os clientes sem tráfego há mais de `CLIENT_TIMEOUT_SECONDS`.
+        O custo é proporcional às entradas vencidas do heap, não ao total de
+        clientes: a publicação copia só os caminhos dos IPs removidos.
+        """
+        with self._write_lock:
+            deadline = time.time() - self.CLIENT_TIMEOUT_SECONDS
+            expiry = self._expiry
+            inactive: List[Tuple[PartitionKey, str]] = []
+            while expiry and expiry[0][0] < deadline:
+                _, key, ip = heapq.heappop(expiry)
+                last_seen = self._last_seen.get(key, _EMPTY_MAPPING).get(ip)
+                if last_seen is None:
+                    continue  # Entrada órfã (partição limpa); descartada.
+                if last_seen < deadline:
+                    inactive.append((key, ip))
+                else:
+                    heapq.heappush(expiry, (last_seen, key, ip))
+            if inactive:
+                state = self._begin_write()
+                for key, ip in inactive:
+                    self._remove_client(state, key, ip)
+                self._commit_write(state)
+            # O histórico por cliente sobrevive ao timeout; só sai quando deixa o anel.
+            expired = self.client_history.evict_expired()
+        if expired:
+            logging.debug("Histórico de %d cliente(s) expirado(s) liberado.", expired)
+        if inactive:
+            logging.info("%d cliente(s) inativo(s) removido(s).", len(inactive))
+            logging.debug("Clientes inativos removidos: %s", inactive)
+
+    def get_data(self) -> Mapping[str, ClientRecord]:
+        """ Retorna os dados atuais dos clientes (mapeamento somente leitura). """
+        return self._snapshot.clients
+        
+    def clear(self):
+        """ Limpa todos os dados, incluindo o histórico. """
+        with self._write_lock:
+            self._last_seen.clear()
+            self._owners.clear()
+            self._expiry.clear()
+            # Histórico novo em vez de limpo no lugar: snapshots anteriores mantêm o deles.
+            history = TieredHistory()
+            history.database = self.history.database
+            self.history = history
+            self.host_history = {}
+            self.client_history.clear()
+            self.ranking.clear()
+            self._publish(EMPTY_MAP, {}, {})
+            self.ranking.update(self._snapshot.version, {}, set())
+            self._journal_reset()
+        logging.info("Armazenamento de dados e histórico limpos para teste.")
+
+    # --- Replicação entre workers (ver `SharedState`) ---
+
+    def export_state(self) -> dict:
+        """
+        Estado publicado (snapshot e histórico global e por host) num dicionário
+        serializável em JSON. O histórico é lido sob o lock de escrita, para
+        corresponder ao snapshot, e o diário recomeça a partir desta versão.
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            history = list(self.history.dump().items())
+            host_history = {host: list(tiers.dump().items()) for host, tiers in self.host_history.items()}
+            if self.journal is not None:
+                self.journal = []
+        return {
+            "version": snapshot.version,
+            "boot_id": snapshot.boot_id,
+            "partitions": [
+                [host, iface, [[ip, r.in_bytes, r.out_bytes, r.protocols] for ip, r in partition.items()]]
+                for (host, iface), partition in snapshot.partitions.items()
+            ],
+            "last_windows": [[host, iface, ts] for (host, iface), ts in snapshot.last_windows.items()],
+            "history": history,
+            "host_history": host_history,
+        }
+
+    def import_state(self, state: dict):
+        """
+        Substitui o estado pelo exportado por outro processo (`export_state`),
+        publicando um snapshot com a mesma versão e `boot_id` do original.
+
+        O histórico novo é montado fora do lock e trocado junto com o snapshot:
+        quem ainda lê o snapshot anterior continua vendo o histórico dele inteiro.
+        """
+        history = TieredHistory()
+        for resolution, rows in state["history"]:
+            history.load(resolution, rows)
+        host_history: Dict[str, TieredHistory] = {}
+        for host, tiers in state["host_history"].items():
+            tiered = host_history[host] = TieredHistory()
+            for resolution, rows in tiers:
+                tiered.load(resolution, rows)
+        with self._write_lock:
+            previous = self._snapshot.clients
+            self._last_seen.clear()
+            self._owners.clear()
+            self._expiry.clear()
+            write = _WriteState(StoreSnapshot(0, EMPTY_MAP, _EMPTY_MAPPING, _EMPTY_MAPPING, ()))
+            now = time.time()
+            for host, iface, clients in state["partitions"]:
+                key = (host, iface)
+                for ip, in_bytes, out_bytes, protocols in clients:
+                    protocols = {name: tuple(value) for name, value in protocols.items()}
+                    self._set_client(write, key, ip, ClientRecord(in_bytes, out_bytes, protocols), now)
+            write.last_windows = {(host, iface): ts for host, iface, ts in state["last_windows"]}
+            write.changed.update(previous)
+            history.database = self.history.database
+            self.history = history
+            self.host_history = host_history
+            self.boot_id = state["boot_id"]
+            self._commit_write(write, state["version"])
+
+    def apply_delta(self, delta: dict) -> Optional[bool]:
+        """
+        Aplica uma entrada do diário de outro processo (ver `start_journal`).
+
+        :return: True se publicou a versão da entrada, False se ela já estava
+                 aplicada e None se a entrada não continua o snapshot atual
+                 (lacuna ou reinício do diário): o chamador deve recarregar o
+                 estado completo.
+        """
+        with self._write_lock:
+            version = delta["version"]
+            current = self._snapshot.version
+            if version <= current:
+                return False
+            if version != current + 1 or delta.get("reset"):
+                return None
+            state = self._begin_write()
+            now = time.time()
+            for host, iface, clients, removed in delta["clients"]:
+                key = (host, iface)
+                for ip, in_bytes, out_bytes, protocols in clients:
+                    protocols = {name: tuple(value) for name, value in protocols.items()}
+                    self._set_client(state, key, ip, ClientRecord(in_bytes, out_bytes, protocols), now)
+                seen = self._last_seen.get(key, _EMPTY_MAPPING)
+                for ip in removed:
+                    if ip in seen:
+                        self._remove_client(state, key, ip)
+            state.last_windows = {(host, iface): ts for host, iface, ts in delta["last_windows"]}
+            for resolution, bucket, last_ts, inbound, outbound in delta["history"]:
+                self.history.load(resolution, [(bucket, last_ts, inbound, outbound)])
+            for host, rows in delta["host_history"].items():
+                history = self.host_history.get(host)
+                if history is None:
+                    history = self.host_history[host] = TieredHistory()
+                for resolution, bucket, last_ts, inbound, outbound in rows:
+                    history.load(resolution, [(bucket, last_ts, inbound, outbound)])
+            self._commit_write(state, version)
+            self._compact_expiry()
+        return True
+
+    def start_journal(self):
+        """
+        Passa a anotar as alterações de cada versão (ver `take_journal`). Um
+        `boot_id` novo é publicado: as versões deste dono não podem coincidir
+        com as ETags de um dono anterior que tenha ido além do estado herdado.
+        """
+        with self._write_lock:
+            self.journal = []
+            self.boot_id = format(time.time_ns(), "x")
+            snapshot = self._snapshot
+            self._publish(snapshot.clients, dict(snapshot.partitions), dict(snapshot.last_windows), snapshot.version)
+
+    def take_journal(self) -> List[dict]:
+        """ Retorna as entradas anotadas desde a última chamada e esvazia o diário. """
+        with self._write_lock:
+            journal = self.journal
+            if journal is None:
+                return []
+            self.journal = []
+        return journal
+
+    def stop_journal(self):
+        with self._write_lock:
+            self.journal = None
+
+    def _journal_reset(self):
+        """ Troca o diário por uma marca de reinício: os leitores precisam do estado completo. """
+        if self.journal is not None:
+            self.journal = [{"version": self._snapshot.version, "reset": True}]
+
+    def _record_delta(self, state: _WriteState):
+        """ Anota a versão recém-publicada: só as partições, IPs e baldes de histórico tocados pelo lote. """
+        snapshot = self._snapshot
+        if state.dirty is None or len(self.journal) >= JOURNAL_MAX_RECORDS:
+            # Escrita sem rastreio (importação) ou diário sem consumidor há muito tempo.
+            self._journal_reset()
+            return
+        clients = []
+        for (host, iface), ips in state.dirty.items():
+            partition = snapshot.partitions.get((host, iface), EMPTY_MAP)
+            rows, removed = [], []
+            for ip in ips:
+                record = partition.get(ip)
+                if record is None:
+                    removed.append(ip)
+                else:
+                    rows.append([ip, record.in_bytes, record.out_bytes, record.protocols])
+            clients.append([host, iface, rows, removed])
+        host_history: Dict[str, list] = {}
+        for host, timestamp in state.history_points:
+            host_history.setdefault(host, []).extend(self.host_history[host].rows_at(timestamp))
+        timestamps = {timestamp for _, timestamp in state.history_points}
+        self.journal.append({
+            "version": snapshot.version,
+            "clients": clients,
+            "last_windows": [[host, iface, ts] for (host, iface), ts in snapshot.last_windows.items()],
+            "history": [row for timestamp in sorted(timestamps) for row in self.history.rows_at(timestamp)],
+            "host_history": host_history,
+        })
+
+    def _compact_expiry(self):
+        """
+        Nos leitores a limpeza não roda, e o heap de expiração acumularia as
+        entradas dos clientes removidos pelo dono; ele é refeito a partir de
+        `_last_seen` quando as órfãs passam a ser maioria.
+        """
+        live = sum(len(seen) for seen in self._last_seen.values())
+        if len(self._expiry) > 2 * live + 1024:
+            self._expiry = [(last_seen, key, ip) for key, seen in self._last_seen.items()
+                            for ip, last_seen in seen.items()]
+            heapq.heapify(self._expiry)
+
+    # --- Escrita por cópia (chamadas com `_write_lock` adquirido) ---
+
+    def _begin_write(self) -> _WriteState:
+        return _WriteState(self._snapshot, self.journal is not None)
+
+    def _partition_for_write(self, state: _WriteState, key: PartitionKey) -> MapWriter:
+        """ Abre a partição para escrita na primeira alteração do lote; as seguintes reutilizam o `MapWriter`. """
+        partition = state.touched.get(key)
+        if partition is None:
+            partition = state.touched[key] = MapWriter(state.partitions.get(key, EMPTY_MAP))
+            state.partitions[key] = partition
+        return partition
+
+    def _set_client(self, state: _WriteState, key: PartitionKey, ip: str, record: ClientRecord, last_seen: float):
+        partition = self._partition_for_write(state, key)
+        if state.dirty is not None:
+            state.dirty.setdefault(key, set()).add(ip)
+        if partition.put(ip, record):
+            self._owners[ip] = self._owners.get(ip, 0) + 1
+            heapq.heappush(self._expiry, (last_seen, key, ip))
+        self._last_seen.setdefault(key, {})[ip] = last_seen
+        self._refresh_global(state, ip, record)
+
+    def _remove_client(self, state: _WriteState, key: PartitionKey, ip: str):
+        partition = self._partition_for_write(state, key)
+        if state.dirty is not None:
+            state.dirty.setdefault(key, set()).add(ip)
+        del self._last_seen[key][ip]
+        if partition.pop(ip, None) is None:
+            return
+        owners = self._owners[ip] - 1
+        if owners:
+            self._owners[ip] = owners
+            self._refresh_global(state, ip, None)
+        else:
+            del self._owners[ip]
+            state.clients.pop(ip, None)
+            state.changed.add(ip)
+
+    def _refresh_global(self, state: _WriteState, ip: str, record: Optional[ClientRecord]):
+        """ Recalcula só o IP alterado na visão global. """
+        state.changed.add(ip)
+        if record is not None and self._owners[ip] == 1:
+            state.clients[ip] = record
+        else:
+            state.clients[ip] = merge_client_records(p[ip] for p in state.partitions.values() if ip in p)
+
+    def _commit_write(self, state: _WriteState, version: Optional[int] = None):
+        for key, partition in state.touched.items():
+            if len(partition):
+                state.partitions[key] = partition.persistent()
+            else:
+                # Produtor sem clientes ativos: some das visões, mas continua em `last_windows`.
+                state.partitions.pop(key, None)
+                self._last_seen.pop(key, None)
+        clients = state.clients.persistent()
+        self._publish(clients, state.partitions, state.last_windows, version)
+        self.ranking.update(self._snapshot.version, clients, state.changed)
+        if self.journal is not None:
+            self._record_delta(state)
+
+    def _publish(self, clients: PersistentMap,
+                 partitions: Dict[PartitionKey, PersistentMap], last_windows: Dict[PartitionKey, float],
+                 version: Optional[int] = None):
+        """ Publica um novo snapshot (padrão: versão seguinte). Deve ser chamado com `_write_lock` adquirido. """
+        if version is None:
+            version = self._snapshot.version + 1
+        self._snapshot = StoreSnapshot(version, clients,
+                                       MappingProxyType(partitions), MappingProxyType(last_windows),
+                                       tuple(self.history.recent(self.HISTORY_LENGTH)), self.boot_id,
+                                       self.history, MappingProxyType(dict(self.host_history)))
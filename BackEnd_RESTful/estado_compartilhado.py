@@ -0,0 +1,318 @@
+# =====================================================================================
+# MÓDULO DE ESTADO COMPARTILHADO ENTRE WORKERS
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Com `NETVISION_SHARED_STATE_DIR`, um único worker do uvicorn (o dono)
+#            aplica as janelas e publica checkpoints e diários de deltas; os demais
+#            workers os recarregam e repassam ao dono a ingestão e as consultas de
+#            histórico por cliente.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from functools import partial
+from typing import List, Optional, Tuple
+
+from modelos import dump_json
+from armazenamento import TrafficDataStore
+from visoes import client_history_rows
+from ingestao import IngestPipeline
+from transporte_local import FRAME_HEADER, MAX_FRAME_BYTES, handle_uds_connection
+
+# --- SEÇÃO 1: ESTADO COMPARTILHADO (uvicorn --workers N) ---
+
+SHARED_STATE_DIR = os.environ.get("NETVISION_SHARED_STATE_DIR")  # Ex: /dev/shm/netvision
+SHARED_STATE_POLL_S = float(os.environ.get("NETVISION_SHARED_STATE_POLL_S", "0.25"))
+SHARED_STATE_CHECKPOINT_S = float(os.environ.get("NETVISION_SHARED_STATE_CHECKPOINT_S", "60"))
+STATE_MAGIC = b"NVSTATE2"
+STATE_HEADER = struct.Struct("<8sQQ")  # Magic, versão do snapshot e geração do diário, antes do JSON.
+
+class SharedState:
+    """
+    Coordena vários workers do uvicorn sobre um único estado.
+
+    O primeiro worker a obter o `flock` de `owner.lock` vira o dono: só ele
+    roda a fila de ingestão, a limpeza, os transportes locais e o banco. O
+    estado é publicado no diretório (num tmpfs, como /dev/shm, é memória
+    compartilhada) em duas partes:
+
+    - `state.bin`: checkpoint com o estado completo, gravado num arquivo
+      temporário seguido de `os.replace` (um leitor nunca vê uma gravação pela
+      metade), no início do dono e depois a cada `SHARED_STATE_CHECKPOINT_S`;
+    - `deltas.<geração>.log`: diário do checkpoint, com uma entrada por versão
+      seguinte (só as partições, IPs e baldes de histórico alterados, ver
+      `TrafficDataStore.start_journal`), acrescentadas por uma thread do dono.
+
+    Os demais workers recarregam o checkpoint quando ele muda, aplicam as
+    entradas novas do diário e servem as leituras do próprio snapshot, com a
+    mesma versão e ETag do dono. O custo por versão acompanha o que mudou nela,
+    não o tamanho do estado.
+
+    Janelas recebidas por HTTP num leitor são validadas e repassadas ao dono
+    pelo socket `ingest.sock` (mesmo enquadramento do listener UDS); o
+    histórico por cliente, que fica só no dono, é consultado por `query.sock`.
+    Se o dono cair, o próximo leitor a obter o lock assume a partir do último
+    estado publicado.
+    """
+    def __init__(self, directory: str, store: TrafficDataStore):
+        self.directory = directory
+        self.store = store
+        self.state_path = os.path.join(directory, "state.bin")
+        self.ingest_path = os.path.join(directory, "ingest.sock")
+        self.query_path = os.path.join(directory, "query.sock")
+        self.is_owner = False
+        self._lock_fd: Optional[int] = None
+        # Dono: diário aberto e quando foi gravado o último checkpoint.
+        self._log_fd: Optional[int] = None
+        self._checkpoint_at = 0.0
+        # Leitor: (inode, mtime) do último checkpoint lido e posição no diário dele.
+        self._loaded_file: Optional[Tuple[int, int]] = None
+        self._log_generation = 0
+        self._log_offset = 0
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._servers: List[asyncio.AbstractServer] = []
+        self._ingest_writer: Optional[asyncio.StreamWriter] = None
+        self._ingest_lock: Optional[asyncio.Lock] = None
+
+    def try_acquire_ownership(self) -> bool:
+        """ Tenta obter o lock de dono sem bloquear. O lock é liberado pelo SO se o processo morrer. """
+        if self.is_owner:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        fd = os.open(os.path.join(self.directory, "owner.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.is_owner = True
+        return True
+
+    def log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"deltas.{generation:x}.log")
+
+    # --- Dono ---
+
+    async def start_owner(self, pipeline: IngestPipeline):
+        """
+        Grava o primeiro checkpoint e abre os sockets de repasse e a thread que publica as versões.
+
+        :param pipeline: Fila de ingestão que recebe as janelas repassadas pelos leitores.
+        """
+        self.store.start_journal()
+        await asyncio.to_thread(self.write_checkpoint)
+        handlers = ((self.ingest_path, partial(handle_uds_connection, pipeline)), (self.query_path, self.handle_query))
+        for path, handler in handlers:
+            if os.path.exists(path):
+                os.unlink(path)
+            self._servers.append(await asyncio.start_unix_server(handler, path=path))
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run_writer, name="netvision-shared-state", daemon=True)
+        self._thread.start()
+        logging.info("Worker %d é o dono do estado compartilhado em %s.", os.getpid(), self.directory)
+
+    def notify(self):
+        """ Pede a publicação das versões novas (coalescida: a thread grava todas as pendentes de uma vez). """
+        self._wakeup.set()
+
+    async def handle_query(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """ Atende, no dono, as consultas de histórico por cliente vindas dos leitores (um frame JSON por consulta). """
+        try:
+            while True:
+                (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                if length > MAX_FRAME_BYTES:
+                    logging.warning("Consulta de %d bytes recusada em %s.", length, self.directory)
+                    return
+                request = json.loads(await reader.readexactly(length))
+                snapshot = self.store.snapshot  # Lido antes das linhas: elas são desta versão ou posteriores.
+                rows = client_history_rows(self.store, request["ip"], request["from"], request["to"], request["max_points"])
+                body = dump_json({"boot_id": snapshot.boot_id, "version": snapshot.version, "rows": rows})
+                writer.write(FRAME_HEADER.pack(len(body)) + body)
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass  # O leitor fechou a conexão.
+        except Exception as e:
+            logging.error("Erro na consulta ao estado compartilhado: %s", e, exc_info=True)
+        finally:
+            writer.close()
+
+    def write_checkpoint(self):
+        """
+        Grava o estado completo em `state.bin` e começa um diário vazio para as
+        versões seguintes. O diário novo é criado antes de o checkpoint que o
+        referencia ficar visível; os anteriores são apagados depois.
+        """
+        state = self.store.export_state()
+        generation = time.time_ns()
+        log_name = os.path.basename(self.log_path(generation))
+        fd = os.open(self.log_path(generation), os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o600)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(STATE_HEADER.pack(STATE_MAGIC, state["version"], generation))
+            f.write(dump_json(state))
+        os.replace(tmp_path, self.state_path)
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+        self._log_fd = fd
+        self._checkpoint_at = time.monotonic()
+        for name in os.listdir(self.directory):
+            if name.startswith("deltas.") and name.endswith(".log") and name != log_name:
+                os.unlink(os.path.join(self.directory, name))
+
+    def write_deltas(self):
+        """
+        Acrescenta ao diário as versões publicadas desde a última chamada. Um
+        reinício do diário (limpeza, importação, diário cheio) ou o intervalo
+        de checkpoint vencido gravam um checkpoint no lugar das entradas.
+        """
+        journal = self.store.take_journal()
+        if (any(record.get("reset") for record in journal)
+                or time.monotonic() - self._checkpoint_at >= SHARED_STATE_CHECKPOINT_S):
+            self.write_checkpoint()
+            return
+        if not journal:
+            return
+        frames = []
+        for record in journal:
+            body = dump_json(record)
+            frames += (FRAME_HEADER.pack(len(body)), body)
+        data = memoryview(b"".join(frames))
+        while data:
+            data = data[os.write(self._log_fd, data):]
+
+    def _run_writer(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.write_deltas()
+            except Exception as e:
+                logging.error("Falha ao publicar o estado compartilhado: %s", e, exc_info=True)
+            if self._stopping:
+                return
+
+    # --- Leitores ---
+
+    def sync(self) -> bool:
+        """
+        Acompanha o dono: recarrega `state.bin` quando ele grava um checkpoint
+        novo e aplica as entradas do diário ainda não lidas (uma entrada pela
+        metade fica para a próxima chamada). Retorna True se o snapshot mudou.
+        """
+        changed = False
+        try:
+            st = os.stat(self.state_path)
+        except FileNotFoundError:
+            return False
+        file_id = (st.st_ino, st.st_mtime_ns)
+        if file_id != self._loaded_file:
+            with open(self.state_path, "rb") as f:
+                data = f.read()
+            magic, version, generation = STATE_HEADER.unpack_from(data)
+            if magic != STATE_MAGIC:
+                raise ValueError(f"Arquivo {self.state_path} não é um estado Netvision compatível.")
+            state = json.loads(data[STATE_HEADER.size:])
+            snapshot = self.store.snapshot
+            if (self._loaded_file is None or version != snapshot.version
+                    or state["boot_id"] != snapshot.boot_id):
+                self.store.import_state(state)
+                changed = True
+            self._loaded_file = file_id
+            self._log_generation = generation
+            self._log_offset = 0
+        try:
+            with open(self.log_path(self._log_generation), "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            self._loaded_file = None  # Checkpoint substituído entre as leituras: recarrega na próxima.
+            return changed
+        offset = 0
+        while offset + FRAME_HEADER.size <= len(data):
+            (length,) = FRAME_HEADER.unpack_from(data, offset)
+            end = offset + FRAME_HEADER.size + length
+            if end > len(data):
+                break
+            applied = self.store.apply_delta(json.loads(data[offset + FRAME_HEADER.size:end]))
+            if applied is None:
+                self._loaded_file = None  # O diário não continua este snapshot.
+                break
+            changed = changed or applied
+            offset = end
+        self._log_offset += offset
+        return changed
+
+    async def forward_window(self, raw: bytes):
+        """ Repassa uma janela já validada ao dono. Reabre a conexão uma vez se ela tiver caído. """
+        if self._ingest_lock is None:
+            self._ingest_lock = asyncio.Lock()
+        frame = FRAME_HEADER.pack(len(raw)) + raw
+        async with self._ingest_lock:
+            for attempt in (1, 2):
+                try:
+                    if self._ingest_writer is None or self._ingest_writer.is_closing():
+                        _, self._ingest_writer = await asyncio.open_unix_connection(self.ingest_path)
+                    self._ingest_writer.write(frame)
+                    await self._ingest_writer.drain()
+                    return
+                except (ConnectionError, FileNotFoundError):
+                    self._ingest_writer = None
+                    if attempt == 2:
+                        raise
+
+    async def query_client_history(self, ip: str, from_ts: Optional[float], to_ts: Optional[float],
+                                   max_points: Optional[int]) -> dict:
+        """
+        Consulta o histórico de um cliente no dono (ver `handle_query`).
+
+        :return: `{"boot_id", "version", "rows"}`: as linhas (None se o IP não
+                 tiver histórico) e a versão do dono a que elas correspondem.
+        """
+        reader, writer = await asyncio.open_unix_connection(self.query_path)
+        try:
+            request = dump_json({"ip": ip, "from": from_ts, "to": to_ts, "max_points": max_points})
+            writer.write(FRAME_HEADER.pack(len(request)) + request)
+            await writer.drain()
+            (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+            return json.loads(await reader.readexactly(length))
+        finally:
+            writer.close()
+
+    # --- Encerramento ---
+
+    async def stop(self):
+        """ Encerra os sockets e a thread do dono (publicando o estado final) e libera o lock. """
+        if self._ingest_writer is not None:
+            self._ingest_writer.close()
+            self._ingest_writer = None
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.to_thread(self._thread.join, 10)
+            self._thread = None
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+        if self.is_owner:
+            self.store.stop_journal()
+            for path in (self.ingest_path, self.query_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            self.is_owner = False
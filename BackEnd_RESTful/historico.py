@@ -0,0 +1,371 @@
+# =====================================================================================
+# MÓDULO DE HISTÓRICO DE TRÁFEGO
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Histórico do tráfego total em múltiplas resoluções (`TieredHistory`),
+#            redução de séries para gráficos (LTTB) e o histórico recente por
+#            cliente em buffers circulares (`ClientHistory`).
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from modelos import ClientRecord, HistoryRecord
+
+# --- SEÇÃO 1: HISTÓRICO EM MÚLTIPLAS RESOLUÇÕES ---
+
+# (resolução em segundos, retenção em segundos), da mais fina para a mais grossa.
+HISTORY_TIERS = ((5, 3600), (60, 86400), (3600, 30 * 86400))
+DEFAULT_HISTORY_POINTS = 12  # Pontos devolvidos sem parâmetros: 60s na resolução de 5s.
+
+class HistoryTier:
+    """
+    Anel de tamanho fixo com os totais de uma resolução, guardado em `array`s.
+
+    O balde de um timestamp é `floor(ts / resolução)` e ocupa o slot
+    `balde % capacidade`; um slot com balde diferente é zerado ao ser reutilizado.
+    Assim, cada janela custa O(1) por nível e a memória não cresce com o tempo.
+    """
+    def __init__(self, resolution_s: int, retention_s: int):
+        self.resolution_s = resolution_s
+        self.capacity = retention_s // resolution_s
+        self.latest = -1  # Balde mais recente já escrito.
+        self._buckets = array("q", [-1]) * self.capacity
+        self._last_ts = array("d", [0.0]) * self.capacity
+        self._inbound = array("q", [0]) * self.capacity
+        self._outbound = array("q", [0]) * self.capacity
+
+    def add(self, timestamp: float, inbound: int, outbound: int):
+        bucket = int(timestamp // self.resolution_s)
+        if bucket <= self.latest - self.capacity:
+            return  # Mais antigo que a retenção deste nível.
+        slot = bucket % self.capacity
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            self._last_ts[slot] = timestamp
+            self._inbound[slot] = 0
+            self._outbound[slot] = 0
+        self._inbound[slot] += inbound
+        self._outbound[slot] += outbound
+        if timestamp > self._last_ts[slot]:
+            self._last_ts[slot] = timestamp
+        if bucket > self.latest:
+            self.latest = bucket
+
+    def load(self, bucket: int, last_ts: float, inbound: int, outbound: int):
+        """ Grava um balde já agregado (ex: lido do banco), substituindo o slot. """
+        if bucket <= self.latest - self.capacity:
+            return
+        slot = bucket % self.capacity
+        self._buckets[slot] = bucket
+        self._last_ts[slot] = last_ts
+        self._inbound[slot] = inbound
+        self._outbound[slot] = outbound
+        if bucket > self.latest:
+            self.latest = bucket
+
+    def oldest_timestamp(self) -> float:
+        """ Início do balde mais antigo que este nível ainda pode conter. """
+        return (self.latest - self.capacity + 1) * self.resolution_s
+
+    def query(self, first_bucket: int, last_bucket: int) -> List[HistoryRecord]:
+        """ Pontos dos baldes preenchidos em `[first_bucket, last_bucket]`, em ordem. """
+        first_bucket = max(first_bucket, self.latest - self.capacity + 1)
+        last_bucket = min(last_bucket, self.latest)
+        points = []
+        for bucket in range(first_bucket, last_bucket + 1):
+            slot = bucket % self.capacity
+            if self._buckets[slot] == bucket:
+                points.append(HistoryRecord(self._last_ts[slot], self._inbound[slot], self._outbound[slot]))
+        return points
+
+    def row(self, timestamp: float) -> Optional[Tuple[int, float, int, int]]:
+        """ Balde que contém `timestamp`, no formato de `load`, ou None se não estiver preenchido. """
+        bucket = int(timestamp // self.resolution_s)
+        slot = bucket % self.capacity
+        if self._buckets[slot] != bucket:
+            return None
+        return (bucket, self._last_ts[slot], self._inbound[slot], self._outbound[slot])
+
+    def rows(self) -> List[Tuple[int, float, int, int]]:
+        """ Baldes preenchidos `(balde, último ts, in, out)`, em ordem (formato de `load`). """
+        rows = []
+        for bucket in range(self.latest - self.capacity + 1, self.latest + 1):
+            slot = bucket % self.capacity
+            if self._buckets[slot] == bucket:
+                rows.append((bucket, self._last_ts[slot], self._inbound[slot], self._outbound[slot]))
+        return rows
+
+    def clear(self):
+        self.latest = -1
+        for i in range(self.capacity):
+            self._buckets[i] = -1
+
+class TieredHistory:
+    """
+    Histórico de tráfego total em vários níveis de resolução (ex: 5s por 1h,
+    1m por 1d, 1h por 30d). Cada janela é somada incrementalmente a todos os
+    níveis na ingestão; consultas leem só os baldes do intervalo pedido.
+    """
+    def __init__(self, tiers=HISTORY_TIERS):
+        self.tiers = [HistoryTier(resolution_s, retention_s) for resolution_s, retention_s in tiers]
+        self._lock = threading.Lock()  # Consultas e escritas são curtas; o lock só as serializa.
+        # Persistência opcional: consultas anteriores à retenção em memória caem nela.
+        self.database: Optional["HistoryDatabase"] = None
+
+    @property
+    def resolutions(self) -> List[int]:
+        return [tier.resolution_s for tier in self.tiers]
+
+    def add(self, timestamp: float, inbound: int, outbound: int):
+        with self._lock:
+            for tier in self.tiers:
+                tier.add(timestamp, inbound, outbound)
+
+    def recent(self, n_points: int = DEFAULT_HISTORY_POINTS, resolution_s: Optional[int] = None) -> List[HistoryRecord]:
+        """ Últimos `n_points` baldes (preenchidos) de um nível (padrão: o mais fino). """
+        tier = self._tier(resolution_s) if resolution_s else self.tiers[0]
+        with self._lock:
+            return tier.query(tier.latest - n_points + 1, tier.latest)
+
+    def query(self, from_ts: float, to_ts: Optional[float] = None,
+              resolution_s: Optional[int] = None) -> List[HistoryRecord]:
+        """
+        Pontos entre `from_ts` e `to_ts` (inclusive).
+
+        :param resolution_s: Resolução desejada. Se omitida, usa o nível mais
+                             fino cuja retenção ainda cobre `from_ts`.
+        :raises ValueError: Se `resolution_s` não corresponder a nenhum nível.
+        """
+        with self._lock:
+            if resolution_s:
+                tier = self._tier(resolution_s)
+            else:
+                tier = next((t for t in self.tiers if t.oldest_timestamp() <= from_ts), self.tiers[-1])
+            first_bucket = int(from_ts // tier.resolution_s)
+            last_bucket = tier.latest if to_ts is None else int(to_ts // tier.resolution_s)
+            oldest_bucket = tier.latest - tier.capacity + 1
+            points = tier.query(first_bucket, last_bucket)
+        if self.database is not None and first_bucket < oldest_bucket:
+            # Trecho mais antigo que o anel: busca por faixa de chave primária no banco.
+            points = self.database.query(tier.resolution_s, first_bucket,
+                                         min(last_bucket, oldest_bucket - 1)) + points
+        return points
+
+    def rows_at(self, timestamp: float) -> List[Tuple[int, int, float, int, int]]:
+        """ Baldes `(resolução, balde, último ts, in, out)` que contêm `timestamp`, um por nível. """
+        with self._lock:
+            rows = [(tier.resolution_s, tier.row(timestamp)) for tier in self.tiers]
+        return [(resolution, *row) for resolution, row in rows if row is not None]
+
+    def dump(self) -> Dict[int, List[Tuple[int, float, int, int]]]:
+        """ Baldes preenchidos de cada nível, no formato aceito por `load`. """
+        with self._lock:
+            return {tier.resolution_s: tier.rows() for tier in self.tiers}
+
+    def load(self, resolution_s: int, rows: Iterable[Tuple[int, float, int, int]]):
+        """ Restaura baldes `(balde, último ts, in, out)` de um nível (partida a quente). """
+        tier = self._tier(resolution_s)
+        with self._lock:
+            for bucket, last_ts, inbound, outbound in rows:
+                tier.load(bucket, last_ts, inbound, outbound)
+
+    def clear(self):
+        with self._lock:
+            for tier in self.tiers:
+                tier.clear()
+
+    def _tier(self, resolution_s: int) -> HistoryTier:
+        for tier in self.tiers:
+            if tier.resolution_s == resolution_s:
+                return tier
+        raise ValueError(f"Resolução {resolution_s}s indisponível. Use uma de: {self.resolutions}.")
+
+# --- SEÇÃO 2: REDUÇÃO DE PONTOS PARA GRÁFICOS (LARGEST-TRIANGLE-THREE-BUCKETS) ---
+
+def downsample_lttb(points: List[HistoryRecord], max_points: int) -> List[HistoryRecord]:
+    """
+    Reduz uma série a no máximo `max_points` pontos com o LTTB, que preserva o
+    formato visual (picos e vales) melhor que uma média por balde.
+
+    O primeiro e o último ponto são mantidos; os demais são divididos em
+    `max_points - 2` baldes e, de cada um, fica o ponto que forma o maior
+    triângulo com o ponto escolhido no balde anterior e a média do seguinte.
+    O eixo y é o total (inbound + outbound); os pontos escolhidos são
+    devolvidos intactos. O custo é O(n) sobre os pontos do intervalo.
+
+    :param points: Série em ordem cronológica.
+    :param max_points: Tamanho máximo da resposta (mínimo 3).
+    """
+    n = len(points)
+    if max_points < 3 or n <= max_points:
+        return points
+    return [points[i] for i in _lttb_indices(points, max_points)]
+
+def _lttb_bounds(n: int, max_points: int) -> List[int]:
+    """ Limites dos baldes internos: o balde i cobre `[bounds[i], bounds[i + 1])`. """
+    every = (n - 2) / (max_points - 2)
+    return [int(i * every) + 1 for i in range(max_points - 2)] + [n - 1]
+
+def _lttb_indices(points: List[HistoryRecord], max_points: int) -> List[int]:
+    xs = [p.timestamp for p in points]
+    ys = [p.total_inbound + p.total_outbound for p in points]
+    bounds = _lttb_bounds(len(points), max_points)
+    selected = [0]
+    a = 0
+    for i in range(max_points - 2):
+        start, end = bounds[i], bounds[i + 1]
+        if i + 2 < len(bounds):
+            next_start, next_end = end, bounds[i + 2]
+        else:
+            next_start, next_end = len(points) - 1, len(points)
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(len(points) - 1)
+    return selected
+
+# --- SEÇÃO 3: HISTÓRICO POR CLIENTE ---
+
+CLIENT_HISTORY_RESOLUTION_S = int(os.environ.get("NETVISION_CLIENT_HISTORY_RESOLUTION_S", "5"))
+CLIENT_HISTORY_POINTS = int(os.environ.get("NETVISION_CLIENT_HISTORY_POINTS", "120"))  # 10 min a 5s.
+CLIENT_HISTORY_MAX_CLIENTS = int(os.environ.get("NETVISION_CLIENT_HISTORY_MAX_CLIENTS", "20000"))
+
+class ClientHistory:
+    """
+    Série temporal de cada cliente em anéis de tamanho fixo.
+
+    Todos os anéis ficam em dois `array('q')` contínuos (in/out); cada cliente
+    ocupa uma linha de `points` posições, alocada sob demanda até `max_clients`.
+    Acima do limite, a linha do cliente há mais tempo sem tráfego é reutilizada.
+    Cada janela custa O(1) por cliente presente nela, independentemente do
+    histórico acumulado.
+    """
+    def __init__(self, max_clients: int = CLIENT_HISTORY_MAX_CLIENTS, points: int = CLIENT_HISTORY_POINTS,
+                 resolution_s: int = CLIENT_HISTORY_RESOLUTION_S):
+        self.max_clients = max(1, max_clients)
+        self.points = max(1, points)
+        self.resolution_s = resolution_s
+        self.evicted = 0
+        self._newest = -1  # Balde mais recente entre todos os clientes.
+        self._lock = threading.Lock()
+        self._rows: "OrderedDict[str, int]" = OrderedDict()  # IP -> linha, do menos para o mais recente.
+        self._free: List[int] = []
+        self._latest = array("q")  # Balde mais recente de cada linha.
+        self._inbound = array("q")
+        self._outbound = array("q")
+        self._zero_row = array("q", [0]) * self.points
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, ip: str) -> bool:
+        return ip in self._rows
+
+    def add_window(self, timestamp: float, clients: Mapping[str, ClientRecord]):
+        """ Soma o tráfego de cada cliente da janela ao balde de `timestamp`. """
+        bucket = int(timestamp // self.resolution_s)
+        points = self.points
+        rows = self._rows
+        latest, inbound, outbound = self._latest, self._inbound, self._outbound
+        with self._lock:
+            if bucket > self._newest:
+                self._newest = bucket
+            for ip, record in clients.items():
+                row = rows.get(ip)
+                if row is None:
+                    row = self._allocate(ip)
+                else:
+                    rows.move_to_end(ip)
+                base = row * points
+                row_latest = latest[row]
+                if row_latest < 0:
+                    latest[row] = bucket  # Linha nova: já zerada por `_allocate`.
+                elif bucket > row_latest:
+                    # Zera as posições puladas desde o último balde (no máximo uma volta).
+                    for b in range(max(row_latest + 1, bucket - points + 1), bucket + 1):
+                        inbound[base + b % points] = 0
+                        outbound[base + b % points] = 0
+                    latest[row] = bucket
+                elif bucket <= row_latest - points:
+                    continue  # Mais antigo que o anel do cliente.
+                slot = base + bucket % points
+                inbound[slot] += record.in_bytes
+                outbound[slot] += record.out_bytes
+
+    def query(self, ip: str, from_ts: Optional[float] = None,
+              to_ts: Optional[float] = None) -> Optional[List[HistoryRecord]]:
+        """ Pontos do cliente no intervalo (padrão: todo o anel), ou None se o IP não tiver histórico. """
+        with self._lock:
+            row = self._rows.get(ip)
+            if row is None:
+                return None
+            latest = self._latest[row]
+            first = latest - self.points + 1
+            if from_ts is not None:
+                first = max(first, int(from_ts // self.resolution_s))
+            last = latest if to_ts is None else min(latest, int(to_ts // self.resolution_s))
+            base = row * self.points
+            points = []
+            for bucket in range(first, last + 1):
+                slot = base + bucket % self.points
+                if self._inbound[slot] or self._outbound[slot]:
+                    points.append(HistoryRecord(bucket * self.resolution_s, self._inbound[slot], self._outbound[slot]))
+            return points
+
+    def evict_expired(self) -> int:
+        """
+        Libera os clientes cujo último balde já saiu do anel (sem tráfego há mais
+        de `points` baldes, em relação à janela mais recente). Retorna quantos foram removidos.
+        """
+        cutoff_bucket = self._newest - self.points + 1
+        removed = 0
+        with self._lock:
+            while self._rows:
+                ip, row = next(iter(self._rows.items()))
+                if self._latest[row] >= cutoff_bucket:
+                    break
+                del self._rows[ip]
+                self._free.append(row)
+                removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._free.extend(self._rows.values())
+            self._rows.clear()
+            self._newest = -1
+
+    def _allocate(self, ip: str) -> int:
+        """ Obtém uma linha livre, crescendo os arrays ou reciclando o cliente menos recente. """
+        if not self._free and len(self._latest) < self.max_clients:
+            row = len(self._latest)
+            self._latest.append(-1)
+            self._inbound.extend(self._zero_row)
+            self._outbound.extend(self._zero_row)
+            self._rows[ip] = row
+            return row
+        if self._free:
+            row = self._free.pop()
+        else:
+            _, row = self._rows.popitem(last=False)
+            self.evicted += 1
+        self._rows[ip] = row
+        self._latest[row] = -1
+        base = row * self.points
+        self._inbound[base:base + self.points] = self._zero_row
+        self._outbound[base:base + self.points] = self._zero_row
+        return row
@@ -0,0 +1,103 @@
+# =====================================================================================
+# MÓDULO DE INGESTÃO
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Fila de ingestão com uma única tarefa escritora, compartilhada pela
+#            rota HTTP e pelos transportes locais.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import asyncio
+import logging
+import os
+from typing import Callable, Optional
+
+from modelos import IngestWindow
+from armazenamento import TrafficDataStore
+
+# --- SEÇÃO 1: FILA DE INGESTÃO ---
+
+INGEST_QUEUE_SIZE = int(os.environ.get("NETVISION_INGEST_QUEUE_SIZE", "1024"))
+
+class IngestPipeline:
+    """
+    Fila de ingestão com uma única tarefa escritora.
+
+    Os handlers apenas enfileiram as janelas validadas; a tarefa escritora as
+    retira em lotes e as aplica ao `store`. Com a fila cheia, os
+    produtores HTTP/UDS aguardam (sem ocupar threads) até haver espaço.
+    Fora do loop em que a tarefa roda (ex: testes sem lifespan), as janelas
+    são aplicadas diretamente.
+    """
+    def __init__(self, store: TrafficDataStore, maxsize: int = 1024, max_batch: int = 256,
+                 on_update: Optional[Callable[[], None]] = None):
+        self.store = store
+        self.on_update = on_update
+        self.maxsize = maxsize
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """ Cria a fila e a tarefa escritora no loop em execução. """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self._run_writer())
+
+    async def stop(self):
+        """ Aplica o que ainda estiver na fila e encerra a tarefa escritora. """
+        task, queue_, self._task = self._task, self._queue, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        pending = []
+        while not queue_.empty():
+            pending.append(queue_.get_nowait())
+        self.store.update_many(pending)
+
+    async def submit(self, window: IngestWindow):
+        """ Enfileira uma janela, aguardando espaço se a fila estiver cheia. """
+        if self._is_active():
+            await self._queue.put(window)
+        else:
+            self.store.update_many([window])
+
+    def submit_nowait(self, window: IngestWindow) -> bool:
+        """ Enfileira uma janela sem aguardar (callbacks síncronos). Descarta se a fila estiver cheia. """
+        if not self._is_active():
+            self.store.update_many([window])
+            return True
+        try:
+            self._queue.put_nowait(window)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    def _is_active(self) -> bool:
+        if self._task is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    async def _run_writer(self):
+        queue_ = self._queue
+        while True:
+            batch = [await queue_.get()]
+            while len(batch) < self.max_batch and not queue_.empty():
+                batch.append(queue_.get_nowait())
+            try:
+                self.store.update_many(batch)
+                if self.on_update:
+                    self.on_update()
+            except Exception as e:
+                logging.error("Erro ao aplicar %d janela(s) ao store: %s", len(batch), e, exc_info=True)
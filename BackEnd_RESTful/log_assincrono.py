@@ -0,0 +1,84 @@
+# =====================================================================================
+# MÓDULO DE LOGGING ASSÍNCRONO
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Configura o logger raiz e o log de acesso do uvicorn para apenas
+#            enfileirar registros; a formatação e a escrita acontecem na thread
+#            de um `QueueListener`, fora do caminho das requisições.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List
+
+# --- SEÇÃO 1: FILA DE LOGGING ---
+
+# Logging assíncrono: as rotas e tarefas apenas enfileiram registros (sem formatar);
+# a formatação e a escrita acontecem na thread do `QueueListener`. Com a fila cheia,
+# o registro é descartado em vez de bloquear o tratamento de requisições.
+LOG_QUEUE_SIZE = int(os.environ.get("NETVISION_LOG_QUEUE_SIZE", "10000"))
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    `QueueHandler` que nunca bloqueia quem loga (mesmo comportamento do handler
+    de `Network_analyzer/Logging.py`; o backend é implantado sem o produtor).
+
+    O registro segue com `msg` e `args` intactos e é formatado pela thread do
+    `QueueListener`. Com a fila cheia, é descartado e contabilizado em `dropped`.
+    """
+    def __init__(self, log_queue: "queue.Queue"):
+        """
+        :param log_queue: Fila limitada lida pelo `QueueListener`.
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """ Mesmo processo: não há serialização, então a formatação fica para o listener. """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """ Enfileira sem esperar; descarta o registro se a fila estiver cheia. """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _attach_queue(logger: logging.Logger, handlers: List[logging.Handler]) -> QueueListener:
+    """
+    Troca os handlers de `logger` por um handler de fila e move os originais
+    para um listener, encerrado no `atexit`.
+
+    :param logger: Logger que passará a apenas enfileirar.
+    :param handlers: Handlers que escreverão os registros na thread do listener.
+    :return: O `QueueListener` já iniciado.
+    """
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    logger.handlers = [NonBlockingQueueHandler(log_queue)]
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+def setup_logging() -> List[QueueListener]:
+    """
+    Configura o logger raiz (nível em `NETVISION_LOG_LEVEL`) e o log de acesso
+    do uvicorn para escrever por fila, fora do caminho das requisições.
+
+    :return: Os listeners iniciados, um por logger configurado.
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(os.environ.get("NETVISION_LOG_LEVEL", "INFO").upper())
+    listeners = [_attach_queue(root_logger, [stream_handler])]
+    # O log de acesso do uvicorn é escrito a cada requisição: também passa pela fila.
+    access_logger = logging.getLogger("uvicorn.access")
+    if access_logger.handlers and not isinstance(access_logger.handlers[0], NonBlockingQueueHandler):
+        listeners.append(_attach_queue(access_logger, list(access_logger.handlers)))
+    return listeners
@@ -1,179 +1,195 @@
 # =====================================================================================
 # SERVIDOR BACKEND - DASHBOARD DE ANÁLISE DE TRÁFEGO
-# Versão: 2.9.0 (com Histórico de Tráfego)
+# Versão: 2.26.1 (Backend Dividido em Módulos)
 #
 # Autor: Equipe Backend - Diogo Freitas e Gustavo Martins
 # Descrição: Esta versão adiciona a capacidade de armazenar o histórico do
 #            tráfego total (inbound/outbound) do último minuto e o expõe
-#            através de um novo endpoint /api/traffic/history.
+#            através de um novo endpoint /api/traffic/history. Quando o
+#            produtor roda na mesma máquina, janelas também podem chegar por
+#            Unix domain socket, UDP ou por um anel em memória compartilhada,
+#            sem passar pela rota HTTP. A ingestão é assíncrona: as janelas
+#            passam por uma fila com uma única tarefa escritora, que publica
+#            snapshots imutáveis lidos sem lock pelas rotas de consulta.
+#            Com `NETVISION_SHARED_STATE_DIR`, vários workers do uvicorn
+#            servem o mesmo estado, publicado por um único worker dono.
+#            Este arquivo monta a aplicação e as rotas; armazenamento,
+#            histórico, persistência, transportes e estado compartilhado
+#            ficam em módulos próprios (ver README).
 # =====================================================================================
 
 # --- SEÇÃO 0: IMPORTAÇÕES E CONFIGURAÇÃO INICIAL ---
 
-import threading
-import time
-from typing import Dict, List, Optional
+import asyncio
+import gc
+import json
 import logging
+import os
 import socket
+import sqlite3
 from contextlib import asynccontextmanager
-from collections import deque
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Literal, Mapping, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Response
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 from fastapi.middleware.cors import CORSMiddleware
-from functools import lru_cache
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# --- SEÇÃO 1: MODELOS DE DADOS PARA INGESTÃO E CONSUMO ---
-
-class ProtocolInOutData(BaseModel):
-    in_bytes: int = Field(alias="in")
-    out_bytes: int = Field(alias="out")
-
-class ClientData(BaseModel):
-    in_bytes: int
-    out_bytes: int
-    protocols: Dict[str, ProtocolInOutData]
-
-class TrafficPayload(BaseModel):
-    host: str
-    iface: Optional[str] = None
-    server_ip: Optional[str] = None
-    window_start: int
-    window_end: int
-    clients: Dict[str, ClientData]
-    
-class GlobalProtocolSummary(BaseModel):
-    name: str
-    y: int
-
-class HistoricalDataPoint(BaseModel):
-    """ Representa um ponto de dados no gráfico de histórico. """
-    timestamp: int
-    total_inbound: int
-    total_outbound: int
-
-class ClientTrafficSummary(BaseModel):
-    ip: str
-    inbound: int
-    outbound: int
-
-class ProtocolDrilldown(BaseModel):
-    name: str
-    inbound: int
-    outbound: int
-    y: int
-
-# --- SEÇÃO 2: ARMAZENAMENTO DE DADOS EM MEMÓRIA --- 
-
-class TimestampedClientData(BaseModel):
-    data: ClientData
-    last_seen: float = Field(default_factory=time.time)
-
-class TrafficDataStore:
-    """
-    Armazena e gerencia os dados de tráfego, incluindo o histórico do último minuto.
-    """
-    def __init__(self, timeout_seconds: int = 15):
-        self.CLIENT_TIMEOUT_SECONDS = timeout_seconds
-        self._clients_data: Dict[str, TimestampedClientData] = {}
-        self._lock = threading.Lock()
-        
-        # Como recebemos dados a cada 5s, 12 registos cobrem 60s.
-        self.HISTORY_LENGTH = 12 
-        self._history: deque[HistoricalDataPoint] = deque(maxlen=self.HISTORY_LENGTH)
-        
-        logging.info(f"Gerenciador de estado iniciado. Timeout: {self.CLIENT_TIMEOUT_SECONDS}s. Histórico: {self.HISTORY_LENGTH} pontos.")
-
-    # Dentro da classe TrafficDataStore
-
-    def update_data(self, new_clients_data: Dict[str, ClientData], timestamp: int):
-        """
-        Atualiza os dados dos clientes e adiciona um novo ponto ao histórico.
-        Se não houver clientes, adiciona um ponto com tráfego zero.
-        """
-        with self._lock:
-            now = time.time()
-            total_inbound_window = 0
-            total_outbound_window = 0
-
-            # Atualiza os dados dos clientes se houver algum
-            if new_clients_data:
-                for ip, client_data in new_clients_data.items():
-                    self._clients_data[ip] = TimestampedClientData(data=client_data, last_seen=now)
-                    total_inbound_window += client_data.in_bytes
-                    total_outbound_window += client_data.out_bytes
-            
-            # ESTA PARTE AGORA RODA SEMPRE, mesmo com os totais em zero
-            history_point = HistoricalDataPoint(
-                timestamp=timestamp,
-                total_inbound=total_inbound_window,
-                total_outbound=total_outbound_window
-            )
-            self._history.append(history_point)
-            
-            if not new_clients_data:
-                logging.info("Nenhum cliente ativo. Ponto de histórico com tráfego zero adicionado.")
-            else:
-                logging.info(f"{len(new_clients_data)} clientes recebidos. Histórico atualizado.")
-
-    def get_history(self) -> List[HistoricalDataPoint]:
-        """ Retorna a lista de pontos de dados do histórico. """
-        with self._lock:
-            return list(self._history)
-
-    def cleanup_inactive_clients(self):
-        with self._lock:
-            now = time.time()
-            inactive_ips = [
-                ip for ip, ts_data in self._clients_data.items()
-                if now - ts_data.last_seen > self.CLIENT_TIMEOUT_SECONDS
-            ]
-            if inactive_ips:
-                for ip in inactive_ips:
-                    del self._clients_data[ip]
-                logging.info(f"Clientes inativos removidos: {', '.join(inactive_ips)}")
-
-    def get_data(self) -> Dict[str, ClientData]:
-        with self._lock:
-            return {ip: ts_data.data for ip, ts_data in self._clients_data.items()}
-        
-    def clear(self):
-        """ Limpa todos os dados, incluindo o histórico. """
-        with self._lock:
-            self._clients_data.clear()
-            self._history.clear()
-            logging.info("Armazenamento de dados e histórico limpos para teste.")
+# Módulos do backend, importados pelo nome (o uvicorn roda a partir desta pasta).
+from log_assincrono import setup_logging
+from modelos import (ClientRecord, ClientTrafficSummary, GlobalProtocolSummary, HistoricalDataPoint,
+                     ProtocolDrilldown, TrafficPayload, dump_json, inline_json_schema, parse_window)
+from historico import DEFAULT_HISTORY_POINTS, downsample_lttb
+from ranking import ip_matcher
+from persistencia import DB_PATH, HistoryDatabase
+from armazenamento import StoreSnapshot, TrafficDataStore
+from visoes import (MAX_VIEWS_PER_SNAPSHOT, TrafficPage, build_drilldown_view, build_history_view, build_hosts_view,
+                    build_protocol_summary_view, build_traffic_view, client_history_rows, decode_cursor,
+                    protocol_summary_rows, select_clients, snapshot_view, traffic_page, traffic_rows)
+from transmissao import StreamBroadcaster
+from ingestao import INGEST_QUEUE_SIZE, IngestPipeline
+from transporte_local import SHM_PATH, run_shm_consumer, start_local_transports, stop_local_transports
+from estado_compartilhado import SHARED_STATE_DIR, SHARED_STATE_POLL_S, SharedState
+from respostas import etag_matches, json_response, snapshot_etag
+
+# --- SEÇÃO 1: ESTADO DO PROCESSO ---
+
+log_listeners = setup_logging()
 
 data_store = TrafficDataStore(timeout_seconds=15)
 
-def run_cleanup_task():
+stream_broadcaster = StreamBroadcaster(data_store)
+
+def publish_update():
+    """ Avisa os inscritos do streaming e, no modo multi-worker, os demais workers, de um snapshot novo. """
+    stream_broadcaster.publish()
+    if shared_state is not None and shared_state.is_owner:
+        shared_state.notify()
+
+ingest_pipeline = IngestPipeline(data_store, maxsize=INGEST_QUEUE_SIZE, on_update=publish_update)
+
+async def run_cleanup_task():
     while True:
-        time.sleep(data_store.CLIENT_TIMEOUT_SECONDS / 2)
+        await asyncio.sleep(data_store.CLIENT_TIMEOUT_SECONDS / 2)
         try:
             data_store.cleanup_inactive_clients()
+            publish_update()
         except Exception as e:
-            logging.error(f"Erro na tarefa de limpeza de clientes: {e}", exc_info=True)
+            logging.error("Erro na tarefa de limpeza de clientes: %s", e, exc_info=True)
 
 def clear_traffic_data():
     data_store.clear()
 
-# --- SEÇÃO 3: INICIALIZAÇÃO DA APLICAÇÃO FASTAPI ---
+shared_state = SharedState(SHARED_STATE_DIR, data_store) if SHARED_STATE_DIR else None
+
+async def run_shared_state_reader(state: SharedState, owner_stops: list):
+    """
+    Tarefa dos workers leitores: recarrega o estado publicado pelo dono e, se
+    o lock de dono ficar livre, assume os serviços dele.
+    """
+    while True:
+        try:
+            if state.try_acquire_ownership():
+                logging.warning("Worker %d assumiu o estado compartilhado.", os.getpid())
+                await asyncio.to_thread(state.sync)
+                owner_stops.append(await start_owner_services())
+                publish_update()
+                return
+            if await asyncio.to_thread(state.sync):
+                stream_broadcaster.publish()
+        except Exception as e:
+            logging.error("Erro ao recarregar o estado compartilhado: %s", e, exc_info=True)
+        await asyncio.sleep(SHARED_STATE_POLL_S)
+
+# --- SEÇÃO 2: INICIALIZAÇÃO DA APLICAÇÃO FASTAPI ---
+
+# Limiar da geração 0 do coletor cíclico (padrão do CPython: 700; 0 mantém o padrão).
+GC_GEN0_THRESHOLD = int(os.environ.get("NETVISION_GC_GEN0_THRESHOLD", "10000"))
+
+def tune_gc():
+    """
+    Ajuste único do coletor cíclico, na inicialização do processo. A conversão
+    de uma janela grande aloca centenas de milhares de objetos sem ciclos, e
+    com o limiar padrão cada lote dispara dezenas de coletas. Com 10000, uma
+    janela de 10 mil clientes passou de ~144 ms para ~86 ms (mediana) em
+    `parse_window`, igual a desligar o coletor durante a conversão.
+    """
+    if GC_GEN0_THRESHOLD > 0:
+        gc.set_threshold(GC_GEN0_THRESHOLD, *gc.get_threshold()[1:])
+
+async def start_owner_services() -> Callable[[], Awaitable[None]]:
+    """
+    Inicia o que só um processo pode rodar: banco, fila de ingestão, limpeza,
+    transportes locais e, no modo multi-worker, a publicação do estado.
+    Retorna a corrotina que os encerra.
+    """
+    database = HistoryDatabase(DB_PATH) if DB_PATH else None
+    if database:
+        data_store.attach_database(database)
+        database.start()
+    ingest_pipeline.start()
+    cleanup_task = asyncio.create_task(run_cleanup_task())
+    logging.info("Tarefa de limpeza de clientes inativos iniciada em segundo plano.")
+    transports = await start_local_transports(ingest_pipeline)
+    shm_task = asyncio.create_task(run_shm_consumer(SHM_PATH, ingest_pipeline)) if SHM_PATH else None
+    if shared_state is not None:
+        await shared_state.start_owner(ingest_pipeline)
+
+    async def stop():
+        if shm_task:
+            shm_task.cancel()
+        await stop_local_transports(transports)
+        cleanup_task.cancel()
+        await ingest_pipeline.stop()
+        if database:
+            data_store.detach_database()
+            database.stop()
+        if shared_state is not None:
+            await shared_state.stop()
+    return stop
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    cleanup_thread = threading.Thread(target=run_cleanup_task, daemon=True)
-    cleanup_thread.start()
-    logging.info("Tarefa de limpeza de clientes inativos iniciada em segundo plano.")
+    tune_gc()
+    owner_stops: List[Callable[[], Awaitable[None]]] = []
+    reader_task = None
+    reader_database = None
+    if shared_state is None:
+        owner_stops.append(await start_owner_services())
+    elif shared_state.try_acquire_ownership():
+        await asyncio.to_thread(shared_state.sync)  # Continua do estado de um dono anterior.
+        owner_stops.append(await start_owner_services())
+    else:
+        await asyncio.to_thread(shared_state.sync)
+        if DB_PATH:
+            # Leitores só consultam o banco (intervalos antigos); quem grava é o dono.
+            try:
+                reader_database = HistoryDatabase(DB_PATH, read_only=True)
+                data_store.history.database = reader_database
+            except sqlite3.Error as e:
+                logging.warning("Banco %s indisponível para leitura neste worker: %s", DB_PATH, e)
+        reader_task = asyncio.create_task(run_shared_state_reader(shared_state, owner_stops))
+        logging.info("Worker %d lê o estado compartilhado de %s.", os.getpid(), SHARED_STATE_DIR)
     yield
-    logging.info("Servidor a finalizar. Tarefa de limpeza será encerrada.")
+    stream_broadcaster.close()
+    if reader_task:
+        reader_task.cancel()
+    for stop in owner_stops:
+        await stop()
+    if shared_state is not None and not owner_stops:
+        await shared_state.stop()
+    if reader_database:
+        data_store.history.database = None
+        reader_database.stop()
+    logging.info("Servidor a finalizar. Tarefa de limpeza encerrada.")
 
 app = FastAPI(
     title="Dashboard de Tráfego de Servidor - API",
     description="API RESTful que recebe dados do `network_analyzer` e os fornece para um dashboard de visualização.",
-    version="2.9.0",
+    version="2.26.1",
     contact={ "name": "Equipe Backend", "url": "https://github.com/AlphaCompLabs/Dash_TempoReal" },
     lifespan=lifespan
 )
@@ -182,73 +198,334 @@ origins = [ "http://localhost:4200", "http://localhost", "http://127.0.0.1:4200"
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor"],
 )
 
-# --- SEÇÃO 4: ENDPOINTS DA API ---
+# --- SEÇÃO 3: ENDPOINTS DA API ---
 
-@app.post("/api/ingest", status_code=204, tags=["Data Ingestion"])
-def receive_traffic_data(payload: TrafficPayload):
+@app.post("/api/ingest", status_code=204, tags=["Data Ingestion"],
+          openapi_extra={"requestBody": {"required": True, "content": {
+              "application/json": {"schema": inline_json_schema(TrafficPayload)}}}})
+async def receive_traffic_data(request: Request):
+    # Handler assíncrono: valida a janela uma única vez e apenas a enfileira,
+    # sem ocupar o threadpool.
+    raw = await request.body()
+    try:
+        window = parse_window(raw)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    if shared_state is not None and not shared_state.is_owner:
+        # Worker leitor: a janela já foi validada aqui e segue para o dono.
+        try:
+            await shared_state.forward_window(raw)
+        except OSError as e:
+            logging.warning("Dono do estado compartilhado indisponível: %s", e)
+            raise HTTPException(status_code=503, detail="Ingestão temporariamente indisponível.")
+        return Response(status_code=204)
     try:
-        data_store.update_data(payload.clients, payload.window_end)
+        await ingest_pipeline.submit(window)
         return Response(status_code=204)
     except Exception as e:
-        logging.error(f"Erro inesperado ao armazenar dados: {e}", exc_info=True)
+        logging.error("Erro inesperado ao armazenar dados: %s", e, exc_info=True)
         raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR, detail="Ocorreu um erro interno no servidor.")
 
+# Visões memorizadas por snapshot, servidas com ETag e comprimidas (ver `respostas`).
+
+def cached_view(request: Request, name: str, build: Callable[[StoreSnapshot], object],
+                snapshot: Optional[StoreSnapshot] = None) -> Response:
+    """
+    Serve a visão `name` do snapshot atual.
+
+    :param request: Requisição, para ler o If-None-Match.
+    :param name: Chave da visão no cache do snapshot (ex: "traffic", "protocols:10.0.0.5").
+    :param build: Função que monta o conteúdo (JSON serializável) a partir do snapshot.
+    :param snapshot: Snapshot já obtido pela rota (padrão: o atual do store).
+    """
+    snapshot = snapshot or data_store.snapshot
+    etag = snapshot_etag(snapshot)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = snapshot_view(snapshot, name, build)
+    return json_response(request, snapshot, name, body, headers)
+
+def cached_page(request: Request, name: str, build: Callable[[StoreSnapshot], TrafficPage],
+                snapshot: StoreSnapshot) -> Response:
+    """
+    Como `cached_view`, para páginas do ranking: as linhas vão no corpo e o
+    total e o próximo cursor nos cabeçalhos `X-Total-Count` e `X-Next-Cursor`,
+    memorizados no snapshot ao lado do corpo.
+    """
+    etag = snapshot_etag(snapshot)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = snapshot.views.get(name)
+    meta = snapshot.views.get(f"{name}#page")
+    if body is None or meta is None:
+        page = build(snapshot)
+        body = dump_json(page.rows)
+        meta = dump_json([page.total, page.next_cursor])
+        if len(snapshot.views) < MAX_VIEWS_PER_SNAPSHOT - 1:
+            snapshot.views[name] = body
+            snapshot.views[f"{name}#page"] = meta
+    total, next_cursor = json.loads(meta)
+    headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return json_response(request, snapshot, name, body, headers)
+
+HOST_QUERY = Query(None, description="Restringe aos dados enviados por este host (campo `host` do produtor).")
+IFACE_QUERY = Query(None, description="Restringe aos dados desta interface do produtor.")
+MAX_POINTS_QUERY = Query(None, ge=3, description="Reduz a série a no máximo este número de pontos (LTTB), preservando picos.")
+
+def filtered_clients(snapshot: StoreSnapshot, host: Optional[str], iface: Optional[str]) -> Mapping[str, ClientRecord]:
+    """ `select_clients` para as rotas: responde 404 se o filtro não casar com nenhum produtor. """
+    clients = select_clients(snapshot, host, iface)
+    if clients is None:
+        raise HTTPException(status_code=404, detail=f"Nenhum produtor encontrado para host={host!r}, iface={iface!r}.")
+    return clients
+
+@app.get("/api/hosts", tags=["Data Consumption"])
+async def get_hosts(request: Request):
+    """ Lista os produtores (host/interface) conhecidos, com o número de clientes e a última janela. """
+    return cached_view(request, "hosts", build_hosts_view)
+
 @app.get("/api/traffic", response_model=List[ClientTrafficSummary], tags=["Data Consumption"])
-def get_main_traffic_data():
-    latest_clients = data_store.get_data()
-    if not latest_clients:
-        return []
-    response_data = [
-        ClientTrafficSummary(ip=ip, inbound=data.in_bytes, outbound=data.out_bytes)
-        for ip, data in latest_clients.items()
-    ]
-    return response_data
+async def get_main_traffic_data(
+    request: Request,
+    host: Optional[str] = HOST_QUERY,
+    iface: Optional[str] = IFACE_QUERY,
+    sort: Optional[Literal["total", "inbound", "outbound"]] = Query(None, description="Ordena de forma decrescente por este campo (padrão com paginação: total)."),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de clientes na resposta (top-N)."),
+    offset: int = Query(0, ge=0, description="Clientes a pular no ranking."),
+    cursor: Optional[str] = Query(None, description="Continua após o cursor devolvido em `X-Next-Cursor` (estável entre janelas)."),
+    prefix: Optional[str] = Query(None, description="Filtra por prefixo CIDR (ex: 10.0.0.0/8), IP exato ou prefixo textual (ex: 192.168.)."),
+):
+    """
+    Fornece o tráfego por cliente. Sem parâmetros, a lista completa (sem ordem
+    definida). Com `sort`, `limit`, `offset`, `cursor` ou `prefix`, o ranking
+    decrescente paginado, com o total em `X-Total-Count` e o cursor da próxima
+    página em `X-Next-Cursor`.
+    """
+    paged = sort is not None or limit is not None or offset or cursor is not None or prefix is not None
+    if not paged:
+        if host is None and iface is None:
+            return cached_view(request, "traffic", build_traffic_view)
+        snapshot = data_store.snapshot
+        clients = filtered_clients(snapshot, host, iface)
+        return cached_view(request, f"traffic:{host}:{iface}", lambda _: traffic_rows(clients), snapshot)
+
+    if cursor is not None and offset:
+        raise HTTPException(status_code=400, detail="Use 'offset' ou 'cursor', não ambos.")
+    if cursor is not None:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido.")
+    snapshot = data_store.snapshot
+    clients = None if host is None and iface is None else filtered_clients(snapshot, host, iface)
+    match = ip_matcher(prefix) if prefix else None
+    sort = sort or "total"
+    return cached_page(request, f"traffic:{host}:{iface}:{sort}:{limit}:{offset}:{cursor}:{prefix}",
+                       lambda current: traffic_page(current, data_store.ranking, sort, limit, offset,
+                                                    cursor, clients, match),
+                       snapshot)
 
 @app.get("/api/traffic/history", response_model=List[HistoricalDataPoint], tags=["Data Consumption"])
-def get_traffic_history():
+async def get_traffic_history(
+    request: Request,
+    from_ts: Optional[float] = Query(None, alias="from", description="Início do intervalo (época Unix, em segundos)."),
+    to_ts: Optional[float] = Query(None, alias="to", description="Fim do intervalo (padrão: o ponto mais recente)."),
+    resolution: Optional[int] = Query(None, description="Resolução em segundos (5, 60 ou 3600). Padrão: a mais fina que cobre o intervalo."),
+    host: Optional[str] = HOST_QUERY,
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+):
     """
-    Fornece os dados históricos de tráfego total (inbound/outbound) do último
-    minuto, com pontos de dados a cada 5 segundos.
+    Fornece o histórico de tráfego total (inbound/outbound). Sem parâmetros,
+    retorna o último minuto com pontos a cada 5 segundos; com `from`/`to`, o
+    intervalo pedido na resolução indicada ou escolhida automaticamente. Com
+    `host`, apenas o tráfego enviado por esse produtor (todas as interfaces).
+    Com `max_points`, a série é reduzida no servidor, e o tamanho da resposta
+    não depende do intervalo pedido.
     """
+    # O histórico vem do snapshot, como as demais visões: a ETag e o conteúdo são da mesma versão.
+    snapshot = data_store.snapshot
+    history = snapshot.tiers
+    if host is not None:
+        history = snapshot.host_tiers.get(host)
+        if history is None:
+            raise HTTPException(status_code=404, detail=f"Nenhum produtor encontrado para host={host!r}.")
+    if resolution is not None and resolution not in history.resolutions:
+        raise HTTPException(status_code=400, detail=f"Resolução inválida. Use uma de: {history.resolutions}.")
+    if from_ts is not None and to_ts is not None and from_ts > to_ts:
+        raise HTTPException(status_code=400, detail="O parâmetro 'from' deve ser anterior a 'to'.")
+    if from_ts is None and to_ts is None and resolution is None and host is None and max_points is None:
+        return cached_view(request, "history", build_history_view, snapshot)
+
+    def build(_: StoreSnapshot) -> list:
+        if from_ts is None:
+            points = history.recent(DEFAULT_HISTORY_POINTS, resolution)
+            if to_ts is not None:
+                points = [p for p in points if p.timestamp <= to_ts]
+        else:
+            points = history.query(from_ts, to_ts, resolution)
+        if max_points is not None:
+            points = downsample_lttb(points, max_points)
+        return [point._asdict() for point in points]
+
     try:
-        history_data = data_store.get_history()
-        return history_data
+        return cached_view(request, f"history:{host}:{from_ts}:{to_ts}:{resolution}:{max_points}", build, snapshot)
     except Exception as e:
-        logging.error(f"Erro ao obter dados do histórico: {e}", exc_info=True)
+        logging.error("Erro ao obter dados do histórico: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Erro ao processar o histórico de tráfego.")
 
 @app.get("/api/traffic/{client_ip}/protocols", response_model=List[ProtocolDrilldown], tags=["Data Consumption"])
-def get_protocol_drilldown_data(client_ip: str):
-    latest_clients = data_store.get_data()
-    if not latest_clients or client_ip not in latest_clients:
+async def get_protocol_drilldown_data(client_ip: str, request: Request,
+                                      host: Optional[str] = HOST_QUERY, iface: Optional[str] = IFACE_QUERY):
+    snapshot = data_store.snapshot
+    client = filtered_clients(snapshot, host, iface).get(client_ip)
+    if client is None:
+        raise HTTPException(status_code=404, detail=f"O IP '{client_ip}' não foi encontrado.")
+    return cached_view(request, f"protocols:{client_ip}:{host}:{iface}", lambda _: build_drilldown_view(client), snapshot)
+
+@app.get("/api/traffic/{client_ip}/history", response_model=List[HistoricalDataPoint], tags=["Data Consumption"])
+async def get_client_history(
+    client_ip: str,
+    request: Request,
+    from_ts: Optional[float] = Query(None, alias="from", description="Início do intervalo (época Unix, em segundos)."),
+    to_ts: Optional[float] = Query(None, alias="to", description="Fim do intervalo (padrão: o ponto mais recente)."),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+):
+    """
+    Fornece a série temporal (inbound/outbound) de um cliente. Sem parâmetros,
+    retorna todo o histórico mantido (padrão: 10 minutos com pontos de 5s).
+    """
+    snapshot = data_store.snapshot
+    name = f"client_history:{client_ip}:{from_ts}:{to_ts}:{max_points}"
+    if shared_state is not None and not shared_state.is_owner:
+        return await reader_client_history(request, snapshot, name, client_ip, from_ts, to_ts, max_points)
+    if client_ip not in data_store.client_history:
         raise HTTPException(status_code=404, detail=f"O IP '{client_ip}' não foi encontrado.")
-    client_protocols = latest_clients[client_ip].protocols
-    response_data = [
-        ProtocolDrilldown(
-            name=protocol,
-            inbound=data.in_bytes,
-            outbound=data.out_bytes,
-            y=(data.in_bytes + data.out_bytes)
-        )
-        for protocol, data in client_protocols.items()
-    ]
-    return response_data
+    return cached_view(request, name, lambda _: client_history_rows(data_store, client_ip, from_ts, to_ts,
+                                                                    max_points) or [], snapshot)
+
+async def reader_client_history(request: Request, snapshot: StoreSnapshot, name: str, client_ip: str,
+                                from_ts: Optional[float], to_ts: Optional[float],
+                                max_points: Optional[int]) -> Response:
+    """
+    Histórico por cliente num worker leitor. Ele não vai no estado
+    compartilhado, só o dono o mantém: a ETag e o memo do snapshot local são
+    conferidos antes, e o dono só é consultado quando nenhum dos dois responde.
+
+    As linhas ficam no memo apenas se forem da mesma versão do snapshot local;
+    com o dono à frente deste worker, a resposta leva a ETag da versão do dono.
+    """
+    if name in snapshot.views or etag_matches(request.headers.get("if-none-match"), snapshot_etag(snapshot)):
+        return cached_view(request, name, lambda _: [], snapshot)
+    reply = await shared_state.query_client_history(client_ip, from_ts, to_ts, max_points)
+    rows = reply["rows"]
+    if rows is None:
+        raise HTTPException(status_code=404, detail=f"O IP '{client_ip}' não foi encontrado.")
+    if (reply["boot_id"], reply["version"]) == (snapshot.boot_id, snapshot.version):
+        return cached_view(request, name, lambda _: rows, snapshot)
+    etag = f'"{reply["boot_id"]}-{reply["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return json_response(request, snapshot, name, dump_json(rows), headers, memoize=False)
 
 @app.get("/api/traffic/protocols/summary", response_model=List[GlobalProtocolSummary], tags=["Data Consumption"])
-def get_global_protocol_summary():
-    latest_clients = data_store.get_data()
-    protocol_summary: Dict[str, int] = {}
-    for client_data in latest_clients.values():
-        for protocol_name, protocol_data in client_data.protocols.items():
-            total_bytes = protocol_data.in_bytes + protocol_data.out_bytes
-            protocol_summary[protocol_name] = protocol_summary.get(protocol_name, 0) + total_bytes
-    response_data = [
-        GlobalProtocolSummary(name=name, y=total_traffic)
-        for name, total_traffic in protocol_summary.items()
-    ]
-    return response_data
+async def get_global_protocol_summary(request: Request, host: Optional[str] = HOST_QUERY,
+                                      iface: Optional[str] = IFACE_QUERY):
+    if host is None and iface is None:
+        return cached_view(request, "protocols_summary", build_protocol_summary_view)
+    snapshot = data_store.snapshot
+    clients = filtered_clients(snapshot, host, iface)
+    return cached_view(request, f"protocols_summary:{host}:{iface}", lambda _: protocol_summary_rows(clients), snapshot)
+
+# Seção do /api/dashboard -> (visão memorizada no snapshot, função que a monta).
+DASHBOARD_SECTIONS: Dict[str, Tuple[str, Callable[[StoreSnapshot], object]]] = {
+    "traffic": ("traffic", build_traffic_view),
+    "history": ("history", build_history_view),
+    "protocols": ("protocols_summary", build_protocol_summary_view),
+    "hosts": ("hosts", build_hosts_view),
+    "server_info": ("server_info", lambda _: {"server_ip": get_cached_lan_ip()}),
+}
+
+@app.get("/api/dashboard", tags=["Data Consumption"])
+async def get_dashboard(
+    request: Request,
+    sections: Optional[str] = Query(None, description="Seções separadas por vírgula: traffic, history, protocols, hosts, server_info. Padrão: todas."),
+    since_version: Optional[str] = Query(None, description="Token `<boot_id>-<versão>` da última resposta; se ainda for o atual, a resposta é 304."),
+):
+    """
+    Fornece as visões do dashboard numa única resposta, todas lidas do mesmo
+    snapshot: `{"version": N, "boot_id": "...", "traffic": [...], ...}`.
+    Cada seção reaproveita o JSON já serializado da rota correspondente.
+
+    `since_version` leva o `boot_id` junto com a versão (o mesmo valor da
+    ETag, sem aspas): a versão recomeça em 0 quando o backend reinicia, e só
+    a versão não distinguiria o estado anterior do novo.
+    """
+    if sections is None:
+        selected = list(DASHBOARD_SECTIONS)
+    else:
+        requested = {name.strip() for name in sections.split(",") if name.strip()}
+        unknown = requested - DASHBOARD_SECTIONS.keys()
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Seções desconhecidas: {sorted(unknown)}. Use: {list(DASHBOARD_SECTIONS)}.")
+        selected = [name for name in DASHBOARD_SECTIONS if name in requested]
+
+    snapshot = data_store.snapshot
+    token = f"{snapshot.boot_id}-{snapshot.version}"
+    etag = f'"{token}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if since_version == token or etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    name = "dashboard:" + ",".join(selected)
+    body = snapshot.views.get(name)
+    if body is None:
+        parts = [b'{"version":', str(snapshot.version).encode("ascii"),
+                 b',"boot_id":"', snapshot.boot_id.encode("ascii"), b'"']
+        for section in selected:
+            view, build = DASHBOARD_SECTIONS[section]
+            parts += [b',"', section.encode("ascii"), b'":', snapshot_view(snapshot, view, build)]
+        parts.append(b"}")
+        body = b"".join(parts)
+        if len(snapshot.views) < MAX_VIEWS_PER_SNAPSHOT:
+            snapshot.views[name] = body
+    return json_response(request, snapshot, name, body, headers)
+
+STREAM_HEARTBEAT_S = 15.0
+
+async def stream_events(subscriber: asyncio.Queue):
+    """ Gera os eventos de um inscrito, com comentários de keep-alive nos períodos ociosos. """
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.get(), timeout=STREAM_HEARTBEAT_S)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if message is None:
+                break
+            yield message
+    finally:
+        stream_broadcaster.unsubscribe(subscriber)
+
+@app.get("/api/traffic/stream", tags=["Data Consumption"])
+async def stream_traffic_data():
+    """
+    Transmite (Server-Sent Events) o tráfego por cliente e o histórico a cada
+    nova janela ingerida. O primeiro evento traz o estado atual.
+    """
+    return StreamingResponse(
+        stream_events(stream_broadcaster.subscribe()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 def get_lan_ip():
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -0,0 +1,192 @@
+# =====================================================================================
+# MÓDULO DE MAPA PERSISTENTE
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Mapa imutável com escrita por cópia do caminho: cada snapshot do
+#            store compartilha com o anterior tudo o que não mudou na janela.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+from collections.abc import ItemsView, ValuesView
+from typing import Iterable, Mapping, Optional
+
+# --- SEÇÃO 1: MAPA PERSISTENTE (ESCRITA POR CÓPIA DO CAMINHO) ---
+
+MAP_BITS = 6                # Bits do hash consumidos por nível: nós de 64 posições.
+MAP_WIDTH = 1 << MAP_BITS
+MAP_MASK = MAP_WIDTH - 1
+MAP_LEAF_SIZE = 256          # Entradas por folha antes de dividi-la num nó.
+_MISSING = object()
+
+def _map_lookup(root: list, key: str, default=None):
+    h = hash(key)
+    node = root
+    shift = 0
+    while True:
+        slot = node[(h >> shift) & MAP_MASK]
+        if slot is None:
+            return default
+        if type(slot) is dict:
+            return slot.get(key, default)
+        node = slot
+        shift += MAP_BITS
+
+def _map_leaves(root: list) -> Iterable[dict]:
+    stack = [root]
+    while stack:
+        for slot in stack.pop():
+            if slot is None:
+                continue
+            if type(slot) is dict:
+                yield slot
+            else:
+                stack.append(slot)
+
+class PersistentMap(Mapping):
+    """
+    Mapeamento imutável organizado como uma trie de hash: nós de `MAP_WIDTH`
+    posições indexados por fatias do hash da chave, com folhas `dict` de até
+    `MAP_LEAF_SIZE` entradas.
+
+    Versões diferentes compartilham tudo o que não mudou. Um lote de escrita
+    (`MapWriter`) copia só os nós no caminho de cada chave alterada, então
+    publicar um snapshot custa O(IPs alterados × profundidade) — com 1 milhão
+    de IPs, a profundidade é 3 — e não O(total de clientes).
+    """
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, root: Optional[list] = None, length: int = 0):
+        self._root = root if root is not None else [None] * MAP_WIDTH
+        self._len = length
+
+    def __getitem__(self, key: str):
+        value = _map_lookup(self._root, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        return _map_lookup(self._root, key, default)
+
+    def __contains__(self, key) -> bool:
+        return _map_lookup(self._root, key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        for leaf in _map_leaves(self._root):
+            yield from leaf
+
+    def items(self) -> ItemsView:
+        return _MapItems(self)
+
+    def values(self) -> ValuesView:
+        return _MapValues(self)
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self.items())!r})"
+
+class _MapItems(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self):
+        for leaf in _map_leaves(self._mapping._root):
+            yield from leaf.items()
+
+class _MapValues(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self):
+        for leaf in _map_leaves(self._mapping._root):
+            yield from leaf.values()
+
+EMPTY_MAP = PersistentMap()
+
+class MapWriter:
+    """
+    Alterações em lote sobre um `PersistentMap`. Na primeira escrita do lote em
+    cada nó do caminho, o nó é copiado; as seguintes reutilizam a cópia.
+    `persistent()` congela o resultado sem copiar nada.
+    """
+    __slots__ = ("_root", "_len", "_owned")
+
+    def __init__(self, base: PersistentMap):
+        self._root = list(base._root)
+        self._len = len(base)
+        self._owned = {id(self._root)}  # Nós criados neste lote (podem ser alterados no lugar).
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, key: str):
+        value = _map_lookup(self._root, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        return _map_lookup(self._root, key, default)
+
+    def __contains__(self, key) -> bool:
+        return _map_lookup(self._root, key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key: str, value):
+        self.put(key, value)
+
+    def put(self, key: str, value) -> bool:
+        """ Grava `key` e retorna True se a chave é nova (uma única descida na trie). """
+        leaf = self._leaf_for_write(key)
+        size = len(leaf)
+        leaf[key] = value
+        if len(leaf) != size:
+            self._len += 1
+            return True
+        return False
+
+    def pop(self, key: str, default=None):
+        if key not in self:
+            return default  # Nada a copiar.
+        self._len -= 1
+        return self._leaf_for_write(key).pop(key)
+
+    def persistent(self) -> PersistentMap:
+        frozen = PersistentMap(self._root, self._len)
+        self._root = list(self._root)
+        self._owned = {id(self._root)}
+        return frozen
+
+    def _leaf_for_write(self, key: str) -> dict:
+        """ Folha da chave, copiando o caminho até ela e dividindo a folha se estiver cheia. """
+        h = hash(key)
+        owned = self._owned
+        node = self._root
+        shift = 0
+        while True:
+            index = (h >> shift) & MAP_MASK
+            slot = node[index]
+            if slot is None:
+                slot = node[index] = {}
+                owned.add(id(slot))
+                return slot
+            if id(slot) not in owned:
+                slot = node[index] = dict(slot) if type(slot) is dict else list(slot)
+                owned.add(id(slot))
+            if type(slot) is dict:
+                if len(slot) < MAP_LEAF_SIZE or key in slot or shift + MAP_BITS >= 64:
+                    return slot
+                # Folha cheia: vira um nó com as entradas redistribuídas pelo nível seguinte.
+                child: list = [None] * MAP_WIDTH
+                owned.add(id(child))
+                child_shift = shift + MAP_BITS
+                for k, v in slot.items():
+                    child_index = (hash(k) >> child_shift) & MAP_MASK
+                    leaf = child[child_index]
+                    if leaf is None:
+                        leaf = child[child_index] = {}
+                        owned.add(id(leaf))
+                    leaf[k] = v
+                slot = node[index] = child
+            node = slot
+            shift += MAP_BITS
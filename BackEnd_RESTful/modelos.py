@@ -0,0 +1,155 @@
+# =====================================================================================
+# MÓDULO DE MODELOS DE DADOS
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Modelos pydantic documentados pela API, os TypedDicts usados na
+#            validação da ingestão e os registros internos (`ClientRecord`,
+#            `HistoryRecord`, `IngestWindow`) compartilhados pelos demais módulos.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import json
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from typing_extensions import NotRequired, TypedDict
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+# Opcional: sem ele, a serialização usa o `json` da biblioteca padrão.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# --- SEÇÃO 1: MODELOS DE DADOS PARA INGESTÃO E CONSUMO ---
+
+class ProtocolInOutData(BaseModel):
+    in_bytes: int = Field(alias="in")
+    out_bytes: int = Field(alias="out")
+
+class ClientData(BaseModel):
+    in_bytes: int
+    out_bytes: int
+    protocols: Dict[str, ProtocolInOutData]
+
+class TrafficPayload(BaseModel):
+    host: str
+    iface: Optional[str] = None
+    server_ip: Optional[str] = None
+    window_start: float
+    window_end: float
+    clients: Dict[str, ClientData]
+    
+class GlobalProtocolSummary(BaseModel):
+    name: str
+    y: int
+
+class HistoricalDataPoint(BaseModel):
+    """ Representa um ponto de dados no gráfico de histórico. """
+    timestamp: float
+    total_inbound: int
+    total_outbound: int
+
+class ClientTrafficSummary(BaseModel):
+    ip: str
+    inbound: int
+    outbound: int
+
+class ProtocolDrilldown(BaseModel):
+    name: str
+    inbound: int
+    outbound: int
+    y: int
+
+# Os modelos acima documentam a API (OpenAPI). No caminho de ingestão, a janela é
+# validada uma única vez por um `TypeAdapter` sobre `TypedDict`s, que produz dicts
+# simples sem instanciar um modelo por cliente/protocolo.
+ProtocolInOutDict = TypedDict("ProtocolInOutDict", {"in": int, "out": int})
+
+class ClientDict(TypedDict):
+    in_bytes: int
+    out_bytes: int
+    protocols: Dict[str, ProtocolInOutDict]
+
+class TrafficPayloadDict(TypedDict):
+    host: str
+    iface: NotRequired[Optional[str]]
+    server_ip: NotRequired[Optional[str]]
+    window_start: float
+    window_end: float
+    clients: Dict[str, ClientDict]
+
+TRAFFIC_PAYLOAD_ADAPTER = TypeAdapter(TrafficPayloadDict)
+
+class ClientRecord:
+    """ Registro interno e compacto de um cliente: protocolos como `{nome: (in, out)}`. """
+    __slots__ = ("in_bytes", "out_bytes", "protocols")
+
+    def __init__(self, in_bytes: int, out_bytes: int, protocols: Dict[str, Tuple[int, int]]):
+        self.in_bytes = in_bytes
+        self.out_bytes = out_bytes
+        self.protocols = protocols
+
+class HistoryRecord(NamedTuple):
+    """ Ponto do histórico no store (mesmos campos de `HistoricalDataPoint`). """
+    timestamp: float
+    total_inbound: int
+    total_outbound: int
+
+# Partição do estado: (host, interface) do produtor que enviou a janela.
+PartitionKey = Tuple[str, str]
+
+class IngestWindow(NamedTuple):
+    """ Janela já validada, pronta para a fila de ingestão. """
+    clients: Dict[str, ClientRecord]
+    window_end: float
+    host: str = ""
+    iface: str = ""
+
+def merge_client_records(records: Iterable[ClientRecord]) -> ClientRecord:
+    """ Soma os registros de um mesmo IP vistos por produtores diferentes. """
+    in_bytes = out_bytes = 0
+    protocols: Dict[str, Tuple[int, int]] = {}
+    for record in records:
+        in_bytes += record.in_bytes
+        out_bytes += record.out_bytes
+        for name, (p_in, p_out) in record.protocols.items():
+            prev_in, prev_out = protocols.get(name, (0, 0))
+            protocols[name] = (prev_in + p_in, prev_out + p_out)
+    return ClientRecord(in_bytes, out_bytes, protocols)
+
+def parse_window(raw: bytes) -> IngestWindow:
+    """
+    Valida uma janela JSON na borda e a converte em registros internos.
+
+    :raises ValidationError: Se o JSON não seguir o formato de `TrafficPayload`.
+    """
+    payload = TRAFFIC_PAYLOAD_ADAPTER.validate_json(raw)
+    clients = {
+        ip: ClientRecord(c["in_bytes"], c["out_bytes"],
+                         {name: (p["in"], p["out"]) for name, p in c["protocols"].items()})
+        for ip, c in payload["clients"].items()
+    }
+    return IngestWindow(clients, payload["window_end"], payload["host"], payload.get("iface") or "")
+
+def inline_json_schema(model: type) -> dict:
+    """ Esquema JSON de `model` sem `$defs`, para uso em `openapi_extra`. """
+    schema = model.model_json_schema(by_alias=True)
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref:
+                return resolve(defs[ref.rsplit("/", 1)[-1]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+    return resolve(schema)
+
+def dump_json(content) -> bytes:
+    """ Serializa `content` diretamente, sem a revalidação do `response_model` (com orjson, se instalado). """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
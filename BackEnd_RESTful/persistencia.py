@@ -0,0 +1,236 @@
+# =====================================================================================
+# MÓDULO DE PERSISTÊNCIA (SQLITE)
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Persistência opcional do histórico em SQLite (modo WAL), gravada em
+#            lotes por uma thread dedicada e consultada para intervalos que não
+#            cabem mais na memória.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from modelos import ClientRecord, HistoryRecord, PartitionKey
+from historico import HISTORY_TIERS
+
+# --- SEÇÃO 1: PERSISTÊNCIA OPCIONAL (SQLITE EM MODO WAL) ---
+
+DB_PATH = os.environ.get("NETVISION_DB_PATH")
+DB_FLUSH_INTERVAL_S = float(os.environ.get("NETVISION_DB_FLUSH_S", "1.0"))
+DB_RETENTION_DAYS = float(os.environ.get("NETVISION_DB_RETENTION_DAYS", "365"))
+DB_MAINTENANCE_INTERVAL_S = 3600.0
+
+class HistoryDatabase:
+    """
+    Persiste o histórico agregado e o último estado de cada cliente em SQLite.
+
+    A ingestão apenas enfileira o que mudou; uma thread dedicada agrupa os
+    itens e grava um lote por transação a cada `flush_interval_s`. O histórico
+    usa a chave primária `(resolution, bucket)` numa tabela WITHOUT ROWID, então
+    consultas por intervalo e a retenção percorrem só a faixa pedida.
+
+    A versão do esquema fica em `PRAGMA user_version`; um banco de versão
+    anterior é migrado uma única vez, ao ser aberto para escrita.
+    """
+    SCHEMA_VERSION = 2
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS history ("
+        " resolution INTEGER NOT NULL, bucket INTEGER NOT NULL, last_ts REAL NOT NULL,"
+        " inbound INTEGER NOT NULL, outbound INTEGER NOT NULL,"
+        " PRIMARY KEY (resolution, bucket)) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS host_clients ("
+        " host TEXT NOT NULL, iface TEXT NOT NULL, ip TEXT NOT NULL, last_seen REAL NOT NULL,"
+        " in_bytes INTEGER NOT NULL, out_bytes INTEGER NOT NULL, protocols TEXT NOT NULL,"
+        " PRIMARY KEY (host, iface, ip)) WITHOUT ROWID",
+    )
+    # Versão de destino -> comandos que levam a versão anterior até ela (após `SCHEMA`).
+    MIGRATIONS = {
+        # 1 -> 2: clientes particionados por (host, interface). Os antigos ficam na
+        # partição sem rótulo, a mesma das janelas sem `host`/`iface`.
+        2: ("INSERT OR IGNORE INTO host_clients"
+            " SELECT '', '', ip, last_seen, in_bytes, out_bytes, protocols FROM clients",
+            "DROP TABLE clients"),
+    }
+
+    def __init__(self, path: str, tiers=HISTORY_TIERS, flush_interval_s: float = DB_FLUSH_INTERVAL_S,
+                 retention_days: float = DB_RETENTION_DAYS, read_only: bool = False):
+        """
+        :param path: Arquivo do banco SQLite (criado se não existir).
+        :param tiers: Níveis `(resolução, retenção em memória)` do `TieredHistory`.
+        :param flush_interval_s: Intervalo máximo entre gravações em lote.
+        :param retention_days: Retenção no banco do nível mais grosso. Os demais
+                               guardam 24x a retenção em memória, até esse limite.
+        :param read_only: Abre só para consulta (workers leitores); `start` não deve ser chamado.
+        """
+        self.path = path
+        self.read_only = read_only
+        self.flush_interval_s = flush_interval_s
+        coarsest = int(retention_days * 86400)
+        self.retention_s = {res: min(coarsest, keep * 24) for res, keep in tiers}
+        self.retention_s[tiers[-1][0]] = coarsest
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        if read_only:
+            return
+        self._migrate(self._reader)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """ Cria as tabelas que faltarem e aplica as migrações pendentes numa única transação. """
+        with conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version == 0:
+                # Sem versão: banco novo ou do formato 1, anterior ao controle de versão.
+                legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clients'").fetchone()
+                version = 1 if legacy else self.SCHEMA_VERSION
+            conn.execute("BEGIN")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            for target in range(version + 1, self.SCHEMA_VERSION + 1):
+                for statement in self.MIGRATIONS[target]:
+                    conn.execute(statement)
+                logging.info("Banco %s migrado para a versão %d do esquema.", self.path, target)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # Só tem efeito num banco novo.
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run_writer, name="netvision-db", daemon=True)
+        self._thread.start()
+        logging.info("Persistência ativa em %s (gravação em lote a cada %.1fs).", self.path, self.flush_interval_s)
+
+    def stop(self):
+        """ Grava o que estiver pendente e fecha as conexões. """
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+        self._reader.close()
+
+    # --- Escrita (chamada pelo store) ---
+
+    def enqueue(self, history_rows: List[Tuple[int, int, float, int, int]],
+                clients: Dict[PartitionKey, Dict[str, ClientRecord]], last_seen: float):
+        """ Enfileira baldes `(resolução, balde, ts, in, out)` e clientes atualizados por partição. Não bloqueia. """
+        self._queue.put((history_rows, clients, last_seen))
+
+    # --- Leitura ---
+
+    def query(self, resolution_s: int, first_bucket: int, last_bucket: int) -> List[HistoryRecord]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT last_ts, inbound, outbound FROM history"
+                " WHERE resolution = ? AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                (resolution_s, first_bucket, last_bucket)).fetchall()
+        return [HistoryRecord(*row) for row in rows]
+
+    def load_recent_history(self, resolution_s: int, since_bucket: int) -> List[Tuple[int, float, int, int]]:
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT bucket, last_ts, inbound, outbound FROM history"
+                " WHERE resolution = ? AND bucket >= ? ORDER BY bucket",
+                (resolution_s, since_bucket)).fetchall()
+
+    def load_clients(self, since_ts: float) -> List[Tuple[PartitionKey, str, float, ClientRecord]]:
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT host, iface, ip, last_seen, in_bytes, out_bytes, protocols FROM host_clients"
+                " WHERE last_seen >= ?", (since_ts,)).fetchall()
+        return [
+            ((host, iface), ip, last_seen,
+             ClientRecord(in_b, out_b, {name: tuple(v) for name, v in json.loads(protocols).items()}))
+            for host, iface, ip, last_seen, in_b, out_b, protocols in rows
+        ]
+
+    # --- Thread de gravação ---
+
+    def _run_writer(self):
+        conn = self._connect()
+        next_maintenance = time.monotonic() + DB_MAINTENANCE_INTERVAL_S
+        running = True
+        try:
+            while running:
+                items = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval_s
+                while items[-1] is not None:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        items.append(self._queue.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                if items[-1] is None:
+                    running = False
+                    items.pop()
+                try:
+                    self._write_batch(conn, items)
+                    if not running or time.monotonic() >= next_maintenance:
+                        next_maintenance = time.monotonic() + DB_MAINTENANCE_INTERVAL_S
+                        self.maintain(conn)
+                except sqlite3.Error as e:
+                    logging.error("Erro ao gravar %d lote(s) no banco %s: %s", len(items), self.path, e)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, items: list):
+        if not items:
+            return
+        # Agrupa o lote: cada balde é somado uma vez e cada cliente grava só o estado mais recente.
+        buckets: Dict[Tuple[int, int], List] = {}
+        clients: Dict[Tuple[str, str, str], Tuple[float, ClientRecord]] = {}
+        for history_rows, batch_clients, last_seen in items:
+            for resolution, bucket, last_ts, inbound, outbound in history_rows:
+                acc = buckets.get((resolution, bucket))
+                if acc is None:
+                    buckets[(resolution, bucket)] = [last_ts, inbound, outbound]
+                else:
+                    acc[0] = max(acc[0], last_ts)
+                    acc[1] += inbound
+                    acc[2] += outbound
+            for (host, iface), records in batch_clients.items():
+                for ip, record in records.items():
+                    clients[(host, iface, ip)] = (last_seen, record)
+        with conn:
+            conn.executemany(
+                "INSERT INTO history (resolution, bucket, last_ts, inbound, outbound) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (resolution, bucket) DO UPDATE SET"
+                " last_ts = max(last_ts, excluded.last_ts),"
+                " inbound = inbound + excluded.inbound, outbound = outbound + excluded.outbound",
+                [(res, bucket, acc[0], acc[1], acc[2]) for (res, bucket), acc in buckets.items()])
+            conn.executemany(
+                "INSERT OR REPLACE INTO host_clients (host, iface, ip, last_seen, in_bytes, out_bytes, protocols)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(host, iface, ip, seen, r.in_bytes, r.out_bytes, json.dumps(r.protocols, separators=(",", ":")))
+                 for (host, iface, ip), (seen, r) in clients.items()])
+
+    def maintain(self, conn: Optional[sqlite3.Connection] = None):
+        """ Aplica a retenção, devolve páginas livres ao sistema e trunca o WAL. """
+        conn = conn or self._reader
+        now = time.time()
+        with conn:
+            for resolution, keep_s in self.retention_s.items():
+                conn.execute("DELETE FROM history WHERE resolution = ? AND bucket < ?",
+                             (resolution, int((now - keep_s) // resolution)))
+            conn.execute("DELETE FROM host_clients WHERE last_seen < ?", (now - self.retention_s[min(self.retention_s)],))
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
@@ -0,0 +1,150 @@
+# =====================================================================================
+# MÓDULO DE RANKING DE CLIENTES
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Índice ordenado dos clientes por tráfego, usado no top-N e na
+#            paginação por cursor de /api/traffic, e o filtro de IP/CIDR das rotas.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import bisect
+import ipaddress
+import socket
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from modelos import ClientRecord
+
+# --- SEÇÃO 1: ÍNDICE DE RANKING (TOP-N E PAGINAÇÃO DE /api/traffic) ---
+
+RANKING_SORTS = ("total", "inbound", "outbound")
+RankingEntry = Tuple[int, str]  # (-valor, IP): a ordem crescente é a do ranking.
+
+def ranking_entry(sort: str, ip: str, in_bytes: int, out_bytes: int) -> RankingEntry:
+    if sort == "inbound":
+        return (-in_bytes, ip)
+    if sort == "outbound":
+        return (-out_bytes, ip)
+    return (-(in_bytes + out_bytes), ip)
+
+class RankingIndex:
+    """
+    Clientes da visão global ordenados por total, inbound e outbound.
+
+    Cada ordem é uma lista de `(-valor, IP)` mantida com `bisect`: um lote que
+    altera poucos IPs custa O(log n) por IP em cada lista. Quando o lote altera
+    boa parte dos clientes (o caso comum: todos aparecem em toda janela), a
+    lista é apenas marcada como suja e reordenada na primeira leitura, partindo
+    da ordem anterior; como o ranking muda pouco entre janelas, o Timsort a
+    reordena em tempo quase linear.
+
+    O escritor atualiza o índice ao publicar cada snapshot (`version`); uma
+    leitura só o usa se o snapshot dela for o mesmo.
+    """
+    REBUILD_FRACTION = 8  # Acima de 1/8 dos clientes alterados, reordena na leitura.
+
+    def __init__(self):
+        self.version = 0
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[int, int]] = {}
+        self._ranks: Dict[str, List[RankingEntry]] = {sort: [] for sort in RANKING_SORTS}
+        self._dirty: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def update(self, version: int, clients: Mapping[str, ClientRecord], changed: Set[str]):
+        """
+        Aplica as alterações de um lote.
+
+        :param version: Versão do snapshot publicado com estas alterações.
+        :param clients: Visão global já atualizada.
+        :param changed: IPs inseridos, alterados ou removidos no lote.
+        """
+        values = self._values
+        with self._lock:
+            if len(changed) * self.REBUILD_FRACTION > len(values):
+                self._dirty.update(RANKING_SORTS)
+            # Listas sujas serão reordenadas a partir de `_values`; só as limpas recebem o lote.
+            clean = [(sort, rank) for sort, rank in self._ranks.items() if sort not in self._dirty]
+            for ip in changed:
+                old = values.get(ip)
+                record = clients.get(ip)
+                new = None if record is None else (record.in_bytes, record.out_bytes)
+                if old == new:
+                    continue
+                if new is None:
+                    del values[ip]
+                else:
+                    values[ip] = new
+                for sort, rank in clean:
+                    if old is not None:
+                        del rank[bisect.bisect_left(rank, ranking_entry(sort, ip, *old))]
+                    if new is not None:
+                        bisect.insort(rank, ranking_entry(sort, ip, *new))
+            self.version = version
+
+    def page(self, version: int, sort: str, start: int, limit: Optional[int],
+             after: Optional[RankingEntry] = None) -> Optional[Tuple[List[RankingEntry], int]]:
+        """
+        Retorna `limit` entradas a partir da posição `start` (ou logo após a
+        entrada `after`) e o total de clientes, ou None se o índice já estiver
+        em outra versão.
+        """
+        with self._lock:
+            if version != self.version:
+                return None
+            rank = self._ranks[sort]
+            if sort in self._dirty:
+                rank = self._rebuild(sort)
+            if after is not None:
+                start = bisect.bisect_right(rank, after)
+            end = None if limit is None else start + limit
+            return rank[start:end], len(rank)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            for rank in self._ranks.values():
+                rank.clear()
+            self._dirty.clear()
+            self.version = 0
+
+    def _rebuild(self, sort: str) -> List[RankingEntry]:
+        """ Reordena partindo da ordem anterior (quase ordenada). Chamada com `_lock` adquirido. """
+        values = self._values
+        seen = set()
+        rank = []
+        for _, ip in self._ranks[sort]:
+            value = values.get(ip)
+            if value is not None:
+                rank.append(ranking_entry(sort, ip, *value))
+                seen.add(ip)
+        rank.extend(ranking_entry(sort, ip, *value) for ip, value in values.items() if ip not in seen)
+        rank.sort()
+        self._ranks[sort] = rank
+        self._dirty.discard(sort)
+        return rank
+
+def ip_matcher(spec: str) -> Callable[[str], bool]:
+    """
+    Cria o filtro de IPs de `?prefix=`: um prefixo CIDR ("10.0.0.0/8",
+    "2001:db8::/32"), um IP exato ou um prefixo textual ("192.168.").
+
+    Como em `prefixos.py` do produtor, o IP é convertido em inteiro com
+    `inet_pton` e comparado com a máscara, sem criar objetos `ipaddress`.
+    """
+    try:
+        net = ipaddress.ip_network(spec.strip(), strict=False)
+    except ValueError:
+        return lambda ip: ip.startswith(spec)
+    family = socket.AF_INET6 if net.version == 6 else socket.AF_INET
+    mask, network = int(net.netmask), int(net.network_address)
+
+    def matches(ip: str) -> bool:
+        try:
+            return int.from_bytes(socket.inet_pton(family, ip), "big") & mask == network
+        except (OSError, ValueError):
+            return False
+    return matches
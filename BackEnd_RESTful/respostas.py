@@ -0,0 +1,97 @@
+# =====================================================================================
+# MÓDULO DE RESPOSTAS HTTP
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: ETags por versão do snapshot e compressão (gzip/brotli) das visões
+#            memorizadas, usadas pelas rotas de consulta.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import gzip
+import os
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from armazenamento import StoreSnapshot
+from visoes import MAX_VIEWS_PER_SNAPSHOT
+
+# Opcional: sem ele, a compressão usa apenas gzip.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- SEÇÃO 1: ETAGS ---
+
+# As rotas de consulta retornam `Response` diretamente: os `response_model`
+# continuam documentando o formato, mas a saída não é revalidada a cada requisição.
+# Cada visão é calculada no máximo uma vez por versão do store e servida com ETag;
+# um dashboard que consulta sem mudanças recebe 304 sem nenhum recálculo.
+
+# A ETag é `"<boot_id>-<versão>"`, ambos lidos do snapshot servido (ver `StoreSnapshot`).
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """ Compara o cabeçalho If-None-Match com a ETag atual (aceita '*' e ETags fracas). """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def snapshot_etag(snapshot: StoreSnapshot) -> str:
+    """ ETag das visões de um snapshot: `"<boot_id>-<versão>"`. """
+    return f'"{snapshot.boot_id}-{snapshot.version}"'
+
+# --- SEÇÃO 2: COMPRESSÃO ---
+
+COMPRESS_MIN_BYTES = int(os.environ.get("NETVISION_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Bem mais rápido que o padrão (11), com taxa próxima para JSON.
+
+def accepted_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """ Escolhe "br" ou "gzip" a partir do Accept-Encoding (ignora codificações com q=0). """
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.partition("=")
+        try:
+            q = float(value) if name.strip() == "q" else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            accepted.add(coding.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+def json_response(request: Request, snapshot: StoreSnapshot, name: str, body: bytes,
+                  headers: Dict[str, str], memoize: bool = True) -> Response:
+    """
+    Resposta JSON de uma visão memorizada, comprimida se o cliente aceitar e o
+    corpo passar de `COMPRESS_MIN_BYTES`. A versão comprimida também fica no
+    snapshot: cada visão é comprimida no máximo uma vez por codificação e versão.
+
+    :param memoize: False para um corpo que não pertence à versão de `snapshot`.
+    """
+    encoding = accepted_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding is not None:
+        key = f"{name}#{encoding}"
+        compressed = snapshot.views.get(key)
+        if compressed is None:
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            if memoize and len(snapshot.views) < MAX_VIEWS_PER_SNAPSHOT:
+                snapshot.views[key] = compressed
+        body = compressed
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
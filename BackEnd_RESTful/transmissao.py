@@ -0,0 +1,89 @@
+# =====================================================================================
+# MÓDULO DE TRANSMISSÃO EM TEMPO REAL (SSE)
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Distribui aos inscritos do /api/traffic/stream cada snapshot novo,
+#            com filas limitadas por inscrito.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import asyncio
+import os
+from typing import Set
+
+from armazenamento import TrafficDataStore
+from visoes import build_history_view, build_traffic_view, snapshot_view
+
+# --- SEÇÃO 1: TRANSMISSÃO EM TEMPO REAL (SERVER-SENT EVENTS) ---
+
+STREAM_QUEUE_SIZE = int(os.environ.get("NETVISION_STREAM_QUEUE_SIZE", "4"))
+
+class StreamBroadcaster:
+    """
+    Distribui o estado atual para os inscritos do endpoint de streaming.
+
+    Cada nova versão do store é serializada uma única vez (reaproveitando as
+    visões em cache do snapshot) e a mesma mensagem é colocada na fila de cada
+    inscrito. Como toda mensagem carrega o estado completo, um inscrito lento
+    não atrasa os demais: com a fila dele cheia, as mensagens pendentes são
+    descartadas e substituídas pela mais recente.
+    """
+    def __init__(self, store: TrafficDataStore, queue_size: int = STREAM_QUEUE_SIZE):
+        self.store = store
+        self.queue_size = max(1, queue_size)
+        self.coalesced = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._last_version = -1
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """ Registra um inscrito; a fila já começa com o estado atual. """
+        subscriber: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        subscriber.put_nowait(self.current_message())
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: asyncio.Queue):
+        self._subscribers.discard(subscriber)
+
+    def current_message(self) -> bytes:
+        """ Evento SSE com o estado do snapshot atual (tráfego por cliente e histórico). """
+        snapshot = self.store.snapshot
+        message = snapshot.views.get("stream")
+        if message is None:
+            message = snapshot.views["stream"] = b"".join((
+                b"event: traffic\nid: ", str(snapshot.version).encode("ascii"),
+                b'\ndata: {"version":', str(snapshot.version).encode("ascii"),
+                b',"boot_id":"', snapshot.boot_id.encode("ascii"),
+                b'","traffic":', snapshot_view(snapshot, "traffic", build_traffic_view),
+                b',"history":', snapshot_view(snapshot, "history", build_history_view),
+                b"}\n\n",
+            ))
+        return message
+
+    def publish(self):
+        """ Envia o snapshot atual aos inscritos, se ele mudou desde o último envio. """
+        if not self._subscribers or self.store.snapshot.version == self._last_version:
+            return
+        self._last_version = self.store.snapshot.version
+        message = self.current_message()
+        for subscriber in self._subscribers:
+            if subscriber.full():
+                self._discard_pending(subscriber)
+                self.coalesced += 1
+            subscriber.put_nowait(message)
+
+    def close(self):
+        """ Encerra todas as transmissões (None sinaliza o fim para o gerador). """
+        for subscriber in self._subscribers:
+            self._discard_pending(subscriber)
+            subscriber.put_nowait(None)
+
+    @staticmethod
+    def _discard_pending(subscriber: asyncio.Queue):
+        while not subscriber.empty():
+            subscriber.get_nowait()
@@ -0,0 +1,256 @@
+# =====================================================================================
+# MÓDULO DE TRANSPORTE LOCAL (UNIX DOMAIN SOCKET / UDP / MEMÓRIA COMPARTILHADA)
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Recebe janelas de um produtor na mesma máquina sem passar pela rota
+#            HTTP: frames por Unix domain socket, datagramas UDP ou o anel em
+#            memória compartilhada escrito pelo `network_analyzer`. Todas as
+#            janelas seguem para a `IngestPipeline` recebida.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import asyncio
+import logging
+import mmap
+import os
+import stat
+import struct
+from functools import partial
+from typing import Dict, Optional
+
+from pydantic import ValidationError
+
+from modelos import ClientRecord, IngestWindow, parse_window
+from ingestao import IngestPipeline
+
+# --- SEÇÃO 1: UNIX DOMAIN SOCKET / UDP ---
+
+# Ambos os listeners são opcionais e ativados por variáveis de ambiente.
+UDS_PATH = os.environ.get("NETVISION_UDS_PATH")
+UDP_ADDR = os.environ.get("NETVISION_UDP_ADDR")  # Formato "host:porta".
+FRAME_HEADER = struct.Struct("!I")  # Tamanho do frame: uint32 big-endian.
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+def ingest_raw_payload(pipeline: IngestPipeline, raw: bytes) -> bool:
+    """ Valida uma janela JSON recebida por transporte local e a envia à fila de ingestão `pipeline`. """
+    try:
+        window = parse_window(raw)
+    except ValidationError as e:
+        logging.warning("Janela inválida recebida por transporte local: %d erro(s).", e.error_count())
+        return False
+    if not pipeline.submit_nowait(window):
+        logging.warning("Fila de ingestão cheia. Janela descartada.")
+        return False
+    return True
+
+async def handle_uds_connection(pipeline: IngestPipeline, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Lê frames `[uint32 tamanho][JSON]` de um produtor até a conexão ser fechada.
+    Registrado com `functools.partial(handle_uds_connection, pipeline)`.
+    """
+    try:
+        while True:
+            header = await reader.readexactly(FRAME_HEADER.size)
+            (size,) = FRAME_HEADER.unpack(header)
+            if size > MAX_FRAME_BYTES:
+                logging.error("Frame UDS de %d bytes excede o limite. Encerrando a conexão.", size)
+                break
+            raw = await reader.readexactly(size)
+            try:
+                window = parse_window(raw)
+            except ValidationError as e:
+                logging.warning("Janela inválida recebida por UDS: %d erro(s).", e.error_count())
+                continue
+            # Aguarda espaço na fila: a leitura do socket pausa e o produtor sente a contrapressão.
+            await pipeline.submit(window)
+    except asyncio.IncompleteReadError:
+        pass  # O produtor fechou a conexão.
+    except Exception as e:
+        logging.error("Erro na conexão UDS: %s", e, exc_info=True)
+    finally:
+        writer.close()
+
+class UdpIngestProtocol(asyncio.DatagramProtocol):
+    """ Recebe uma janela JSON por datagrama. Datagramas inválidos são descartados. """
+    def __init__(self, pipeline: IngestPipeline):
+        self.pipeline = pipeline
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            ingest_raw_payload(self.pipeline, data)
+        except Exception as e:
+            logging.error("Erro ao processar datagrama UDP de %s: %s", addr, e, exc_info=True)
+
+async def start_local_transports(pipeline: IngestPipeline, uds_path: Optional[str] = UDS_PATH,
+                                 udp_addr: Optional[str] = UDP_ADDR) -> list:
+    """ Inicia os listeners configurados (janelas vão para `pipeline`) e retorna os objetos a serem fechados no shutdown. """
+    closers = []
+    if uds_path:
+        if os.path.exists(uds_path):
+            os.unlink(uds_path)  # Remove um socket órfão de uma execução anterior.
+        server = await asyncio.start_unix_server(partial(handle_uds_connection, pipeline), path=uds_path)
+        closers.append(server)
+        logging.info("Listener UDS ativo em %s.", uds_path)
+    if udp_addr:
+        host, _, port = udp_addr.rpartition(":")
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            partial(UdpIngestProtocol, pipeline), local_addr=(host.strip("[]") or "127.0.0.1", int(port))
+        )
+        closers.append(transport)
+        logging.info("Listener UDP ativo em %s.", udp_addr)
+    return closers
+
+async def stop_local_transports(closers: list, uds_path: Optional[str] = UDS_PATH):
+    """ Fecha os listeners e remove o arquivo do socket UDS. """
+    for closer in closers:
+        closer.close()
+        if isinstance(closer, asyncio.AbstractServer):
+            await closer.wait_closed()
+    if uds_path and os.path.exists(uds_path):
+        os.unlink(uds_path)
+
+# --- SEÇÃO 2: ANEL DE MEMÓRIA COMPARTILHADA (PRODUTOR NA MESMA MÁQUINA) ---
+
+SHM_PATH = os.environ.get("NETVISION_SHM_PATH")
+SHM_POLL_INTERVAL_S = float(os.environ.get("NETVISION_SHM_POLL_S", "1.0"))
+
+# Layout do anel: deve coincidir com Network_analyzer/memoria_compartilhada.py.
+RING_MAGIC = b"NVRING01"
+RING_VERSION = 1
+RING_HEADER = struct.Struct("<8sIIIIII")
+RING_HEADER_SIZE = 64
+WRITE_SEQ_OFFSET = 32
+READ_SEQ_OFFSET = 40
+RING_SEQ = struct.Struct("<Q")
+RING_RECORD_HEADER = struct.Struct("<QddQQQQII64s32s")
+RING_CLIENT_ENTRY = struct.Struct("<48sQQII")
+RING_PROTO_ENTRY = struct.Struct("<24sQQ")
+
+class ShmRingReader:
+    """
+    Lado consumidor do anel SPSC escrito pelo `network_analyzer`.
+
+    Os registros são lidos no lugar, diretamente do mapeamento, com
+    `struct.unpack_from`; cada slot consumido é liberado ao avançar `read_seq`.
+    """
+    def __init__(self, path: str, pipeline: IngestPipeline):
+        """
+        :param path: Arquivo do anel criado pelo produtor.
+        :param pipeline: Fila de ingestão que recebe as janelas lidas.
+        """
+        self.path = path
+        self.pipeline = pipeline
+        self._fd = os.open(path, os.O_RDWR)
+        try:
+            self._inode = os.fstat(self._fd).st_ino
+            self._mm = mmap.mmap(self._fd, 0)
+        except Exception:
+            os.close(self._fd)
+            raise
+        magic, version, self.n_slots, self.slot_size, self.max_clients, _, _ = RING_HEADER.unpack_from(self._mm, 0)
+        if magic != RING_MAGIC or version != RING_VERSION:
+            self.close()
+            raise ValueError(f"Arquivo {path} não é um anel Netvision compatível.")
+
+    def is_stale(self) -> bool:
+        """ Indica se o produtor recriou o anel (novo inode) e é preciso remapear. """
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def drain(self) -> int:
+        """ Consome todas as janelas publicadas e as envia à fila de ingestão. Retorna quantas foram lidas. """
+        mm = self._mm
+        write_seq = RING_SEQ.unpack_from(mm, WRITE_SEQ_OFFSET)[0]
+        read_seq = RING_SEQ.unpack_from(mm, READ_SEQ_OFFSET)[0]
+        consumed = 0
+        while read_seq < write_seq:
+            base = RING_HEADER_SIZE + (read_seq % self.n_slots) * self.slot_size
+            if RING_SEQ.unpack_from(mm, base)[0] == read_seq + 1:
+                if not self.pipeline.submit_nowait(self._read_record(base)):
+                    break  # Fila cheia: o slot fica no anel e é lido no próximo ciclo.
+                consumed += 1
+            else:
+                logging.warning("Slot %d do anel inconsistente. Janela ignorada.", read_seq)
+            read_seq += 1
+            RING_SEQ.pack_into(mm, READ_SEQ_OFFSET, read_seq)
+        return consumed
+
+    def _read_record(self, base: int) -> IngestWindow:
+        """ Converte um slot em `ClientRecord`s sem revalidar (o layout já é tipado). """
+        mm = self._mm
+        (_, _, window_end, _, _, _, _, n_clients, _, host, iface) = RING_RECORD_HEADER.unpack_from(mm, base)
+        entry_off = base + RING_RECORD_HEADER.size
+        proto_base = entry_off + self.max_clients * RING_CLIENT_ENTRY.size
+        clients: Dict[str, ClientRecord] = {}
+        for i in range(n_clients):
+            ip, in_b, out_b, p_start, p_count = RING_CLIENT_ENTRY.unpack_from(mm, entry_off + i * RING_CLIENT_ENTRY.size)
+            protocols = {}
+            for j in range(p_start, p_start + p_count):
+                name, p_in, p_out = RING_PROTO_ENTRY.unpack_from(mm, proto_base + j * RING_PROTO_ENTRY.size)
+                protocols[name.rstrip(b"\0").decode("utf-8", "replace")] = (p_in, p_out)
+            clients[ip.rstrip(b"\0").decode("utf-8", "replace")] = ClientRecord(in_b, out_b, protocols)
+        return IngestWindow(clients, window_end, host.rstrip(b"\0").decode("utf-8", "replace"),
+                            iface.rstrip(b"\0").decode("utf-8", "replace"))
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+
+def _open_notify_fifo(path: str) -> Optional[int]:
+    """ Cria (se preciso) e abre o FIFO pelo qual o produtor sinaliza novas janelas. """
+    try:
+        if not os.path.exists(path):
+            os.mkfifo(path)
+        elif not stat.S_ISFIFO(os.stat(path).st_mode):
+            return None
+        # O_RDWR mantém um escritor aberto (o próprio backend), evitando POLLHUP
+        # contínuo quando o produtor fecha o FIFO.
+        return os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    except OSError as e:
+        logging.warning("FIFO de notificação indisponível (%s). Usando apenas polling.", e)
+        return None
+
+async def run_shm_consumer(path: str, pipeline: IngestPipeline, poll_interval_s: float = SHM_POLL_INTERVAL_S):
+    """ Tarefa que drena o anel quando notificada pelo produtor ou a cada `poll_interval_s`. """
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    notify_fd = _open_notify_fifo(path + ".notify")
+    if notify_fd is not None:
+        def _on_notify():
+            try:
+                while os.read(notify_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            wakeup.set()
+        loop.add_reader(notify_fd, _on_notify)
+
+    reader: Optional[ShmRingReader] = None
+    try:
+        while True:
+            try:
+                if reader is not None and reader.is_stale():
+                    reader.close()
+                    reader = None
+                if reader is None and os.path.exists(path):
+                    reader = ShmRingReader(path, pipeline)
+                    logging.info("Anel de memória compartilhada mapeado: %s.", path)
+                if reader is not None:
+                    reader.drain()
+            except Exception as e:
+                logging.error("Erro ao consumir o anel de memória compartilhada: %s", e, exc_info=True)
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+    finally:
+        if notify_fd is not None:
+            loop.remove_reader(notify_fd)
+            os.close(notify_fd)
+        if reader is not None:
+            reader.close()
@@ -0,0 +1,165 @@
+# =====================================================================================
+# MÓDULO DE VISÕES DE LEITURA
+# Versão: 1.0.0
+#
+# Autor: Equipe Backend
+# Descrição: Funções puras que montam, a partir de um snapshot, o conteúdo
+#            servido pelas rotas de consulta, e o cache de visões por snapshot.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import heapq
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional
+
+from modelos import ClientRecord, dump_json, merge_client_records
+from historico import downsample_lttb
+from ranking import RankingEntry, RankingIndex, ranking_entry
+from armazenamento import StoreSnapshot, TrafficDataStore
+
+# --- SEÇÃO 1: VISÕES DE LEITURA DERIVADAS DO SNAPSHOT ---
+
+def select_clients(snapshot: StoreSnapshot, host: Optional[str] = None,
+                   iface: Optional[str] = None) -> Optional[Mapping[str, ClientRecord]]:
+    """
+    Clientes vistos pelas partições que casam com `host`/`iface` (sem filtro: a
+    visão global). Retorna None se nenhuma partição casar.
+    """
+    if host is None and iface is None:
+        return snapshot.clients
+    selected = [
+        partition for (p_host, p_iface), partition in snapshot.partitions.items()
+        if (host is None or p_host == host) and (iface is None or p_iface == iface)
+    ]
+    if not selected:
+        return None
+    if len(selected) == 1:
+        return selected[0]
+    merged: Dict[str, List[ClientRecord]] = {}
+    for partition in selected:
+        for ip, record in partition.items():
+            merged.setdefault(ip, []).append(record)
+    return {ip: records[0] if len(records) == 1 else merge_client_records(records)
+            for ip, records in merged.items()}
+
+def traffic_rows(clients: Mapping[str, ClientRecord]) -> list:
+    return [
+        {"ip": ip, "inbound": data.in_bytes, "outbound": data.out_bytes}
+        for ip, data in clients.items()
+    ]
+
+def protocol_summary_rows(clients: Mapping[str, ClientRecord]) -> list:
+    protocol_summary: Dict[str, int] = {}
+    for client_data in clients.values():
+        for protocol_name, (p_in, p_out) in client_data.protocols.items():
+            protocol_summary[protocol_name] = protocol_summary.get(protocol_name, 0) + p_in + p_out
+    return [
+        {"name": name, "y": total_traffic}
+        for name, total_traffic in protocol_summary.items()
+    ]
+
+class TrafficPage(NamedTuple):
+    rows: list
+    total: int
+    next_cursor: Optional[str]
+
+def encode_cursor(entry: RankingEntry) -> str:
+    return f"{-entry[0]}_{entry[1]}"
+
+def decode_cursor(cursor: str) -> RankingEntry:
+    """ Converte o cursor "<valor>_<IP>" de volta na entrada do ranking (ValueError se inválido). """
+    value, sep, ip = cursor.partition("_")
+    if not sep or not ip:
+        raise ValueError(cursor)
+    return (-int(value), ip)
+
+def traffic_page(snapshot: StoreSnapshot, ranking: Optional[RankingIndex], sort: str, limit: Optional[int],
+                 offset: int = 0, cursor: Optional[str] = None,
+                 clients: Optional[Mapping[str, ClientRecord]] = None,
+                 match: Optional[Callable[[str], bool]] = None) -> TrafficPage:
+    """
+    Uma página do ranking de clientes por `sort`.
+
+    Sem filtros, a página sai do `RankingIndex` em O(limit + log n). Com
+    `clients` (filtro por produtor) ou `match` (prefixo), ou se o índice já
+    estiver numa versão mais nova que o snapshot, os clientes que passam pelo
+    filtro são selecionados com `heapq.nsmallest`, em O(n log limit).
+
+    Busca uma entrada além de `limit` só para saber se há próxima página: uma
+    última página exatamente cheia não gera cursor.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    fetch = None if limit is None else limit + 1
+    result = None
+    if ranking is not None and clients is None and match is None:
+        result = ranking.page(snapshot.version, sort, offset, fetch, after)
+    if result is None:
+        source = snapshot.clients if clients is None else clients
+        entries = [
+            ranking_entry(sort, ip, record.in_bytes, record.out_bytes)
+            for ip, record in source.items() if match is None or match(ip)
+        ]
+        total = len(entries)
+        if after is not None:
+            entries = [entry for entry in entries if entry > after]
+            offset = 0
+        if limit is None:
+            entries.sort()
+            entries = entries[offset:]
+        else:
+            entries = heapq.nsmallest(offset + fetch, entries)[offset:]
+        result = (entries, total)
+
+    entries, total = result
+    has_more = limit is not None and len(entries) > limit
+    if has_more:
+        entries = entries[:limit]
+    source = snapshot.clients if clients is None else clients
+    rows = []
+    for _, ip in entries:
+        record = source[ip]
+        rows.append({"ip": ip, "inbound": record.in_bytes, "outbound": record.out_bytes})
+    next_cursor = encode_cursor(entries[-1]) if has_more else None
+    return TrafficPage(rows, total, next_cursor)
+
+def build_traffic_view(snapshot: StoreSnapshot) -> list:
+    return traffic_rows(snapshot.clients)
+
+def build_history_view(snapshot: StoreSnapshot) -> list:
+    return [point._asdict() for point in snapshot.history]
+
+def build_protocol_summary_view(snapshot: StoreSnapshot) -> list:
+    return protocol_summary_rows(snapshot.clients)
+
+def build_hosts_view(snapshot: StoreSnapshot) -> list:
+    return [
+        {"host": host, "iface": iface or None, "clients": len(snapshot.partitions.get((host, iface), ())),
+         "last_window_end": last_window_end}
+        for (host, iface), last_window_end in sorted(snapshot.last_windows.items())
+    ]
+
+def build_drilldown_view(client: ClientRecord) -> list:
+    return [
+        {"name": protocol, "inbound": p_in, "outbound": p_out, "y": p_in + p_out}
+        for protocol, (p_in, p_out) in client.protocols.items()
+    ]
+
+def client_history_rows(store: TrafficDataStore, ip: str, from_ts: Optional[float] = None,
+                        to_ts: Optional[float] = None, max_points: Optional[int] = None) -> Optional[list]:
+    """ Série de um cliente pronta para serializar, ou None se o IP não tiver histórico. """
+    points = store.client_history.query(ip, from_ts, to_ts)
+    if points is None:
+        return None
+    if max_points is not None:
+        points = downsample_lttb(points, max_points)
+    return [point._asdict() for point in points]
+
+MAX_VIEWS_PER_SNAPSHOT = 256  # Limita o cache de visões parametrizadas (IPs, intervalos).
+
+def snapshot_view(snapshot: StoreSnapshot, name: str, build: Callable[[StoreSnapshot], object]) -> bytes:
+    """ Retorna a visão `name` serializada, calculando-a no máximo uma vez por snapshot. """
+    body = snapshot.views.get(name)
+    if body is None:
+        body = dump_json(build(snapshot))
+        if len(snapshot.views) < MAX_VIEWS_PER_SNAPSHOT:
+            snapshot.views[name] = body
+    return body
@@ -1,19 +1,22 @@
 /**
  * =====================================================================================
  * ARQUIVO DE TESTES UNITÁRIOS - TrafficDataService
- * Versão: 5.1.0 (Padronização e documentação completa)
+ * Versão: 5.3.1 (Polling pelo endpoint unificado /api/dashboard)
  *
  * Autor: Equipe Frontend
  * Descrição: Este arquivo contém os testes unitários para o TrafficDataService,
- * garantindo que a lógica de polling, tratamento de erros e busca
- * de dados funcione conforme o esperado.
+ * garantindo que a lógica de streaming, polling, tratamento de erros e
+ * busca de dados funcione conforme o esperado.
  * =====================================================================================
  */
 
 // --- SEÇÃO 1: IMPORTAÇÕES ---
+import { NgZone } from '@angular/core';
 import { TestBed } from '@angular/core/testing';
+import { HttpClient, HttpRequest } from '@angular/common/http';
 import { HttpClientTestingModule, HttpTestingController } from '@angular/common/http/testing';
 import { TrafficDataService } from './traffic-data';
+import { ClientTrafficSummary } from '../models/traffic.model';
 
 // --- SEÇÃO 2: BLOCO PRINCIPAL DE TESTES ---
 describe('TrafficDataService', () => {
@@ -24,6 +27,9 @@ describe('TrafficDataService', () => {
 
   const API_BASE_URL = 'http://127.0.0.1:8000';
   const POLLING_INTERVAL_MS = 5000;
+  /** Casa as requisições do polling (os parâmetros ficam fora da URL base). */
+  const isDashboardRequest = (req: HttpRequest<unknown>) => req.url === `${API_BASE_URL}/api/dashboard`;
+  const dashboard = (version: number, traffic: object[] = [], boot_id = 'b1') => ({ version, boot_id, traffic, history: [] });
 
   beforeAll(() => {
     jest.useFakeTimers();
@@ -52,7 +58,7 @@ describe('TrafficDataService', () => {
     expect(service).toBeTruthy();
     // Avança o timer para a chamada inicial do polling
     jest.advanceTimersByTime(0);
-    httpMock.expectOne(`${API_BASE_URL}/api/traffic`).flush([]);
+    httpMock.expectOne(isDashboardRequest).flush(dashboard(1));
   });
 
   // --- SEÇÃO 2.3: TESTES DE POLLING DE DADOS ---
@@ -60,25 +66,53 @@ describe('TrafficDataService', () => {
     it('deve iniciar o polling imediatamente e atualizar os dados com sucesso', () => {
       // Primeira chamada (imediata)
       jest.advanceTimersByTime(0);
-      const req1 = httpMock.expectOne(`${API_BASE_URL}/api/traffic`);
-      req1.flush([{ ip: '1.1.1.1' }]);
+      const req1 = httpMock.expectOne(isDashboardRequest);
+      expect(req1.request.params.get('sections')).toBe('traffic,history');
+      expect(req1.request.params.has('since_version')).toBe(false);
+      req1.flush(dashboard(7, [{ ip: '1.1.1.1' }]));
 
-      // Segunda chamada (após o intervalo)
+      // Segunda chamada (após o intervalo), condicionada à versão recebida
       jest.advanceTimersByTime(POLLING_INTERVAL_MS);
-      const req2 = httpMock.expectOne(`${API_BASE_URL}/api/traffic`);
-      req2.flush([]);
+      const req2 = httpMock.expectOne(isDashboardRequest);
+      expect(req2.request.params.get('since_version')).toBe('b1-7');
+      req2.flush(dashboard(8));
+    });
+
+    it('deve enviar o boot_id do backend junto com a versão', () => {
+      // Após um reinício, a mesma versão de outra execução não pode virar 304.
+      jest.advanceTimersByTime(0);
+      httpMock.expectOne(isDashboardRequest).flush(dashboard(5, [], 'antes'));
+      jest.advanceTimersByTime(POLLING_INTERVAL_MS);
+      httpMock.expectOne(isDashboardRequest).flush(dashboard(5, [], 'depois'));
+
+      jest.advanceTimersByTime(POLLING_INTERVAL_MS);
+      const req = httpMock.expectOne(isDashboardRequest);
+      expect(req.request.params.get('since_version')).toBe('depois-5');
+      req.flush(dashboard(6, [], 'depois'));
+    });
+
+    it('deve manter os dados atuais quando o servidor responder 304', () => {
+      let received: ClientTrafficSummary[] = [];
+      service.trafficData$.subscribe(data => received = data);
+
+      jest.advanceTimersByTime(0);
+      httpMock.expectOne(isDashboardRequest).flush(dashboard(3, [{ ip: '1.1.1.1', inbound: 1, outbound: 2 }]));
+
+      jest.advanceTimersByTime(POLLING_INTERVAL_MS);
+      httpMock.expectOne(isDashboardRequest).flush(null, { status: 304, statusText: 'Not Modified' });
+      expect(received).toEqual([{ ip: '1.1.1.1', inbound: 1, outbound: 2 }]);
     });
 
     it('deve lidar com erros da API e continuar o polling', () => {
       // Primeira chamada (resultando em erro)
       jest.advanceTimersByTime(0);
-      const req1 = httpMock.expectOne(`${API_BASE_URL}/api/traffic`);
+      const req1 = httpMock.expectOne(isDashboardRequest);
       req1.flush('Error', { status: 500, statusText: 'Server Error' });
 
       // Segunda chamada (deve ocorrer mesmo após o erro)
       jest.advanceTimersByTime(POLLING_INTERVAL_MS);
-      const req2 = httpMock.expectOne(`${API_BASE_URL}/api/traffic`);
-      req2.flush([]);
+      const req2 = httpMock.expectOne(isDashboardRequest);
+      req2.flush(dashboard(1));
     });
   });
 
@@ -87,7 +121,7 @@ describe('TrafficDataService', () => {
     it('deve buscar os dados de protocolo para um IP específico com sucesso', () => {
       // Lida com a chamada inicial de polling para isolar o teste
       jest.advanceTimersByTime(0);
-      httpMock.expectOne(`${API_BASE_URL}/api/traffic`).flush([]);
+      httpMock.expectOne(isDashboardRequest).flush(dashboard(1));
 
       // Testa a lógica específica de drilldown
       const testIp = '192.168.1.50';
@@ -101,13 +135,77 @@ describe('TrafficDataService', () => {
   it('deve cancelar a inscrição do polling ao ser destruído', () => {
     // Lida com a chamada inicial
     jest.advanceTimersByTime(0);
-    httpMock.expectOne(`${API_BASE_URL}/api/traffic`).flush([]);
+    httpMock.expectOne(isDashboardRequest).flush(dashboard(1));
 
     // Chama o método de destruição
     service.ngOnDestroy();
 
     // Avança o tempo e verifica que nenhuma nova chamada foi feita
     jest.advanceTimersByTime(POLLING_INTERVAL_MS);
-    httpMock.expectNone(`${API_BASE_URL}/api/traffic`);
+    httpMock.expectNone(isDashboardRequest);
+  });
+
+  // --- SEÇÃO 2.6: TESTES DE STREAMING (SERVER-SENT EVENTS) ---
+  describe('Data Stream', () => {
+    /** EventSource simulado: o jsdom não implementa a API. */
+    class MockEventSource {
+      static instance: MockEventSource | null = null;
+      listeners: Record<string, (event: MessageEvent<string>) => void> = {};
+      onerror: (() => void) | null = null;
+      closed = false;
+      constructor(public url: string) { MockEventSource.instance = this; }
+      addEventListener(type: string, listener: (event: MessageEvent<string>) => void) { this.listeners[type] = listener; }
+      close() { this.closed = true; }
+      emit(data: object) { this.listeners['traffic']({ data: JSON.stringify(data) } as MessageEvent<string>); }
+    }
+
+    let streamService: TrafficDataService;
+
+    /** Responde às requisições pendentes de um ciclo de polling. */
+    const flushPolling = () => {
+      httpMock.match(isDashboardRequest).forEach(req => req.flush(dashboard(1)));
+    };
+
+    beforeEach(() => {
+      // O serviço do bloco principal já iniciou o polling; é encerrado para isolar o teste.
+      jest.advanceTimersByTime(0);
+      flushPolling();
+      service.ngOnDestroy();
+      (globalThis as any).EventSource = MockEventSource;
+      streamService = new TrafficDataService(TestBed.inject(HttpClient), TestBed.inject(NgZone));
+    });
+
+    afterEach(() => {
+      streamService.ngOnDestroy();
+      delete (globalThis as any).EventSource;
+    });
+
+    it('deve receber os dados pelo streaming sem fazer polling', () => {
+      let received: ClientTrafficSummary[] = [];
+      streamService.trafficData$.subscribe(data => received = data);
+
+      expect(MockEventSource.instance?.url).toBe(`${API_BASE_URL}/api/traffic/stream`);
+      MockEventSource.instance!.emit({ version: 1, boot_id: 'b1', traffic: [{ ip: '1.1.1.1', inbound: 1, outbound: 2 }], history: [] });
+      expect(received).toEqual([{ ip: '1.1.1.1', inbound: 1, outbound: 2 }]);
+
+      jest.advanceTimersByTime(POLLING_INTERVAL_MS);
+      httpMock.expectNone(isDashboardRequest);
+    });
+
+    it('deve usar polling enquanto o streaming estiver indisponível', () => {
+      MockEventSource.instance!.onerror!();
+      jest.advanceTimersByTime(0);
+      httpMock.expectOne(isDashboardRequest).flush(dashboard(1));
+
+      // Um evento recebido após a reconexão encerra o polling.
+      MockEventSource.instance!.emit({ version: 2, boot_id: 'b1', traffic: [], history: [] });
+      jest.advanceTimersByTime(POLLING_INTERVAL_MS);
+      httpMock.expectNone(isDashboardRequest);
+    });
+
+    it('deve fechar a conexão ao ser destruído', () => {
+      streamService.ngOnDestroy();
+      expect(MockEventSource.instance?.closed).toBe(true);
+    });
   });
 });
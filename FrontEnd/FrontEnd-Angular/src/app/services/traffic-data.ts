@@ -1,21 +1,24 @@
 /*
 # =====================================================================================
 # SERVIDOR FRONTEND - SERVIÇO DE DADOS DE TRÁFEGO (TRAFFIC DATA SERVICE)
-# Versão: 3.0.1 (Padronização de Código e Documentação)
+# Versão: 3.2.1 (Fallback de Polling pelo Endpoint Unificado do Dashboard)
 #
 # Autor(es): Equipe Frontend 
 # Data: 2025-09-30
 # Descrição: Este serviço é a única fonte da verdade para os dados de tráfego.
-#            Ele gerencia o estado da aplicação relacionado aos dados, buscando
-#            informações da API em intervalos regulares de forma síncrona.
+#            Ele gerencia o estado da aplicação relacionado aos dados, recebendo
+#            cada nova janela da API por Server-Sent Events. Se o navegador não
+#            suportar EventSource ou a conexão cair, busca os dados em intervalos
+#            regulares, numa única requisição a /api/dashboard, até que o
+#            streaming volte.
 # =====================================================================================
 */
 
 // --- SEÇÃO 1: IMPORTAÇÕES ---
-import { Injectable, OnDestroy } from '@angular/core';
+import { Injectable, NgZone, OnDestroy } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
-import { BehaviorSubject, Observable, Subscription, timer, of, shareReplay, forkJoin } from 'rxjs';
-import { catchError, switchMap, tap } from 'rxjs/operators';
+import { BehaviorSubject, Observable, Subscription, timer, of, shareReplay } from 'rxjs';
+import { catchError, filter, switchMap, tap } from 'rxjs/operators';
 import { ClientTrafficSummary, ProtocolDrilldown, HistoricalDataPoint } from '../models/traffic.model';
 
 // --- SEÇÃO 2: INTERFACES LOCAIS ---
@@ -26,6 +29,22 @@ export interface GlobalProtocolSummary { name: string; y: number; }
 /** Estrutura para a resposta da API de informações do servidor. */
 interface IServerInfo { server_ip: string; }
 
+/** Estrutura de cada evento `traffic` do endpoint de streaming. */
+interface ITrafficStreamEvent {
+  version: number;
+  boot_id: string;
+  traffic: ClientTrafficSummary[];
+  history: HistoricalDataPoint[];
+}
+
+/** Resposta de `/api/dashboard` com as seções usadas pelo polling (`version` nulo: falha na busca). */
+interface IDashboardResponse {
+  version: number | null;
+  boot_id?: string;
+  traffic: ClientTrafficSummary[];
+  history: HistoricalDataPoint[];
+}
+
 
 // --- SEÇÃO 3: DECORADOR E DEFINIÇÃO DO SERVIÇO ---
 @Injectable({ providedIn: 'root' })
@@ -39,6 +58,8 @@ export class TrafficDataService implements OnDestroy {
   // --- Constantes de Configuração ---
   private readonly API_BASE_URL = 'http://127.0.0.1:8000';
   private readonly POLLING_INTERVAL_MS = 5000;
+  private readonly STREAM_URL = `${this.API_BASE_URL}/api/traffic/stream`;
+  private readonly DASHBOARD_URL = `${this.API_BASE_URL}/api/dashboard`;
   private readonly API_ERROR_MESSAGE = 'Não foi possível carregar os dados do tráfego.';
 
   // --- Gerenciamento de Estado Interno (Subjects) ---
@@ -59,22 +80,34 @@ export class TrafficDataService implements OnDestroy {
 
   // --- Gerenciamento de Inscrições e Cache ---
   private subscriptions = new Subscription();
+  private pollingSubscription: Subscription | null = null;
+  private eventSource: EventSource | null = null;
   private serverInfoCache$: Observable<IServerInfo> | null = null;
+  /**
+   * Token `<boot_id>-<versão>` do último estado recebido (streaming ou polling),
+   * enviado como `since_version`. O `boot_id` evita um 304 falso quando o
+   * backend reinicia e a versão recomeça do zero.
+   */
+  private lastVersion: string | null = null;
 
 
   // --- SEÇÃO 5: CONSTRUTOR E CICLO DE VIDA ---
 
   /**
    * @param http Serviço do Angular para realizar requisições HTTP.
+   * @param zone Zona do Angular, usada para aplicar os eventos do streaming.
    */
-  constructor(private http: HttpClient) {
-    this.startDataPolling();
+  constructor(private http: HttpClient, private zone: NgZone) {
+    this.startDataStream();
   }
 
   /**
-   * Garante que a inscrição de polling seja cancelada quando o serviço for destruído.
+   * Garante que o streaming e o polling sejam encerrados quando o serviço for destruído.
    */
   ngOnDestroy(): void {
+    this.eventSource?.close();
+    this.eventSource = null;
+    this.stopDataPolling();
     this.subscriptions.unsubscribe();
   }
 
@@ -143,38 +176,91 @@ export class TrafficDataService implements OnDestroy {
 
   // --- SEÇÃO 7: MÉTODOS PRIVADOS (LÓGICA INTERNA) ---
 
+  /**
+   * Assina o endpoint de Server-Sent Events. O servidor envia o estado completo
+   * a cada nova janela, então nenhuma requisição é feita enquanto não houver dados
+   * novos. Sem suporte a EventSource, usa apenas o polling.
+   */
+  private startDataStream(): void {
+    if (typeof EventSource === 'undefined') {
+      this.startDataPolling();
+      return;
+    }
+
+    // O EventSource é criado fora da zona do Angular para que suas reconexões
+    // automáticas não disparem detecção de mudanças; os dados voltam para a zona.
+    this.zone.runOutsideAngular(() => {
+      this.eventSource = new EventSource(this.STREAM_URL);
+
+      this.eventSource.addEventListener('traffic', (event: MessageEvent<string>) => {
+        const data: ITrafficStreamEvent = JSON.parse(event.data);
+        this.zone.run(() => {
+          this.stopDataPolling(); // O streaming voltou: o fallback não é mais necessário.
+          this.applySnapshot(data);
+        });
+      });
+
+      // O navegador tenta reconectar sozinho; enquanto isso, os dados vêm por polling.
+      this.eventSource.onerror = () => this.zone.run(() => this.startDataPolling());
+    });
+  }
+
   /**
    * Inicia o processo de polling que busca dados da API em intervalos regulares.
-   * Utiliza `forkJoin` para buscar dados de tráfego e histórico de forma concorrente.
+   * Tráfego e histórico vêm numa única requisição a `/api/dashboard`, lidos do
+   * mesmo snapshot; com `since_version`, o servidor responde 304 se nada mudou
+   * e o ciclo é ignorado. Não faz nada se o polling já estiver ativo.
    */
   private startDataPolling(): void {
-    const trafficUrl = `${this.API_BASE_URL}/api/traffic`;
-    const historyUrl = `${this.API_BASE_URL}/api/traffic/history`;
+    if (this.pollingSubscription) {
+      return;
+    }
 
     const polling$ = timer(0, this.POLLING_INTERVAL_MS).pipe(
       tap(() => this.isLoadingSubject.next(true)),
       switchMap(() => {
-        const trafficRequest$ = this.http.get<ClientTrafficSummary[]>(trafficUrl);
-        const historyRequest$ = this.http.get<HistoricalDataPoint[]>(historyUrl);
-
-        return forkJoin([trafficRequest$, historyRequest$]).pipe(
+        const params: Record<string, string> = { sections: 'traffic,history' };
+        if (this.lastVersion !== null) {
+          params['since_version'] = this.lastVersion;
+        }
+        return this.http.get<IDashboardResponse>(this.DASHBOARD_URL, { params }).pipe(
           catchError(error => {
+            if (error.status === 304) {
+              this.isLoadingSubject.next(false); // Nenhuma janela nova desde a última resposta.
+              return of(null);
+            }
             console.error('Erro ao buscar dados da API:', error);
             this.errorSubject.next(this.API_ERROR_MESSAGE);
             // Retorna um valor padrão para não quebrar o stream
-            return of([[], []] as [ClientTrafficSummary[], HistoricalDataPoint[]]);
+            return of<IDashboardResponse>({ version: null, traffic: [], history: [] });
           })
         );
-      })
+      }),
+      filter((data): data is IDashboardResponse => data !== null)
     );
 
-    this.subscriptions.add(
-      polling$.subscribe(([trafficData, historyData]) => {
-        this.errorSubject.next(null); // Limpa erros anteriores em caso de sucesso
-        this.trafficDataSubject.next(trafficData);
-        this.historyDataSubject.next(historyData);
-        this.isLoadingSubject.next(false);
-      })
-    );
+    this.pollingSubscription = polling$.subscribe(data => this.applySnapshot(data));
+  }
+
+  /**
+   * Publica um estado completo recebido da API (streaming ou polling).
+   * @param data Versão, tráfego por cliente e histórico do mesmo snapshot.
+   */
+  private applySnapshot(data: IDashboardResponse): void {
+    if (data.version !== null) {
+      this.errorSubject.next(null); // Limpa erros anteriores em caso de sucesso
+    }
+    this.lastVersion = data.version !== null && data.boot_id ? `${data.boot_id}-${data.version}` : null;
+    this.trafficDataSubject.next(data.traffic);
+    this.historyDataSubject.next(data.history);
+    this.isLoadingSubject.next(false);
+  }
+
+  /**
+   * Cancela o polling de fallback, se estiver ativo.
+   */
+  private stopDataPolling(): void {
+    this.pollingSubscription?.unsubscribe();
+    this.pollingSubscription = null;
   }
 }
\ No newline at end of file
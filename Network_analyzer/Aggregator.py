@@ -1,6 +1,6 @@
 # =====================================================================================
 # MÓDULO AGREGADOR DE TRÁFEGO DE REDE
-# Versão: 2.1.0 (Refatorado para snapshot não destrutivo)
+# Versão: 2.4.0 (Ingestão em lote com `add_many`)
 #
 # Autor: Equipe de Análise de Rede
 # Descrição: Este módulo fornece a classe `Aggregator`, projetada para coletar e
@@ -9,15 +9,19 @@
 # =====================================================================================
 
 # --- SEÇÃO 0: IMPORTAÇÕES ---
+import sys
+import math
+import time
 import threading
-from collections import defaultdict
-from typing import Dict, Any, Optional, Callable
+from collections import defaultdict, deque
+from typing import Dict, Any, Optional, Callable, List, Iterable, Tuple
 
 # Supondo que 'util.py' exista no mesmo diretório ou em um caminho acessível.
 from util import now_ts
 
 # --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
-__VERSION__ = "2.1.0"
+__VERSION__ = "2.4.0"
+MAX_PENDING_WINDOWS = 1024  # Limite de janelas fechadas aguardando emissão.
 
 # --- SEÇÃO 2: DEFINIÇÃO DA CLASSE PRINCIPAL ---
 class Aggregator:
@@ -28,24 +32,28 @@ class Aggregator:
     sejam adicionados simultaneamente sem corromper os dados.
     """
 
-    def __init__(self, window_s: int = 5, max_clients: int = 0, anon: Optional[Callable[[str], str]] = None):
+    def __init__(self, window_s: float = 5, max_clients: int = 0, anon: Optional[Callable[[str], str]] = None,
+                 metrics: Optional[Any] = None):
         """
         Inicializa o agregador de dados.
 
-        :param window_s: O tamanho da janela de tempo em segundos para a agregação.
+        :param window_s: O tamanho da janela de tempo em segundos para a agregação
+                         (aceita frações, ex: 0.5).
         :param max_clients: O número máximo de clientes a serem retornados (top-K por tráfego).
                             Se 0, todos os clientes são retornados.
         :param anon: Uma função opcional para anonimizar o endereço IP do cliente.
+        :param metrics: `ProducerMetrics` opcional para medir o lock e a formatação.
         """
         self.window_s = window_s
         self.max_clients = max_clients
         self.anon = anon
+        self.metrics = metrics
         self.lock = threading.Lock()
+        # Janelas encerradas pelo avanço do tempo, aguardando `collect_closed_windows`.
+        self._closed: deque = deque(maxlen=MAX_PENDING_WINDOWS)
 
         # Calcula o início da janela de tempo atual para garantir alinhamento.
-        now = now_ts()
-        start = now - (now % self.window_s)
-        self._current = self._new_window(start)
+        self._current = self._new_window(self._window_start_for(now_ts()))
 
     # --- MÉTODOS PÚBLICOS (API DA CLASSE) ---
 
@@ -58,22 +66,41 @@ class Aggregator:
         """
         # O `with self.lock:` garante a execução atômica deste bloco,
         # prevenindo "race conditions" e garantindo a integridade dos dados.
+        if self.metrics is None:
+            with self.lock:
+                self._add_locked(ts, client_ip, direction, nbytes, proto)
+            return
+
+        # Caminho instrumentado: mede a espera pelo lock e o tempo com ele retido.
+        t0 = time.perf_counter()
         with self.lock:
-            # Verifica se o timestamp atual exige a criação de uma nova janela de tempo.
-            self._maybe_roll(ts)
+            t1 = time.perf_counter()
+            self._add_locked(ts, client_ip, direction, nbytes, proto)
+        t2 = time.perf_counter()
+        self.metrics.lock_wait.observe(t1 - t0)
+        self.metrics.lock_hold.observe(t2 - t1)
 
-            ip_key = self.anon(client_ip) if self.anon else client_ip
-            direction_key = "in" if direction == "in" else "out"
-            num_bytes = int(nbytes)
+    def add_many(self, events: Iterable[Tuple[float, str, str, int, str]]):
+        """
+        Adiciona um lote de eventos com uma única aquisição do lock.
 
-            # Graças ao defaultdict, o cliente e o protocolo são criados se não existirem.
-            client_data = self._current["clients"][ip_key]
-            client_data[direction_key] += num_bytes
-            client_data["proto"][proto][direction_key] += num_bytes
+        :param events: Iterável de tuplas (ts, client_ip, direction, nbytes, proto),
+                       na mesma ordem dos argumentos de `add`.
+        """
+        if self.metrics is None:
+            with self.lock:
+                for ts, client_ip, direction, nbytes, proto in events:
+                    self._add_locked(ts, client_ip, direction, nbytes, proto)
+            return
 
-            # Incrementa os contadores globais da janela.
-            self._current["pkt_count"] += 1
-            self._current["byte_count"] += num_bytes
+        t0 = time.perf_counter()
+        with self.lock:
+            t1 = time.perf_counter()
+            for ts, client_ip, direction, nbytes, proto in events:
+                self._add_locked(ts, client_ip, direction, nbytes, proto)
+        t2 = time.perf_counter()
+        self.metrics.lock_wait.observe(t1 - t0)
+        self.metrics.lock_hold.observe(t2 - t1)
 
     def snapshot(self, meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -105,20 +132,80 @@ class Aggregator:
             self._current = self._new_window(start_next)
             return payload
 
+    def collect_closed_windows(self, now: float, meta: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        [DESTRUTIVO] Encerra todas as janelas cujo fim é <= `now` e retorna seus payloads.
+
+        Usado pelo loop principal com o agendador alinhado às fronteiras: nenhuma
+        janela com dados é descartada, mesmo que várias tenham se encerrado desde a
+        última chamada. A formatação ocorre fora do lock, pois janelas fechadas
+        não recebem mais escritas.
+
+        :param now: Instante (relógio de parede) até o qual as janelas são encerradas.
+        :param meta: Metadados adicionais (host, iface, etc.) a serem incluídos.
+        :return: Payloads das janelas encerradas com dados, em ordem cronológica.
+        """
+        with self.lock:
+            self._maybe_roll(now)
+            closed = list(self._closed)
+            self._closed.clear()
+        return [self._format_window(window, meta or {}) for window in closed]
+
     # --- MÉTODOS PRIVADOS (LÓGICA INTERNA) ---
 
+    def _add_locked(self, ts: float, client_ip: str, direction: str, nbytes: int, proto: str):
+        """Corpo de `add`; deve ser chamado com `self.lock` adquirido."""
+        # Verifica se o timestamp atual exige a criação de uma nova janela de tempo.
+        self._maybe_roll(ts)
+
+        ip_key = self.anon(client_ip) if self.anon else client_ip
+        direction_key = "in" if direction == "in" else "out"
+        num_bytes = int(nbytes)
+
+        # Graças ao defaultdict, o cliente e o protocolo são criados se não existirem.
+        client_data = self._current["clients"][ip_key]
+        client_data[direction_key] += num_bytes
+        client_data["proto"][proto][direction_key] += num_bytes
+
+        # Incrementa os contadores globais da janela.
+        self._current["pkt_count"] += 1
+        self._current["byte_count"] += num_bytes
+
+    def _window_start_for(self, ts: float) -> float:
+        """Calcula o início (alinhado a múltiplos de `window_s`) da janela que contém `ts`."""
+        return round(math.floor(ts / self.window_s) * self.window_s, 6)
+
     def _maybe_roll(self, ts: float):
         """
         Verifica se o timestamp `ts` pertence a uma janela futura. Se sim,
-        "rola" a janela atual para a próxima.
+        encerra a janela atual (guardando-a se tiver dados) e salta diretamente
+        para a janela que contém `ts`.
         """
-        while ts >= self._current["end"]:
-            start_next = self._current["end"]
-            self._current = self._new_window(start_next)
+        if ts < self._current["end"]:
+            return
+        if self._current["pkt_count"]:
+            self._closed.append(self._current)
+        self._current = self._new_window(self._window_start_for(ts))
 
     def _format_payload(self, meta: Dict[str, Any]) -> Dict[str, Any]:
         """Formata os dados da janela atual em um payload de saída padronizado."""
-        clients_dict = self._current["clients"]
+        return self._format_window(self._current, meta)
+
+    def _format_window(self, window: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Formata os dados de uma janela em um payload de saída padronizado."""
+        if self.metrics is None:
+            return self._build_payload(window, meta)
+
+        start = time.perf_counter()
+        payload = self._build_payload(window, meta)
+        self.metrics.format_duration.observe(time.perf_counter() - start)
+        self.metrics.observe_window(self.window_s, window["pkt_count"], payload["n_clients"],
+                                    _estimate_window_bytes(window))
+        return payload
+
+    def _build_payload(self, window: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Monta o payload de saída de uma janela (lógica de Top-K e totais)."""
+        clients_dict = window["clients"]
         keep = None
 
         # Lógica para limitar o número de clientes (Top-K)
@@ -152,8 +239,8 @@ class Aggregator:
         # Montagem do payload final
         return {
             "version": __VERSION__,
-            "window_start": self._current["start"],
-            "window_end": self._current["end"],
+            "window_start": window["start"],
+            "window_end": window["end"],
             "emitted_at": now_ts(),
             "host": meta.get("host"),
             "iface": meta.get("iface"),
@@ -161,8 +248,8 @@ class Aggregator:
             "n_clients": len(clients_out),
             "total_in": total_in,
             "total_out": total_out,
-            "pkt_count": self._current["pkt_count"],
-            "byte_count": self._current["byte_count"],
+            "pkt_count": window["pkt_count"],
+            "byte_count": window["byte_count"],
             "clients": clients_out
         }
 
@@ -170,10 +257,21 @@ class Aggregator:
         """Cria e retorna a estrutura de dados para uma nova janela de agregação."""
         return {
             "start": start,
-            "end": start + self.window_s,
+            "end": round(start + self.window_s, 6),
             "clients": defaultdict(lambda: {
                 "in": 0, "out": 0, "proto": defaultdict(lambda: {"in": 0, "out": 0})
             }),
             "pkt_count": 0,
             "byte_count": 0
-        }
\ No newline at end of file
+        }
+
+# --- SEÇÃO 3: FUNÇÕES PRIVADAS (AUXILIARES) ---
+
+def _estimate_window_bytes(window: Dict[str, Any]) -> int:
+    """Estima a memória ocupada pelos dicionários de uma janela (clientes e protocolos)."""
+    clients = window["clients"]
+    total = sys.getsizeof(clients)
+    for ip, c in clients.items():
+        total += sys.getsizeof(ip) + sys.getsizeof(c) + sys.getsizeof(c["proto"])
+        total += sum(sys.getsizeof(pv) for pv in c["proto"].values())
+    return total
@@ -1,24 +1,60 @@
 # =====================================================================================
 # MÓDULO DE CONFIGURAÇÃO DE LOGGING
-# Versão: 1.1.0 (Refatorado para configuração explícita e robusta)
+# Versão: 1.2.0 (Logging assíncrono via fila e contadores de erros com limite de taxa)
 #
 # Autor: Equipe de Análise de Rede
 # Descrição: Este módulo fornece uma função centralizada (`setup_logging`) para
 #            configurar o sistema de logging de toda a aplicação. Ele permite
 #            definir o nível de verbosidade e direcionar a saída para o
-#            console e/ou para um arquivo.
+#            console e/ou para um arquivo. As threads da aplicação apenas
+#            enfileiram os registros; a formatação e a escrita acontecem numa
+#            thread dedicada (`QueueListener`), fora do caminho dos pacotes.
 # =====================================================================================
 
 # --- SEÇÃO 0: IMPORTAÇÕES ---
 import sys
+import time
+import queue
+import atexit
 import logging
-from typing import Optional
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
 
 # --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
 DEFAULT_LOG_LEVEL = "INFO"
+LOG_QUEUE_SIZE = 10000                 # Registros pendentes antes de descartar.
+DEFAULT_ERROR_SUMMARY_INTERVAL_S = 10.0
 
-# --- SEÇÃO 2: FUNÇÃO DE CONFIGURAÇÃO ---
+_listener: Optional[QueueListener] = None
+
+# --- SEÇÃO 2: HANDLER NÃO BLOQUEANTE ---
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    `QueueHandler` que nunca bloqueia quem loga.
+
+    A mensagem não é formatada aqui: o registro segue com `msg` e `args`
+    intactos e é formatado pela thread do `QueueListener`. Se a fila estiver
+    cheia, o registro é descartado e contabilizado em `dropped`.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Mesmo processo: não há serialização, então a formatação fica para o listener.
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# --- SEÇÃO 3: FUNÇÕES DE CONFIGURAÇÃO ---
 
 def setup_logging(level: str, log_file: Optional[str]) -> None:
     """
@@ -26,12 +62,16 @@ def setup_logging(level: str, log_file: Optional[str]) -> None:
 
     Esta abordagem é mais robusta que `basicConfig`, pois remove handlers
     existentes antes de adicionar os novos, garantindo uma configuração limpa.
+    O logger raiz recebe apenas um `NonBlockingQueueHandler`; os handlers de
+    console e arquivo rodam na thread do `QueueListener`.
 
     :param level: O nível mínimo de log a ser exibido (ex: "INFO", "DEBUG").
                   Não diferencia maiúsculas de minúsculas.
     :param log_file: O caminho do arquivo para salvar os logs. Se None, os logs
                      irão apenas para o console.
     """
+    global _listener
+
     # 1. Valida e converte o nível de log de string para a constante do logging.
     try:
         log_level_const = getattr(logging, level.upper())
@@ -49,21 +89,108 @@ def setup_logging(level: str, log_file: Optional[str]) -> None:
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level_const)
     # Limpa quaisquer handlers pré-existentes para evitar duplicação de logs.
+    shutdown_logging()
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
 
     # 4. Configura o handler para o console (saída de erro padrão).
     console_handler = logging.StreamHandler(sys.stderr)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # 5. Se um arquivo de log foi especificado, configura o handler de arquivo.
+    file_error = None
     if log_file:
         try:
             file_handler = logging.FileHandler(log_file, encoding="utf-8")
             file_handler.setFormatter(formatter)
-            root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
         except (IOError, OSError) as e:
-            logging.error("Não foi possível abrir o arquivo de log '%s': %s", log_file, e)
+            file_error = e
+
+    # 6. A escrita acontece na thread do listener; as demais threads só enfileiram.
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root_logger.addHandler(NonBlockingQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    if file_error:
+        logging.error("Não foi possível abrir o arquivo de log '%s': %s", log_file, file_error)
+    logging.info("Sistema de logging configurado para o nível %s.", level.upper())
+
+def shutdown_logging() -> None:
+    """Esvazia a fila de logs e encerra a thread de escrita (chamado também no `atexit`)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def dropped_records() -> int:
+    """Total de registros descartados por fila cheia desde a configuração."""
+    return sum(getattr(h, "dropped", 0) for h in logging.getLogger().handlers)
+
+atexit.register(shutdown_logging)
+
+# --- SEÇÃO 4: CONTADORES DE ERROS COM LIMITE DE TAXA ---
+
+class RateLimitedErrors:
+    """
+    Agrega erros repetitivos (ex: um por pacote) em contadores por chave.
+
+    A primeira ocorrência de cada chave é logada imediatamente; as seguintes só
+    incrementam um contador, e um resumo é emitido no máximo uma vez por
+    `interval_s`. O caminho comum custa um incremento de dicionário.
+    """
+
+    def __init__(self, name: str, interval_s: float = DEFAULT_ERROR_SUMMARY_INTERVAL_S,
+                 level: int = logging.WARNING, clock=time.monotonic):
+        """
+        :param name: Descrição da origem dos erros usada nas mensagens (ex: "callback de pacotes").
+        :param interval_s: Intervalo mínimo entre resumos, em segundos.
+        :param level: Nível dos registros emitidos.
+        :param clock: Fonte do relógio monotônico (injetável para testes).
+        """
+        self.name = name
+        self.interval_s = interval_s
+        self.level = level
+        self.total = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._last: Dict[str, object] = {}
+        self._next_flush = clock() + interval_s
+
+    def record(self, key: str, detail: object = None):
+        """
+        Contabiliza uma ocorrência de `key`.
+
+        :param key: Categoria do erro (ex: nome da exceção).
+        :param detail: Detalhe da ocorrência mais recente (formatado só quando logado).
+        """
+        with self._lock:
+            self.total += 1
+            first = key not in self._last
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._last[key] = detail
+            due = self._clock() >= self._next_flush
+        if first:
+            logging.log(self.level, "Erro no %s (%s): %s. Ocorrências repetidas serão agregadas.",
+                        self.name, key, detail)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Emite o resumo das ocorrências acumuladas desde o último resumo."""
+        with self._lock:
+            counts = self._counts
+            last = dict(self._last)
+            self._counts = {}
+            self._next_flush = self._clock() + self.interval_s
+        for key, count in counts.items():
+            logging.log(self.level, "%d erro(s) no %s (%s) nos últimos %.0fs. Último: %s",
+                        count, self.name, key, self.interval_s, last.get(key))
 
-    logging.info("Sistema de logging configurado para o nível %s.", level.upper())
\ No newline at end of file
+    def snapshot(self) -> Dict[str, Tuple[int, object]]:
+        """Contagens pendentes e último detalhe por chave (para testes e diagnóstico)."""
+        with self._lock:
+            return {k: (c, self._last.get(k)) for k, c in self._counts.items()}
@@ -0,0 +1,81 @@
+# =====================================================================================
+# MÓDULO AGENDADOR DE JANELAS (SCHEDULER)
+# Versão: 1.0.0
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece o `WindowScheduler`, que dispara o loop principal
+#            exatamente nas fronteiras de janela do relógio de parede (as mesmas
+#            que o `Aggregator` usa em `window_start`). Cada espera é calculada a
+#            partir da fronteira absoluta e medida com o relógio monotônico, de
+#            modo que o tempo de processamento não se acumula entre ciclos.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import math
+import time
+import threading
+from typing import Callable, Optional
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+MIN_PERIOD_S = 0.1     # Menor período suportado (100 ms).
+MAX_GRACE_S = 0.05     # Atraso máximo após a fronteira para pacotes em trânsito.
+
+# --- SEÇÃO 2: DEFINIÇÃO DA CLASSE PRINCIPAL ---
+
+class WindowScheduler:
+    """
+    Gera "ticks" alinhados a múltiplos inteiros de `period_s` no relógio de parede.
+
+    Se um ciclo demorar mais que um período, os ticks perdidos são pulados
+    (e contabilizados em `missed`) em vez de serem disparados em rajada.
+    """
+
+    def __init__(self, period_s: float, grace_s: Optional[float] = None,
+                 wall_clock: Callable[[], float] = time.time,
+                 monotonic_clock: Callable[[], float] = time.monotonic):
+        """
+        :param period_s: Intervalo entre ticks em segundos (mínimo de 100 ms).
+        :param grace_s: Atraso após cada fronteira antes de acordar, para que pacotes
+                        capturados pouco antes dela já tenham sido agregados.
+                        Padrão: 10% do período, limitado a 50 ms.
+        :param wall_clock: Fonte do relógio de parede (injetável para testes).
+        :param monotonic_clock: Fonte do relógio monotônico (injetável para testes).
+        """
+        if period_s < MIN_PERIOD_S:
+            raise ValueError(f"Período mínimo do agendador é {MIN_PERIOD_S}s (recebido {period_s}s).")
+        self.period_s = period_s
+        self.grace_s = min(MAX_GRACE_S, period_s / 10) if grace_s is None else max(0.0, grace_s)
+        self.missed = 0
+        self._wall = wall_clock
+        self._mono = monotonic_clock
+        self._last_index: Optional[int] = None
+
+    def wait(self, stop_event: threading.Event) -> Optional[float]:
+        """
+        Bloqueia até a próxima fronteira (mais a margem `grace_s`).
+
+        :param stop_event: Evento que interrompe a espera.
+        :return: O instante da fronteira (relógio de parede), ou None se `stop_event` for sinalizado.
+        """
+        index = math.floor(self._wall() / self.period_s) + 1
+        if self._last_index is not None:
+            skipped = index - self._last_index - 1
+            if skipped > 0:
+                self.missed += skipped
+            index = max(index, self._last_index + 1)
+        boundary = round(index * self.period_s, 6)
+
+        # Converte a fronteira absoluta em um prazo monotônico: saltos do relógio
+        # de parede durante a espera não alongam nem encurtam o sono.
+        deadline = self._mono() + (boundary + self.grace_s - self._wall())
+        while True:
+            remaining = deadline - self._mono()
+            if remaining <= 0:
+                break
+            if stop_event.wait(timeout=remaining):
+                return None
+        if stop_event.is_set():
+            return None
+
+        self._last_index = index
+        return boundary
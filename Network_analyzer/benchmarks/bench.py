@@ -0,0 +1,354 @@
+# =====================================================================================
+# SUÍTE DE BENCHMARKS DO PRODUTOR (CAMINHO QUENTE)
+# Versão: 1.1.1
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este script mede a vazão dos estágios do caminho quente do produtor
+#            (callback do Sniffer, Aggregator, friendly_proto, anonimização e
+#            serialização do emit_json) e uma execução ponta a ponta a partir de
+#            um pcap gerado pelo `SyntheticTraffic`. Os resultados são gravados
+#            em JSON e, com `--baseline`, comparados com uma linha de base gerada
+#            no mesmo host; uma queda de vazão acima da tolerância encerra o
+#            script com código 1.
+#
+#            Uso: python benchmarks/bench.py [--quick] [--output resultados.json]
+#                 python benchmarks/bench.py --update-baseline [--baseline base.json]
+#                 python benchmarks/bench.py --baseline base.json
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import tempfile
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+# Adiciona o diretório do produtor ao path para importar os módulos da aplicação
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Aggregator import Aggregator
+from captura import Sniffer
+from emissao import emit_json
+from util import friendly_proto, anon_hasher
+from sintetico import SyntheticTraffic, DEFAULT_SERVER_IP
+
+# --- SEÇÃO 1: CONSTANTES DE CONFIGURAÇÃO PADRÃO ---
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.20          # Queda de vazão tolerada antes de acusar regressão (20%).
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+QUICK_SIZES = (1_000, 10_000)
+DEFAULT_REPEAT = 3                # Cada medição é repetida e a melhor é mantida.
+DEFAULT_PACKETS = 200_000
+QUICK_PACKETS = 20_000
+SEED = 1234                       # Semente fixa: as entradas são reproduzíveis.
+
+PORTS = (80, 443, 53, 22, 8001, 2121, 3306, 51515)
+# Campos de `meta` que precisam coincidir para que a comparação faça sentido.
+HOST_KEYS = ("node", "machine", "system", "implementation", "python")
+
+# --- SEÇÃO 2: MEDIÇÃO ---
+
+def measure(fn: Callable[[], int], repeat: int = DEFAULT_REPEAT,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """
+    Executa `fn` `repeat` vezes e retorna a melhor vazão observada.
+
+    :param fn: Função medida; retorna o número de operações que executou.
+    :param repeat: Número de repetições.
+    :param setup: Preparação executada antes de cada repetição, fora da medição.
+    :return: Dicionário com `ops`, `seconds`, `ops_per_s` e `ns_per_op`.
+    """
+    best = None
+    for _ in range(max(1, repeat)):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        ops = fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed / ops < best[1] / best[0]:
+            best = (ops, elapsed)
+    ops, elapsed = best
+    return {
+        "ops": ops,
+        "seconds": round(elapsed, 6),
+        "ops_per_s": round(ops / elapsed, 1) if elapsed else float("inf"),
+        "ns_per_op": round(elapsed / ops * 1e9, 1),
+    }
+
+def _skipped(reason: str) -> Dict[str, Any]:
+    return {"skipped": reason}
+
+# --- SEÇÃO 3: ENTRADAS SINTÉTICAS ---
+
+def client_ips(n: int) -> List[str]:
+    """Gera `n` IPs de clientes distintos em 10.0.0.0/8."""
+    return [f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}" for i in range(n)]
+
+# --- SEÇÃO 4: BENCHMARKS ---
+
+def bench_aggregator_add(n: int, repeat: int) -> Dict[str, Any]:
+    """`Aggregator.add` com `n` clientes distintos numa única janela."""
+    ips = client_ips(n)
+    state = {}
+
+    def _setup():
+        state["aggr"] = Aggregator(window_s=3600)
+
+    def _run():
+        aggr = state["aggr"]
+        ts = aggr._current["start"] + 1
+        for ip in ips:
+            aggr.add(ts, ip, "in", 1500, "HTTPS")
+        return n
+    return measure(_run, repeat, _setup)
+
+def bench_aggregator_add_many(n: int, repeat: int) -> Dict[str, Any]:
+    """`Aggregator.add_many` com `n` eventos sintéticos (Zipf) num único lote."""
+    # Taxa de 1M pps: o lote inteiro cabe em poucos segundos, dentro da mesma janela.
+    events = SyntheticTraffic(n_clients=n, rate_pps=1_000_000, seed=SEED).events(n, time.time())
+    state = {}
+
+    def _setup():
+        state["aggr"] = Aggregator(window_s=3600)
+
+    def _run():
+        state["aggr"].add_many(events)
+        return n
+    return measure(_run, repeat, _setup)
+
+def bench_snapshot_and_roll(n: int, repeat: int) -> Dict[str, Any]:
+    """`get_snapshot_and_roll_window` de uma janela com `n` clientes."""
+    ips = client_ips(n)
+    state = {}
+
+    def _setup():
+        aggr = state["aggr"] = Aggregator(window_s=3600)
+        ts = aggr._current["start"] + 1
+        for ip in ips:
+            aggr.add(ts, ip, "in", 1500, "HTTPS")
+
+    def _run():
+        state["aggr"].get_snapshot_and_roll_window({"host": "bench"})
+        return n
+    return measure(_run, repeat, _setup)
+
+def bench_friendly_proto(n: int, repeat: int) -> Dict[str, Any]:
+    """`friendly_proto` sobre uma mistura de camadas e portas."""
+    rng = random.Random(SEED)
+    cases = [(rng.choice(("TCP", "UDP", "ICMP")), rng.choice(PORTS), rng.randrange(1024, 65535))
+             for _ in range(1024)]
+
+    def _run():
+        for i in range(n):
+            layer, sport, dport = cases[i & 1023]
+            friendly_proto(layer, sport, dport)
+        return n
+    return measure(_run, repeat)
+
+def bench_anonymizer(n: int, repeat: int) -> Dict[str, Any]:
+    """Função de anonimização (HMAC-SHA1) aplicada a IPs de clientes."""
+    anon = anon_hasher(b"bench-key")
+    ips = client_ips(1024)
+
+    def _run():
+        for i in range(n):
+            anon(ips[i & 1023])
+        return n
+    return measure(_run, repeat)
+
+class _DiscardFileSink:
+    """Destino que descarta os bytes: isola o custo de serialização do `emit_json`."""
+
+    def write(self, data: bytes) -> bool:
+        return True
+
+def bench_emit_json(n_clients: int, repeat: int) -> Dict[str, Any]:
+    """Serialização de `emit_json` para uma janela com `n_clients` clientes (ops = clientes)."""
+    aggr = Aggregator(window_s=3600)
+    ts = aggr._current["start"] + 1
+    for ip in client_ips(n_clients):
+        aggr.add(ts, ip, "in", 1500, "HTTPS")
+        aggr.add(ts, ip, "out", 400, "DNS")
+    payload = aggr.get_snapshot_and_roll_window({"host": "bench"})
+    sink = _DiscardFileSink()
+
+    def _run():
+        emit_json(payload, to_file=None, post_url=None, post_timeout=1.0, post_retries=0,
+                  file_append=True, file_sink=sink)
+        return n_clients
+    return measure(_run, repeat)
+
+def bench_synthetic_events(n: int, repeat: int) -> Dict[str, Any]:
+    """Geração de eventos pelo `SyntheticTraffic` (custo do próprio gerador de carga)."""
+    generator = SyntheticTraffic(n_clients=1000, rate_pps=1_000_000, seed=SEED)
+
+    def _run():
+        generator.events(n, time.time())
+        return n
+    return measure(_run, repeat)
+
+def bench_packet_callback(pcap_path: str, repeat: int) -> Dict[str, Any]:
+    """`Sniffer._packet_callback` sobre pacotes do pcap sintético já decodificados."""
+    sniffer = Sniffer(Aggregator(window_s=3600), server_ip=DEFAULT_SERVER_IP, iface=None)
+    scapy = sniffer._scapy
+    if scapy is None:
+        return _skipped("Scapy indisponível")
+    packets = scapy.rdpcap(pcap_path)
+
+    def _setup():
+        sniffer.aggr = Aggregator(window_s=3600)
+
+    def _run():
+        for pkt in packets:
+            sniffer._packet_callback(pkt)
+        return len(packets)
+    return measure(_run, repeat, _setup)
+
+def bench_end_to_end_pcap(pcap_path: str, n_packets: int, repeat: int) -> Dict[str, Any]:
+    """Pacotes por segundo do caminho `--pcap` completo (leitura, decodificação e agregação)."""
+    sniffer = Sniffer(Aggregator(window_s=3600), server_ip=DEFAULT_SERVER_IP, iface=None, pcap=pcap_path)
+    if sniffer._scapy is None:
+        return _skipped("Scapy indisponível")
+
+    def _setup():
+        sniffer.aggr = Aggregator(window_s=3600)
+
+    def _run():
+        sniffer._run_pcap_read()
+        return n_packets
+    return measure(_run, repeat, _setup)
+
+def run_all(sizes: Tuple[int, ...], n_packets: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Executa toda a suíte e retorna os resultados indexados pelo nome do benchmark."""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def _record(name: str, result: Dict[str, Any]):
+        results[name] = result
+        if "skipped" in result:
+            logging.info("%-36s ignorado (%s)", name, result["skipped"])
+        else:
+            logging.info("%-36s %14.0f ops/s %10.1f ns/op", name, result["ops_per_s"], result["ns_per_op"])
+
+    for n in sizes:
+        _record(f"aggregator_add[{n}]", bench_aggregator_add(n, repeat))
+        _record(f"aggregator_add_many[{n}]", bench_aggregator_add_many(n, repeat))
+        _record(f"snapshot_and_roll[{n}]", bench_snapshot_and_roll(n, repeat))
+    _record("friendly_proto", bench_friendly_proto(n_packets, repeat))
+    _record("anonymizer", bench_anonymizer(n_packets, repeat))
+    _record("emit_json[1000]", bench_emit_json(1000, repeat))
+    _record("synthetic_events", bench_synthetic_events(n_packets, repeat))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pcap_path = os.path.join(tmp, "bench.pcap")
+        written = SyntheticTraffic(n_clients=1000, rate_pps=1_000_000, seed=SEED).write_pcap(pcap_path, n_packets)
+        _record("packet_callback", bench_packet_callback(pcap_path, repeat))
+        _record("end_to_end_pcap", bench_end_to_end_pcap(pcap_path, written, repeat))
+    return results
+
+# --- SEÇÃO 5: COMPARAÇÃO COM A LINHA DE BASE ---
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """
+    Compara a vazão de cada benchmark com a linha de base.
+
+    :return: Lista de descrições das regressões (vazia se tudo estiver dentro da tolerância).
+    """
+    regressions = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if not current or "ops_per_s" not in current or "ops_per_s" not in base:
+            continue
+        ratio = current["ops_per_s"] / base["ops_per_s"]
+        if ratio < 1.0 - tolerance:
+            regressions.append(f"{name}: {current['ops_per_s']:.0f} ops/s vs. {base['ops_per_s']:.0f} "
+                               f"na linha de base ({(1 - ratio):.0%} mais lento)")
+    return regressions
+
+def same_host(meta: Dict[str, Any], baseline_meta: Dict[str, Any]) -> List[str]:
+    """
+    Confere se a linha de base foi gerada no mesmo host e interpretador.
+
+    :return: Os campos de `HOST_KEYS` que diferem (vazia se a comparação for válida).
+    """
+    return [key for key in HOST_KEYS if meta.get(key) != baseline_meta.get(key)]
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "ts": time.time(),
+        "node": platform.node(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+# --- SEÇÃO 6: INTERFACE DE LINHA DE COMANDO ---
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks do caminho quente do Netvision Producer.")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"Execução curta (clientes: {QUICK_SIZES}, pacotes: {QUICK_PACKETS}); sem comparação.")
+    parser.add_argument("--sizes", help="Quantidades de clientes separadas por vírgula (ex: 1000,100000).")
+    parser.add_argument("--packets", type=int, help=f"Pacotes sintéticos por benchmark (padrão: {DEFAULT_PACKETS}).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Repetições por benchmark; a melhor é mantida (padrão: {DEFAULT_REPEAT}).")
+    parser.add_argument("--output", help="Grava os resultados (JSON) neste arquivo.")
+    parser.add_argument("--baseline", help="Compara com esta linha de base, gerada no mesmo host "
+                                           f"(com --update-baseline, padrão: {DEFAULT_BASELINE}).")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Queda de vazão tolerada, fração (padrão: {DEFAULT_TOLERANCE}).")
+    parser.add_argument("--update-baseline", action="store_true", help="Substitui a linha de base pelos resultados.")
+    return parser.parse_args(argv)
+
+def run(argv: Optional[List[str]] = None) -> int:
+    """Executa os benchmarks, grava os resultados e compara com a linha de base."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+
+    if args.sizes:
+        sizes = tuple(int(s) for s in args.sizes.split(",") if s.strip())
+    else:
+        sizes = QUICK_SIZES if args.quick else DEFAULT_SIZES
+    n_packets = args.packets or (QUICK_PACKETS if args.quick else DEFAULT_PACKETS)
+
+    report = {"meta": _metadata(), "results": run_all(sizes, n_packets, args.repeat)}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logging.info("Resultados gravados em %s", args.output)
+
+    if args.update_baseline:
+        path = args.baseline or DEFAULT_BASELINE
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logging.info("Linha de base atualizada em %s", path)
+        return 0
+
+    if args.quick or not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    # Vazões de outro host (ou interpretador) não são comparáveis: nada seria uma regressão real.
+    mismatched = same_host(report["meta"], baseline.get("meta", {}))
+    if mismatched:
+        logging.warning("Comparação ignorada: a linha de base %s foi gerada em outro ambiente (%s difere). "
+                        "Gere uma com --update-baseline neste host.", args.baseline, ", ".join(mismatched))
+        return 0
+    regressions = compare(report["results"], baseline["results"], args.tolerance)
+    for line in regressions:
+        logging.error("REGRESSÃO %s", line)
+    if not regressions:
+        logging.info("Sem regressões acima de %.0f%% em relação à linha de base.", args.tolerance * 100)
+    return 1 if regressions else 0
+
+# --- SEÇÃO 7: PONTO DE ENTRADA (ENTRY POINT) ---
+if __name__ == "__main__":
+    sys.exit(run())
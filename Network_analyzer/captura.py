@@ -1,26 +1,33 @@
 # =====================================================================================
 # MÓDULO SNIFFER DE PACOTES DE REDE
-# Versão: 1.1.0 (Refatorado para maior clareza e separação de responsabilidades)
+# Versão: 1.4.0 (Erros por pacote agregados com limite de taxa)
 #
 # Autor: Equipe de Análise de Rede
 # Descrição: Este módulo fornece a classe `Sniffer`, um wrapper em torno do Scapy
-#            para capturar pacotes de rede ao vivo ou de um arquivo PCAP.
-#            A captura é executada em uma thread separada para não bloquear
-#            a aplicação principal e os dados são enviados a um Aggregator.
+#            para capturar pacotes de rede ao vivo (de uma ou mais interfaces) ou
+#            de um arquivo PCAP. A captura é executada em uma thread separada
+#            para não bloquear a aplicação principal e os dados são enviados a
+#            um único Aggregator.
 # =====================================================================================
 
 # --- SEÇÃO 0: IMPORTAÇÕES ---
 
 # Importações da biblioteca padrão
+import time
 import logging
 import threading
-from typing import Optional, Any
+from typing import Optional, Any, List, Sequence, Union
 
 # Importações da aplicação local
 from Aggregator import Aggregator
 from util import friendly_proto
+from prefixos import LocalAddresses
+from Logging import RateLimitedErrors
 
-# --- SEÇÃO 1: DEFINIÇÃO DA CLASSE PRINCIPAL ---
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+IPV6_NH_ICMP = 58  # Next Header do ICMPv6.
+
+# --- SEÇÃO 2: DEFINIÇÃO DA CLASSE PRINCIPAL ---
 class Sniffer:
     """
     Encapsula a lógica de captura de pacotes de rede usando Scapy.
@@ -29,22 +36,33 @@ class Sniffer:
     um arquivo .pcap) e envia os dados capturados para uma instância de Aggregator.
     """
 
-    def __init__(self, aggr: Aggregator, server_ip: Optional[str], iface: Optional[str],
-                 bpf: Optional[str] = None, pcap: Optional[str] = None):
+    def __init__(self, aggr: Aggregator, server_ip: Union[None, str, Sequence[str]],
+                 iface: Union[None, str, Sequence[str]], bpf: Optional[str] = None,
+                 pcap: Optional[str] = None, metrics: Optional[Any] = None):
         """
         Inicializa o Sniffer.
 
         :param aggr: A instância do Aggregator onde os dados serão armazenados.
-        :param server_ip: O IP do servidor local para determinar a direção do tráfego.
-        :param iface: A interface de rede para a captura (ex: "eth0").
+        :param server_ip: O IP do servidor local, ou uma lista de IPs e prefixos CIDR
+                          (IPv4/IPv6) locais, para determinar a direção do tráfego.
+        :param iface: A interface de rede para a captura (ex: "eth0"), ou uma lista delas.
         :param bpf: Um filtro BPF (Berkeley Packet Filter) para a captura.
         :param pcap: O caminho para um arquivo .pcap para leitura de pacotes.
+        :param metrics: `ProducerMetrics` opcional para medir a latência do callback.
+        :raises ValueError: Se algum endereço ou prefixo local for inválido.
         """
         self.aggr = aggr
+        entries = [server_ip] if isinstance(server_ip, str) else list(server_ip or [])
+        self.local = LocalAddresses(entries)
         self.server_ip = server_ip
-        self.iface = iface
+        ifaces = [iface] if isinstance(iface, str) else list(iface or [])
+        # O Scapy aceita uma lista de interfaces numa única chamada a `sniff`.
+        self.iface: Union[None, str, List[str]] = ifaces[0] if len(ifaces) == 1 else (ifaces or None)
         self._pcap = pcap
-        self._bpf = bpf or (f"host {server_ip}" if server_ip else None)
+        self._bpf = bpf or (self.local.bpf_filter() if self.local else None)
+        self.metrics = metrics
+        # Erros por pacote são agregados: uma tempestade de erros não vira uma linha de log por pacote.
+        self.errors = RateLimitedErrors("callback de pacotes")
 
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
@@ -73,6 +91,7 @@ class Sniffer:
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2)
             logging.info("Captura de pacotes finalizada.")
+        self.errors.flush()
 
     # --- MÉTODOS PRIVADOS (LÓGICA INTERNA) ---
 
@@ -92,11 +111,22 @@ class Sniffer:
         Este método é chamado para cada pacote e é responsável por extrair,
         processar e enviar os dados para o Aggregator.
         """
+        if self.metrics is None:
+            self._process_packet(pkt)
+            return
+
+        start = time.perf_counter()
+        self._process_packet(pkt)
+        self.metrics.callback_latency.observe(time.perf_counter() - start)
+        self.metrics.packets.inc()
+
+    def _process_packet(self, pkt: Any):
+        """Extrai camada, portas e direção de um pacote e o envia ao Aggregator."""
         try:
             if not self._scapy: return
 
             ts, nbytes = float(pkt.time), len(bytes(pkt))
-            ip_layer = pkt.getlayer(self._scapy.IP)
+            ip_layer = pkt.getlayer(self._scapy.IP) or pkt.getlayer(self._scapy.IPv6)
 
             if not ip_layer:
                 return
@@ -112,16 +142,16 @@ class Sniffer:
                 layer = "UDP"
                 udp = pkt.getlayer(self._scapy.UDP)
                 sport, dport = int(udp.sport), int(udp.dport)
-            elif pkt.haslayer(self._scapy.ICMP):
+            elif pkt.haslayer(self._scapy.ICMP) or getattr(ip_layer, "nh", None) == IPV6_NH_ICMP:
                 layer = "ICMP"
 
             proto = friendly_proto(layer, sport, dport)
 
             # Determina a direção do tráfego e o IP do cliente.
-            if self.server_ip:
-                if src == self.server_ip:
+            if self.local:
+                if src in self.local:
                     direction, client_ip = "out", dst
-                elif dst == self.server_ip:
+                elif dst in self.local:
                     direction, client_ip = "in", src
                 else:
                     return  # Pacote não relacionado ao servidor.
@@ -131,7 +161,9 @@ class Sniffer:
             self.aggr.add(ts, client_ip=client_ip, direction=direction, nbytes=nbytes, proto=proto)
 
         except Exception as e:
-            logging.debug("Erro no callback do pacote: %s", e)
+            if self.metrics is not None:
+                self.metrics.packet_errors.inc()
+            self.errors.record(type(e).__name__, e)
 
     def _run_live_capture(self):
         """Função alvo da thread para captura de pacotes ao vivo."""
@@ -17,6 +17,21 @@ DEFAULT_MAX_CLIENTS = 0
 DEFAULT_POST_TIMEOUT_S = 10.0
 DEFAULT_POST_RETRIES = 2
 DEFAULT_LOG_LEVEL = "INFO"
+DEFAULT_FILE_BUFFER_KB = 64
+DEFAULT_FILE_FSYNC = "never"
+DEFAULT_FILE_FSYNC_EVERY = 10
+DEFAULT_FILE_FSYNC_INTERVAL_S = 1.0
+DEFAULT_SINK_QUEUE_SIZE = 64
+DEFAULT_SHM_SLOTS = 8
+DEFAULT_SHM_MAX_CLIENTS = 4096
+DEFAULT_SHM_MAX_PROTOS = 16384
+DEFAULT_PROFILE_INTERVAL_S = 60.0
+DEFAULT_MOCK_CLIENTS = 100
+DEFAULT_MOCK_RATE_PPS = 1000.0
+DEFAULT_MOCK_ZIPF_S = 1.1
+DEFAULT_MOCK_PROTO_MIX = "HTTPS=40,HTTP=15,QUIC=15,DNS=10,SSH=5,ICMP=5,TCP=10"
+DEFAULT_MOCK_SIZES = "imix"
+DEFAULT_MOCK_PACKETS = 1_000_000
 
 # --- SEÇÃO 2: FUNÇÃO PRINCIPAL DE PARSING ---
 def parse_args() -> argparse.Namespace:
@@ -35,29 +50,65 @@ def parse_args() -> argparse.Namespace:
 
     # --- Grupo 1: Argumentos de Captura de Rede ---
     capture_group = parser.add_argument_group("Argumentos de Captura de Rede")
-    capture_group.add_argument("--server-ip", required=False,
-                               help="IP do servidor local para definir a direção do tráfego (in/out).")
-    capture_group.add_argument("--iface", help="Interface de rede para captura (ex: 'eth0', 'Wi-Fi').")
+    capture_group.add_argument("--server-ip", required=False, action="append",
+                               help="IP ou prefixo CIDR local (IPv4/IPv6) para definir a direção do tráfego (in/out).\n"
+                                    "Pode ser repetido ou separado por vírgulas (ex: 10.0.0.5,10.0.0.6,2001:db8::/64).")
+    capture_group.add_argument("--iface", action="append",
+                               help="Interface de rede para captura (ex: 'eth0', 'Wi-Fi'). Pode ser repetido;\n"
+                                    "todas as interfaces alimentam o mesmo Aggregator.")
     capture_group.add_argument("--bpf", help="Filtro BPF para capturar pacotes específicos.")
     capture_group.add_argument("--pcap", help="Ler pacotes de um arquivo .pcap em vez de capturar ao vivo.")
 
     # --- Grupo 2: Argumentos de Agregação e Emissão ---
     agg_group = parser.add_argument_group("Argumentos de Agregação e Emissão")
     agg_group.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_S,
-                           help=f"Tamanho da janela de agregação em segundos (padrão: {DEFAULT_INTERVAL_S}s).")
+                           help=f"Tamanho da janela de agregação em segundos, mínimo 0.1 (padrão: {DEFAULT_INTERVAL_S}s).")
+    agg_group.add_argument("--emit-interval", type=float, default=None,
+                           help="Cadência de emissão em segundos (padrão: igual a --interval). Cada emissão envia\n"
+                                "todas as janelas encerradas desde a anterior, alinhadas ao relógio de parede.")
     agg_group.add_argument("--max-clients", type=int, default=DEFAULT_MAX_CLIENTS,
                            help="Manter apenas os N clientes com maior tráfego (0 = ilimitado).")
 
     # --- Grupo 3: Argumentos de Saída (Output) ---
     output_group = parser.add_argument_group("Argumentos de Saída (Output)")
-    output_group.add_argument("--post", help="URL para onde o JSON será enviado via POST (ex: http://localhost:8000/api/ingest).")
+    output_group.add_argument("--post", action="append",
+                              help="URL para onde o JSON será enviado via POST (ex: http://localhost:8000/api/ingest).\n"
+                                   "Pode ser repetido para enviar a vários destinos em paralelo.")
     output_group.add_argument("--post-timeout", type=float, default=DEFAULT_POST_TIMEOUT_S,
                               help=f"Timeout para a requisição POST em segundos (padrão: {DEFAULT_POST_TIMEOUT_S}s).")
     output_group.add_argument("--post-retries", type=int, default=DEFAULT_POST_RETRIES,
                               help=f"Tentativas extras no POST com backoff exponencial (padrão: {DEFAULT_POST_RETRIES}).")
-    output_group.add_argument("--file", help="Salvar JSON em arquivo (sobrescreve a cada janela por padrão).")
+    output_group.add_argument("--file", action="append",
+                              help="Salvar JSON em arquivo (sobrescreve a cada janela por padrão). Pode ser repetido.")
     output_group.add_argument("--file-append", action="store_true",
                               help="Se usado, anexa ao arquivo em formato NDJSON (um JSON por linha).")
+    output_group.add_argument("--file-buffer-kb", type=int, default=DEFAULT_FILE_BUFFER_KB,
+                              help=f"Tamanho do buffer de escrita do arquivo em KiB (padrão: {DEFAULT_FILE_BUFFER_KB}).")
+    output_group.add_argument("--file-rotate-mb", type=float, default=0.0,
+                              help="Rotaciona o arquivo NDJSON ao atingir este tamanho em MiB (0 = desativado).")
+    output_group.add_argument("--file-rotate-interval", type=float, default=0.0,
+                              help="Rotaciona o arquivo NDJSON após este tempo em segundos (0 = desativado).")
+    output_group.add_argument("--file-compress", action="store_true",
+                              help="Comprime os segmentos rotacionados com gzip.")
+    output_group.add_argument("--file-fsync", default=DEFAULT_FILE_FSYNC, choices=["never", "every-n", "interval"],
+                              help=f"Política de fsync do arquivo (padrão: {DEFAULT_FILE_FSYNC}).")
+    output_group.add_argument("--file-fsync-every", type=int, default=DEFAULT_FILE_FSYNC_EVERY,
+                              help=f"Janelas entre fsyncs na política 'every-n' (padrão: {DEFAULT_FILE_FSYNC_EVERY}).")
+    output_group.add_argument("--file-fsync-interval", type=float, default=DEFAULT_FILE_FSYNC_INTERVAL_S,
+                              help=f"Segundos entre fsyncs na política 'interval' (padrão: {DEFAULT_FILE_FSYNC_INTERVAL_S}s).")
+    output_group.add_argument("--uds", help="Envia cada janela ao backend local via Unix domain socket (frames prefixados pelo tamanho).")
+    output_group.add_argument("--udp", help="Envia cada janela como um datagrama UDP para host:porta (entrega não garantida).")
+    output_group.add_argument("--shm", help="Publica cada janela num anel de memória compartilhada (ex: /dev/shm/netvision.ring).")
+    output_group.add_argument("--shm-slots", type=int, default=DEFAULT_SHM_SLOTS,
+                              help=f"Janelas que podem aguardar o backend no anel (padrão: {DEFAULT_SHM_SLOTS}).")
+    output_group.add_argument("--shm-max-clients", type=int, default=DEFAULT_SHM_MAX_CLIENTS,
+                              help=f"Capacidade de clientes por janela no anel (padrão: {DEFAULT_SHM_MAX_CLIENTS}).")
+    output_group.add_argument("--shm-max-protos", type=int, default=DEFAULT_SHM_MAX_PROTOS,
+                              help=f"Capacidade de pares cliente×protocolo por janela no anel (padrão: {DEFAULT_SHM_MAX_PROTOS}).")
+    output_group.add_argument("--stdout", action="store_true",
+                              help="Escreve o JSON também na saída padrão (implícito se nenhum outro destino for usado).")
+    output_group.add_argument("--sink-queue", type=int, default=DEFAULT_SINK_QUEUE_SIZE,
+                              help=f"Janelas pendentes por destino antes de descartar (padrão: {DEFAULT_SINK_QUEUE_SIZE}).")
 
     # --- Grupo 4: Argumentos de Anonimização ---
     anon_group = parser.add_argument_group("Argumentos de Anonimização")
@@ -71,11 +122,40 @@ def parse_args() -> argparse.Namespace:
                            choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
                            help=f"Define o nível de verbosidade do log (padrão: {DEFAULT_LOG_LEVEL}).")
     log_group.add_argument("--log-file", help="Redireciona a saída do log para um arquivo.")
+    log_group.add_argument("--metrics-port", type=int, default=0,
+                           help="Expõe métricas internas (formato Prometheus) em http://HOST:PORTA/metrics (0 = desativado).")
+    log_group.add_argument("--metrics-host", default="127.0.0.1",
+                           help="Endereço de escuta do endpoint de métricas (padrão: 127.0.0.1).")
+    log_group.add_argument("--profile", action="store_true",
+                           help="Ativa o perfilamento por amostragem e o tracemalloc, com relatórios por estágio\n"
+                                "(decode, classify, aggregate, format, serialize, send) gravados ao lado do --file.")
+    log_group.add_argument("--profile-interval", type=float, default=DEFAULT_PROFILE_INTERVAL_S,
+                           help=f"Intervalo entre relatórios de perfilamento em segundos (padrão: {DEFAULT_PROFILE_INTERVAL_S}s).")
 
     # --- Grupo 6: Argumentos de Teste e Comportamento ---
     test_group = parser.add_argument_group("Argumentos de Teste e Comportamento")
     test_group.add_argument("--mock", action="store_true",
-                            help="Injeta eventos de tráfego fictícios (útil para testes de output).")
+                            help="Injeta tráfego sintético no Aggregator na taxa de --mock-rate (útil para testes de carga).")
+    test_group.add_argument("--mock-clients", type=int, default=DEFAULT_MOCK_CLIENTS,
+                            help=f"Clientes sintéticos (padrão: {DEFAULT_MOCK_CLIENTS}).")
+    test_group.add_argument("--mock-rate", type=float, default=DEFAULT_MOCK_RATE_PPS,
+                            help=f"Taxa-alvo do tráfego sintético em pacotes/s (padrão: {DEFAULT_MOCK_RATE_PPS:.0f}).")
+    test_group.add_argument("--mock-zipf", type=float, default=DEFAULT_MOCK_ZIPF_S,
+                            help=f"Expoente de Zipf da escolha de clientes; 0 = uniforme (padrão: {DEFAULT_MOCK_ZIPF_S}).")
+    test_group.add_argument("--mock-proto-mix", default=DEFAULT_MOCK_PROTO_MIX,
+                            help=f"Mistura de protocolos NOME=peso,... (padrão: {DEFAULT_MOCK_PROTO_MIX}).")
+    test_group.add_argument("--mock-sizes", default=DEFAULT_MOCK_SIZES,
+                            help="Distribuição dos tamanhos de pacote: imix, fixed:N ou uniform:A-B (padrão: imix).")
+    test_group.add_argument("--mock-scan-interval", type=float, default=0.0,
+                            help="Segundos entre rajadas de scan de portas (0 = desativado).")
+    test_group.add_argument("--mock-flood-interval", type=float, default=0.0,
+                            help="Segundos entre rajadas de flood com origens forjadas (0 = desativado).")
+    test_group.add_argument("--mock-seed", type=int, default=None,
+                            help="Semente do gerador sintético (torna a carga reproduzível).")
+    test_group.add_argument("--mock-pcap",
+                            help="Grava o tráfego sintético neste arquivo .pcap e encerra (use depois com --pcap).")
+    test_group.add_argument("--mock-packets", type=int, default=DEFAULT_MOCK_PACKETS,
+                            help=f"Pacotes gravados por --mock-pcap (padrão: {DEFAULT_MOCK_PACKETS}).")
     test_group.add_argument("--no-capture", action="store_true",
                             help="Desativa a captura de pacotes (útil para rodar apenas com --mock ou --pcap).")
 
@@ -1,34 +1,54 @@
 # =====================================================================================
 # MÓDULO EMISSOR DE PAYLOAD (EMITTER)
-# Versão: 1.1.0 (Refatorado para separação de responsabilidades)
+# Versão: 1.3.1 (Fan-out concorrente com registro de sinks)
 #
 # Autor: Equipe de Análise de Rede
 # Descrição: Este módulo fornece funcionalidades para serializar e enviar payloads
 #            JSON para múltiplos destinos, como endpoints HTTP (com retentativas),
-#            arquivos locais ou a saída padrão (stdout).
+#            arquivos locais ou a saída padrão (stdout). O `SinkRegistry` permite
+#            vários destinos simultâneos, cada um com sua própria thread e fila,
+#            de modo que um destino lento não atrase os demais.
 # =====================================================================================
 
 # --- SEÇÃO 0: IMPORTAÇÕES ---
 import sys
 import time
 import json
+import queue
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, List, Callable
 from urllib import request, error
 
+from sinks import Sink, FileSink
+
 # --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
 INITIAL_BACKOFF_S = 0.8  # Tempo de espera inicial para o retry do POST em segundos.
+DEFAULT_SINK_QUEUE_SIZE = 64  # Janelas pendentes por sink antes de descartar.
+
+# --- SEÇÃO 2: FUNÇÕES PÚBLICAS (ORQUESTRADORAS) ---
 
-# --- SEÇÃO 2: FUNÇÃO PÚBLICA (ORQUESTRADORA) ---
+def emit_window(payload: Dict[str, Any], registry: "SinkRegistry") -> int:
+    """
+    Entrega uma janela a todos os sinks do registro, sem esperar pelo envio.
+
+    :param payload: O dicionário Python a ser enviado como JSON.
+    :param registry: Registro de sinks concorrentes que recebe a janela.
+    :return: 0 se todos os sinks aceitaram a janela, 1 se algum a recusou (fila cheia).
+    """
+    ticket = registry.submit(payload)
+    return 0 if ticket is not None and not ticket.rejected else 1
 
 def emit_json(payload: Dict[str, Any],
               to_file: Optional[str],
               post_url: Optional[str],
               post_timeout: float,
               post_retries: int,
-              file_append: bool) -> int:
+              file_append: bool,
+              file_sink: Optional[FileSink] = None) -> int:
     """
-    Orquestra o envio de um payload JSON para um ou mais destinos.
+    Orquestra o envio síncrono de um payload JSON para um ou mais destinos.
+    Para o fan-out concorrente por sinks, use `emit_window`.
 
     :param payload: O dicionário Python a ser enviado como JSON.
     :param to_file: O caminho do arquivo para salvar o JSON.
@@ -36,6 +56,7 @@ def emit_json(payload: Dict[str, Any],
     :param post_timeout: Timeout em segundos para a requisição POST.
     :param post_retries: Número de tentativas extras para o POST.
     :param file_append: Se True, anexa ao arquivo (NDJSON); senão, sobrescreve.
+    :param file_sink: Sink de arquivo persistente. Se informado, substitui `to_file`.
     :return: 0 em caso de sucesso total, 1 se qualquer uma das emissões falhar.
     """
     try:
@@ -50,17 +71,248 @@ def emit_json(payload: Dict[str, Any],
     if post_url:
         all_successful &= _post_with_retry(post_url, data, post_timeout, post_retries)
 
-    if to_file:
+    if file_sink:
+        all_successful &= file_sink.write(data)
+    elif to_file:
         all_successful &= _write_to_file(to_file, data, file_append, bool(post_url))
 
-    if not post_url and not to_file:
+    if not post_url and not to_file and not file_sink:
         all_successful &= _write_to_stdout(data)
 
     return 0 if all_successful else 1
 
-# --- SEÇÃO 3: FUNÇÕES PRIVADAS (AUXILIARES) ---
+# --- SEÇÃO 3: FAN-OUT CONCORRENTE (REGISTRO DE SINKS) ---
+
+class PostSink(Sink):
+    """Sink que envia o JSON via HTTP POST, com retry e backoff exponencial."""
+
+    def __init__(self, url: str, timeout: float, retries: int):
+        super().__init__(f"post:{url}")
+        self.url = url
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        self.retries_total = 0  # Retentativas acumuladas, expostas em `SinkRegistry.stats()`.
+
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        return _post_with_retry(self.url, data, self.timeout, self.retries, on_retry=self._count_retry)
+
+    def _count_retry(self):
+        self.retries_total += 1
+
+class StdoutSink(Sink):
+    """Sink que escreve o JSON na saída padrão, um documento por linha."""
+
+    def __init__(self):
+        super().__init__("stdout")
+
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        return _write_to_stdout(data)
+
+class SinkResult:
+    """Resultado da entrega de uma janela a um único sink."""
+    __slots__ = ("name", "ok", "latency_s", "error")
+
+    def __init__(self, name: str, ok: bool, latency_s: float, error: Optional[str] = None):
+        self.name = name
+        self.ok = ok
+        self.latency_s = latency_s
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"SinkResult({self.name!r}, ok={self.ok}, latency_s={self.latency_s:.6f})"
+
+class EmissionTicket:
+    """
+    API de conclusão de uma janela submetida ao `SinkRegistry`.
+
+    Cada sink reporta um `SinkResult` com sua latência; `wait()` bloqueia até
+    que todos tenham terminado e `add_done_callback()` registra uma função
+    chamada (na thread do último sink) quando a janela estiver completa.
+    """
+
+    def __init__(self, sink_names: List[str]):
+        self._pending = set(sink_names)
+        self._results: Dict[str, SinkResult] = {}
+        self._cond = threading.Condition()
+        self._callbacks: List[Callable[["EmissionTicket"], None]] = []
+        self.rejected = False  # True se algum sink recusou a janela (fila cheia).
+
+    @property
+    def done(self) -> bool:
+        with self._cond:
+            return not self._pending
+
+    @property
+    def results(self) -> Dict[str, SinkResult]:
+        """Resultados já reportados, indexados pelo nome do sink."""
+        with self._cond:
+            return dict(self._results)
+
+    @property
+    def ok(self) -> bool:
+        """True se todos os sinks concluíram com sucesso."""
+        with self._cond:
+            return not self._pending and all(r.ok for r in self._results.values())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a conclusão de todos os sinks. Retorna False em caso de timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def add_done_callback(self, fn: Callable[["EmissionTicket"], None]):
+        """Registra uma função chamada quando todos os sinks tiverem concluído."""
+        with self._cond:
+            if self._pending:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _complete(self, result: SinkResult):
+        """Registra o resultado de um sink e dispara os callbacks ao final."""
+        with self._cond:
+            self._results[result.name] = result
+            self._pending.discard(result.name)
+            if self._pending:
+                return
+            callbacks, self._callbacks = self._callbacks, []
+            self._cond.notify_all()
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                logging.error("Erro no callback de conclusão da emissão: %s", e)
+
+class SinkWorker:
+    """Thread dedicada a um sink, consumindo uma fila própria e limitada."""
+
+    def __init__(self, sink: Sink, queue_size: int = DEFAULT_SINK_QUEUE_SIZE):
+        self.sink = sink
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_latency_s = 0.0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread = threading.Thread(target=self._run, name=f"sink-{sink.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, payload: Dict[str, Any], data: Optional[bytes], ticket: EmissionTicket) -> bool:
+        """Enfileira uma janela sem bloquear. Retorna False se a fila estiver cheia."""
+        try:
+            self._queue.put_nowait((payload, data, ticket))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            ticket._complete(SinkResult(self.sink.name, False, 0.0, "fila cheia"))
+            return False
+
+    def stop(self, timeout: Optional[float] = None):
+        """Drena a fila pendente, encerra a thread e fecha o sink."""
+        try:
+            self._queue.put((None, None, None), timeout=timeout)
+        except queue.Full:
+            logging.warning("Sink %s não drenou a fila a tempo. Encerrando mesmo assim.", self.sink.name)
+        self._thread.join(timeout=timeout)
+        try:
+            self.sink.close()
+        except Exception as e:
+            logging.error("Falha ao fechar o sink %s: %s", self.sink.name, e)
+
+    def _run(self):
+        """Laço da thread: entrega cada janela ao sink e reporta a latência."""
+        while True:
+            payload, data, ticket = self._queue.get()
+            if ticket is None:
+                return
+            start = time.perf_counter()
+            err = None
+            try:
+                ok = bool(self.sink.send(payload, data))
+            except Exception as e:
+                ok, err = False, str(e)
+                logging.error("Sink %s lançou uma exceção: %s", self.sink.name, e)
+            latency = time.perf_counter() - start
+
+            self.last_latency_s = latency
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            ticket._complete(SinkResult(self.sink.name, ok, latency, err))
+
+class SinkRegistry:
+    """
+    Registro de destinos de emissão executados de forma concorrente.
+
+    O payload é serializado uma única vez por janela e entregue à fila de cada
+    sink; falhas, retentativas ou lentidão de um sink ficam isoladas na sua
+    própria thread.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_SINK_QUEUE_SIZE,
+                 on_complete: Optional[Callable[[EmissionTicket], None]] = None):
+        """
+        :param queue_size: Número máximo de janelas pendentes por sink.
+        :param on_complete: Callback opcional chamado ao final de cada janela.
+        """
+        self.queue_size = queue_size
+        self.on_complete = on_complete
+        self._workers: List[SinkWorker] = []
+
+    def register(self, sink: Sink) -> Sink:
+        """Adiciona um sink ao registro e inicia a sua thread de trabalho."""
+        if any(w.sink.name == sink.name for w in self._workers):
+            raise ValueError(f"Sink duplicado: {sink.name!r}")
+        self._workers.append(SinkWorker(sink, self.queue_size))
+        return sink
+
+    @property
+    def sinks(self) -> List[Sink]:
+        return [w.sink for w in self._workers]
+
+    def submit(self, payload: Dict[str, Any]) -> Optional[EmissionTicket]:
+        """
+        Entrega uma janela a todos os sinks registrados, sem bloquear.
+
+        :return: O `EmissionTicket` da janela, ou None se a serialização falhar.
+        """
+        data = None
+        if any(w.sink.needs_bytes for w in self._workers):
+            try:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            except Exception as e:
+                logging.error("Falha ao serializar o payload para JSON: %s", e)
+                return None
+
+        ticket = EmissionTicket([w.sink.name for w in self._workers])
+        if self.on_complete:
+            ticket.add_done_callback(self.on_complete)
+        for w in self._workers:
+            if not w.submit(payload, data, ticket):
+                ticket.rejected = True
+                logging.warning("Fila do sink %s cheia. Janela descartada para este destino.", w.sink.name)
+        return ticket
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores acumulados por sink (enviadas, falhas, descartes, retentativas, última latência)."""
+        return {
+            w.sink.name: {
+                "sent": w.sent, "failed": w.failed, "dropped": w.dropped,
+                "retries": getattr(w.sink, "retries_total", 0),
+                "last_latency_s": w.last_latency_s, "pending": w._queue.qsize()
+            }
+            for w in self._workers
+        }
+
+    def close(self, timeout: Optional[float] = None):
+        """Encerra todos os sinks após entregar as janelas pendentes."""
+        for w in self._workers:
+            w.stop(timeout)
+        self._workers.clear()
+
+# --- SEÇÃO 4: FUNÇÕES PRIVADAS (AUXILIARES) ---
 
-def _post_with_retry(url: str, data: bytes, timeout: float, retries: int) -> bool:
+def _post_with_retry(url: str, data: bytes, timeout: float, retries: int,
+                     on_retry: Optional[Callable[[], None]] = None) -> bool:
     """Tenta enviar dados via POST, com lógica de retry e backoff exponencial."""
     req = request.Request(url, data=data, headers={"Content-Type": "application/json"}, method="POST")
     attempt = 0
@@ -85,6 +337,8 @@ def _post_with_retry(url: str, data: bytes, timeout: float, retries: int) -> boo
             sleep_s = INITIAL_BACKOFF_S * (2 ** (attempt - 1))
             logging.warning("POST para %s falhou (%s). Tentando novamente em %.1fs (%d/%d)...",
                             url, e, sleep_s, attempt, retries)
+            if on_retry:
+                on_retry()
             time.sleep(sleep_s)
 
 def _write_to_file(path: str, data: bytes, append: bool, is_secondary_output: bool) -> bool:
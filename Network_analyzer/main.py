@@ -24,8 +24,16 @@ from cli import parse_args
 from Logging import setup_logging
 from Aggregator import Aggregator
 from captura import Sniffer
-from emissao import emit_json
-from util import validate_url, anon_hasher, hostname, now_ts
+from emissao import emit_window, SinkRegistry, EmissionTicket, PostSink, StdoutSink
+from sinks import FileSink
+from transporte import UnixSocketSink, UdpSink, parse_host_port
+from memoria_compartilhada import ShmRingWriter, ShmRingSink
+from agendador import WindowScheduler, MIN_PERIOD_S
+from metricas import ProducerMetrics, MetricsServer
+from perfil import Profiler, report_path_for
+from sintetico import SyntheticTraffic, DEFAULT_SERVER_IP
+from prefixos import LocalAddresses
+from util import validate_url, anon_hasher, hostname
 
 
 # --- SEÇÃO 1: FUNÇÕES AUXILIARES DE INICIALIZAÇÃO E EXECUÇÃO ---
@@ -34,12 +42,35 @@ def _initialize_and_validate(args: "argparse.Namespace") -> "Callable | None":
     """Configura logging, valida argumentos e prepara a função de anonimização."""
     setup_logging(args.log_level, args.log_file)
 
-    if args.interval < 1.0:
-        logging.warning("--interval muito baixo (%.2fs). Ajustando para 1.0s.", args.interval)
-        args.interval = 1.0
+    if args.interval < MIN_PERIOD_S:
+        logging.warning("--interval muito baixo (%.3fs). Ajustando para %.1fs.", args.interval, MIN_PERIOD_S)
+        args.interval = MIN_PERIOD_S
 
-    if args.post and not validate_url(args.post):
-        logging.error("URL inválida para --post: %r", args.post)
+    if args.emit_interval is None:
+        args.emit_interval = args.interval
+    elif args.emit_interval < args.interval:
+        logging.warning("--emit-interval (%.3fs) menor que a janela. Ajustando para %.3fs.",
+                        args.emit_interval, args.interval)
+        args.emit_interval = args.interval
+
+    for url in args.post or []:
+        if not validate_url(url):
+            logging.error("URL inválida para --post: %r", url)
+            sys.exit(2)
+
+    if args.udp:
+        try:
+            parse_host_port(args.udp)
+        except ValueError as e:
+            logging.error("Endereço inválido para --udp: %s", e)
+            sys.exit(2)
+
+    # `--server-ip` aceita repetição e listas separadas por vírgula (IPs e prefixos CIDR).
+    args.server_ip = [e.strip() for item in args.server_ip or [] for e in item.split(",") if e.strip()]
+    try:
+        LocalAddresses(args.server_ip)
+    except ValueError as e:
+        logging.error("Valor inválido para --server-ip: %s", e)
         sys.exit(2)
 
     if args.no_capture and not args.mock and not args.pcap:
@@ -64,40 +95,110 @@ def _setup_shutdown_handler() -> threading.Event:
     signal.signal(signal.SIGTERM, _handle_signal)
     return stop_event
 
-def _run_main_loop(args: "argparse.Namespace", aggr: Aggregator, stop_event: threading.Event):
+def _create_file_sink(args: "argparse.Namespace", path: str) -> FileSink:
+    """Cria um sink de arquivo persistente a partir dos argumentos da CLI."""
+    return FileSink(
+        path,
+        append=bool(args.file_append),
+        buffer_bytes=max(0, args.file_buffer_kb) * 1024,
+        rotate_bytes=int(max(0.0, args.file_rotate_mb) * 1024 * 1024),
+        rotate_interval_s=max(0.0, args.file_rotate_interval),
+        compress=args.file_compress,
+        fsync=args.file_fsync,
+        fsync_every=max(1, args.file_fsync_every),
+        fsync_interval_s=max(0.0, args.file_fsync_interval)
+    )
+
+def _log_emission_result(ticket: EmissionTicket):
+    """Callback de conclusão: registra a latência e as falhas de cada sink."""
+    for result in ticket.results.values():
+        if result.ok:
+            logging.debug("Sink %s concluído em %.1fms.", result.name, result.latency_s * 1000)
+        else:
+            logging.warning("Falha na emissão para %s após %.1fms (%s).",
+                            result.name, result.latency_s * 1000, result.error or "erro reportado pelo sink")
+
+def _create_sink_registry(args: "argparse.Namespace", metrics: "ProducerMetrics | None" = None) -> SinkRegistry:
+    """Monta o registro de sinks (POST, arquivos, UDS/UDP, memória compartilhada e stdout) a partir da CLI."""
+    on_complete = _log_emission_result
+    if metrics is not None:
+        def on_complete(ticket: EmissionTicket):
+            metrics.observe_emission(ticket)
+            _log_emission_result(ticket)
+    registry = SinkRegistry(queue_size=max(1, args.sink_queue), on_complete=on_complete)
+    for url in args.post or []:
+        registry.register(PostSink(url, args.post_timeout, max(0, args.post_retries)))
+    for path in args.file or []:
+        registry.register(_create_file_sink(args, path))
+    if args.uds:
+        registry.register(UnixSocketSink(args.uds))
+    if args.udp:
+        registry.register(UdpSink(parse_host_port(args.udp)))
+    if args.shm:
+        writer = ShmRingWriter(args.shm, n_slots=args.shm_slots,
+                               max_clients=args.shm_max_clients, max_protos=args.shm_max_protos)
+        registry.register(ShmRingSink(writer))
+    if args.stdout or not registry.sinks:
+        registry.register(StdoutSink())
+    if metrics is not None:
+        metrics.track_sinks(registry)
+    return registry
+
+def _create_synthetic_traffic(args: "argparse.Namespace") -> SyntheticTraffic:
+    """Cria o gerador de tráfego sintético (`--mock`/`--mock-pcap`) a partir da CLI."""
+    try:
+        return SyntheticTraffic(
+            n_clients=args.mock_clients,
+            zipf_s=max(0.0, args.mock_zipf),
+            proto_mix=args.mock_proto_mix,
+            sizes=args.mock_sizes,
+            rate_pps=args.mock_rate,
+            scan_interval_s=args.mock_scan_interval,
+            flood_interval_s=args.mock_flood_interval,
+            server_ip=next((e for e in args.server_ip if "/" not in e and ":" not in e), DEFAULT_SERVER_IP),
+            seed=args.mock_seed
+        )
+    except ValueError as e:
+        logging.error("Configuração inválida do tráfego sintético: %s", e)
+        sys.exit(2)
+
+def _run_main_loop(args: "argparse.Namespace", aggr: Aggregator, stop_event: threading.Event,
+                   registry: SinkRegistry):
     """Executa o loop principal de agregação e emissão de dados."""
     logging.info("Iniciando loop principal. Pressione Ctrl+C para sair.")
-    meta = {"host": hostname(), "iface": args.iface, "server_ip": args.server_ip}
+    meta = {
+        "host": hostname(),
+        "iface": ",".join(args.iface) if args.iface else None,
+        "server_ip": ",".join(args.server_ip) if args.server_ip else None
+    }
+
+    # Os ticks caem nas fronteiras de `--emit-interval` no relógio de parede; cada
+    # tick emite todas as janelas de `--interval` encerradas desde o anterior.
+    scheduler = WindowScheduler(args.emit_interval)
 
     while not stop_event.is_set():
         # A espera é a primeira ação do loop para dar tempo de capturar o primeiro lote de dados.
-        stop_event.wait(timeout=args.interval)
-        if stop_event.is_set():
+        tick = scheduler.wait(stop_event)
+        if tick is None:
             break
 
-        if args.mock:
-            # Injeta dados de teste, se o modo mock estiver ativo.
-            now = now_ts()
-            aggr.add(now, "10.0.0.2", "in", 1500, "HTTP")
-            aggr.add(now, "10.0.0.3", "in", 400, "HTTPS")
-
-        # [CORREÇÃO CRÍTICA] Usa o método que pega o snapshot E avança a janela.
-        payload = aggr.get_snapshot_and_roll_window(meta)
-        if not payload["clients"] and not args.mock:
+        # Encerra e coleta as janelas que terminaram até a fronteira deste tick.
+        payloads = aggr.collect_closed_windows(tick, meta)
+        if not payloads:
             logging.debug("Nenhum cliente na janela. Pulando emissão.")
             continue
 
-        logging.info("Emitindo janela de %ds com %d clientes.", aggr.window_s, payload["n_clients"])
-        rc = emit_json(
-            payload,
-            to_file=args.file,
-            post_url=args.post,
-            post_timeout=args.post_timeout,
-            post_retries=max(0, args.post_retries),
-            file_append=bool(args.file and args.file_append)
-        )
-        if rc != 0:
-            logging.warning("Falha na emissão da janela (rc=%d). Continuando.", rc)
+        for payload in payloads:
+            logging.info("Emitindo janela de %gs com %d clientes.", aggr.window_s, payload["n_clients"])
+            # O registro entrega a janela a cada sink na sua própria thread; o resultado
+            # de cada destino é reportado por `_log_emission_result`.
+            rc = emit_window(payload, registry)
+            if rc != 0:
+                logging.warning("Janela não aceita por todos os destinos (rc=%d). Continuando.", rc)
+
+        if scheduler.missed:
+            logging.warning("Loop principal atrasado: %d tick(s) pulado(s) até agora.", scheduler.missed)
+            scheduler.missed = 0
 
 
 # --- SEÇÃO 2: FUNÇÃO PRINCIPAL (MAIN) ---
@@ -105,26 +206,49 @@ def _run_main_loop(args: "argparse.Namespace", aggr: Aggregator, stop_event: thr
 def main() -> int:
     """Função principal que orquestra a execução da aplicação."""
     sniffer = None
+    registry = None
+    metrics_server = None
+    profiler = None
     try:
         # 1. Preparação
         args = parse_args()
         anon_func = _initialize_and_validate(args)
         stop_event = _setup_shutdown_handler()
 
+        if args.mock_pcap:
+            # Modo de geração de entrada: grava o pcap sintético e encerra.
+            written = _create_synthetic_traffic(args).write_pcap(args.mock_pcap, max(1, args.mock_packets))
+            logging.info("%d pacotes sintéticos gravados em %s.", written, args.mock_pcap)
+            return 0
+
         # 2. Criação dos Objetos Principais
+        metrics = ProducerMetrics() if args.metrics_port else None
         aggr = Aggregator(
-            window_s=int(args.interval),
+            window_s=args.interval,
             max_clients=max(0, args.max_clients),
-            anon=anon_func
+            anon=anon_func,
+            metrics=metrics
         )
+        if metrics is not None:
+            metrics_server = MetricsServer(metrics.registry, args.metrics_port, args.metrics_host)
+            metrics_server.start()
 
         # 3. Início dos Processos em Background
+        if args.profile:
+            profiler = Profiler(report_path_for(args.file[0] if args.file else None),
+                                report_interval_s=args.profile_interval)
+            profiler.start()
         if not args.no_capture:
-            sniffer = Sniffer(aggr, server_ip=args.server_ip, iface=args.iface, bpf=args.bpf, pcap=args.pcap)
+            sniffer = Sniffer(aggr, server_ip=args.server_ip, iface=args.iface, bpf=args.bpf, pcap=args.pcap,
+                              metrics=metrics)
             sniffer.start()
+        if args.mock:
+            generator = _create_synthetic_traffic(args)
+            threading.Thread(target=generator.drive, args=(aggr, stop_event), name="mock", daemon=True).start()
 
         # 4. Execução do Loop Principal
-        _run_main_loop(args, aggr, stop_event)
+        registry = _create_sink_registry(args, metrics)
+        _run_main_loop(args, aggr, stop_event, registry)
 
     except Exception as e:
         logging.critical("Erro não tratado no fluxo principal: %s", e, exc_info=True)
@@ -134,6 +258,13 @@ def main() -> int:
         if sniffer:
             logging.info("Parando a captura de pacotes...")
             sniffer.stop()
+        if registry:
+            logging.info("Aguardando os destinos de emissão finalizarem...")
+            registry.close(timeout=max(1.0, args.post_timeout))
+        if metrics_server:
+            metrics_server.stop()
+        if profiler:
+            profiler.stop()
 
     logging.info("Programa encerrado.")
     return 0
@@ -0,0 +1,195 @@
+# =====================================================================================
+# MÓDULO DE TRANSPORTE POR MEMÓRIA COMPARTILHADA (RING BUFFER SPSC)
+# Versão: 1.0.0
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece um anel de registros de janela com layout fixo,
+#            mapeado em memória (mmap) e compartilhado entre o produtor e o
+#            backend na mesma máquina. O produtor escreve os campos diretamente
+#            no mapeamento com `struct.pack_into`; o backend os lê no lugar com
+#            `struct.unpack_from`, sem JSON, HTTP ou validação intermediários.
+#
+#            LAYOUT (little-endian; deve coincidir com BackEnd_RESTful/transporte_local.py):
+#              Cabeçalho (64 bytes): magic, versão, n_slots, slot_size,
+#                max_clients, max_protos, write_seq (offset 32), read_seq (offset 40).
+#              Slot: cabeçalho do registro + max_clients entradas de cliente
+#                + max_protos entradas de protocolo. O campo `seq` do slot é
+#                escrito por último e só então `write_seq` é avançado.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import os
+import mmap
+import struct
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from sinks import Sink
+
+# --- SEÇÃO 1: CONSTANTES DE LAYOUT ---
+RING_MAGIC = b"NVRING01"
+RING_VERSION = 1
+RING_HEADER = struct.Struct("<8sIIIIII")      # magic, versão, n_slots, slot_size, max_clients, max_protos, reservado
+RING_HEADER_SIZE = 64
+WRITE_SEQ_OFFSET = 32
+READ_SEQ_OFFSET = 40
+SEQ = struct.Struct("<Q")
+
+# seq, window_start, window_end, total_in, total_out, pkt_count, byte_count,
+# n_clients, n_protos, host, iface
+RECORD_HEADER = struct.Struct("<QddQQQQII64s32s")
+CLIENT_ENTRY = struct.Struct("<48sQQII")      # ip, in, out, índice do 1º protocolo, nº de protocolos
+PROTO_ENTRY = struct.Struct("<24sQQ")         # nome, in, out
+
+DEFAULT_RING_SLOTS = 8
+DEFAULT_RING_MAX_CLIENTS = 4096
+DEFAULT_RING_MAX_PROTOS = 16384
+
+# --- SEÇÃO 2: FUNÇÕES AUXILIARES DE LAYOUT ---
+
+def slot_size(max_clients: int, max_protos: int) -> int:
+    """Calcula o tamanho de um slot, alinhado a 64 bytes."""
+    raw = RECORD_HEADER.size + max_clients * CLIENT_ENTRY.size + max_protos * PROTO_ENTRY.size
+    return (raw + 63) & ~63
+
+def _encode(text: Optional[str], size: int) -> bytes:
+    """Codifica uma string em UTF-8 truncada ao tamanho do campo."""
+    return (text or "").encode("utf-8")[:size]
+
+# --- SEÇÃO 3: ESCRITOR DO ANEL (PRODUTOR) ---
+
+class ShmRingWriter:
+    """
+    Lado produtor de um anel single-producer/single-consumer em memória compartilhada.
+
+    O produtor nunca bloqueia: se o consumidor não tiver liberado um slot, a
+    janela é descartada e contabilizada em `dropped`.
+    """
+
+    def __init__(self, path: str, n_slots: int = DEFAULT_RING_SLOTS,
+                 max_clients: int = DEFAULT_RING_MAX_CLIENTS,
+                 max_protos: int = DEFAULT_RING_MAX_PROTOS):
+        """
+        Cria (ou recria) o arquivo do anel e o mapeia em memória.
+
+        :param path: Caminho do arquivo do anel (ex: "/dev/shm/netvision.ring").
+        :param n_slots: Número de janelas que podem aguardar o consumidor.
+        :param max_clients: Capacidade de clientes por janela.
+        :param max_protos: Capacidade total de pares cliente×protocolo por janela.
+        """
+        self.path = path
+        self.n_slots = max(1, n_slots)
+        self.max_clients = max(1, max_clients)
+        self.max_protos = max(1, max_protos)
+        self.slot_size = slot_size(self.max_clients, self.max_protos)
+        self.dropped = 0
+        self.truncated = 0
+        self._write_seq = 0
+        self._lock = threading.Lock()
+
+        total = RING_HEADER_SIZE + self.n_slots * self.slot_size
+        # Um arquivo novo (novo inode) sinaliza ao consumidor que deve remapear.
+        tmp_path = path + ".init"
+        with open(tmp_path, "wb") as f:
+            f.truncate(total)
+        os.replace(tmp_path, path)
+        self._fd = os.open(path, os.O_RDWR)
+        self._mm = mmap.mmap(self._fd, total)
+        RING_HEADER.pack_into(self._mm, 0, RING_MAGIC, RING_VERSION, self.n_slots,
+                              self.slot_size, self.max_clients, self.max_protos, 0)
+        self._notify_path = path + ".notify"
+        self._notify_fd: Optional[int] = None
+
+    def write(self, payload: Dict[str, Any]) -> bool:
+        """
+        Escreve uma janela diretamente no próximo slot livre do anel.
+
+        :return: True se a janela foi publicada, False se o anel estiver cheio.
+        """
+        with self._lock:
+            mm = self._mm
+            read_seq = SEQ.unpack_from(mm, READ_SEQ_OFFSET)[0]
+            seq = self._write_seq
+            if seq - read_seq >= self.n_slots:
+                self.dropped += 1
+                return False
+
+            base = RING_HEADER_SIZE + (seq % self.n_slots) * self.slot_size
+            entry_off = base + RECORD_HEADER.size
+            proto_base = entry_off + self.max_clients * CLIENT_ENTRY.size
+            n_clients = n_protos = 0
+
+            for ip, c in payload["clients"].items():
+                protocols = c["protocols"]
+                if n_clients >= self.max_clients or n_protos + len(protocols) > self.max_protos:
+                    self.truncated += 1
+                    logging.warning("Janela excede a capacidade do anel (%d clientes). Use --max-clients "
+                                    "ou aumente --shm-max-clients/--shm-max-protos.", len(payload["clients"]))
+                    break
+                CLIENT_ENTRY.pack_into(mm, entry_off, _encode(ip, 48), c["in_bytes"], c["out_bytes"],
+                                       n_protos, len(protocols))
+                entry_off += CLIENT_ENTRY.size
+                for name, pv in protocols.items():
+                    PROTO_ENTRY.pack_into(mm, proto_base + n_protos * PROTO_ENTRY.size,
+                                          _encode(name, 24), pv["in"], pv["out"])
+                    n_protos += 1
+                n_clients += 1
+
+            # O `seq` do slot é gravado com zero e só recebe o valor final no fim,
+            # depois de todos os campos; então `write_seq` publica o slot.
+            RECORD_HEADER.pack_into(
+                mm, base, 0, float(payload["window_start"]), float(payload["window_end"]),
+                payload["total_in"], payload["total_out"], payload["pkt_count"], payload["byte_count"],
+                n_clients, n_protos, _encode(payload.get("host"), 64), _encode(payload.get("iface"), 32)
+            )
+            SEQ.pack_into(mm, base, seq + 1)
+            self._write_seq = seq + 1
+            SEQ.pack_into(mm, WRITE_SEQ_OFFSET, self._write_seq)
+
+        self._notify()
+        return True
+
+    def close(self):
+        """Desfaz o mapeamento. O arquivo permanece para o consumidor drenar."""
+        with self._lock:
+            self._mm.close()
+            os.close(self._fd)
+            if self._notify_fd is not None:
+                os.close(self._notify_fd)
+                self._notify_fd = None
+
+    def _notify(self):
+        """Acorda o consumidor pelo FIFO de notificação, se ele estiver escutando."""
+        try:
+            if self._notify_fd is None:
+                self._notify_fd = os.open(self._notify_path, os.O_WRONLY | os.O_NONBLOCK)
+            os.write(self._notify_fd, b"\x01")
+        except BlockingIOError:
+            pass  # O FIFO já tem notificações pendentes; o consumidor vai acordar.
+        except OSError:
+            # Sem consumidor escutando (ENXIO/ENOENT) ou ele saiu (EPIPE): tenta de novo depois.
+            if self._notify_fd is not None:
+                os.close(self._notify_fd)
+                self._notify_fd = None
+
+# --- SEÇÃO 4: SINK DO REGISTRO DE EMISSÃO ---
+
+class ShmRingSink(Sink):
+    """Sink que publica cada janela no anel de memória compartilhada (sem serialização JSON)."""
+
+    needs_bytes = False
+
+    def __init__(self, writer: ShmRingWriter):
+        super().__init__(f"shm:{writer.path}")
+        self.writer = writer
+
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        if self.writer.write(payload):
+            return True
+        logging.warning("Anel de memória compartilhada cheio. Janela descartada (total: %d).",
+                        self.writer.dropped)
+        return False
+
+    def close(self):
+        self.writer.close()
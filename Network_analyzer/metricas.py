@@ -0,0 +1,254 @@
+# =====================================================================================
+# MÓDULO DE MÉTRICAS INTERNAS DO PRODUTOR (INSTRUMENTAÇÃO)
+# Versão: 1.0.0
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece contadores, gauges e histogramas leves para medir
+#            cada estágio do produtor (callback de pacotes, lock do Aggregator,
+#            formatação do payload, sinks de emissão) e um endpoint HTTP local
+#            opcional que os expõe no formato texto do Prometheus.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import os
+import bisect
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Tuple, Optional, Callable, Sequence
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+# Buckets (em segundos) para latências de microssegundos a segundos.
+LATENCY_BUCKETS_S = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+LabelValues = Tuple[str, ...]
+
+# --- SEÇÃO 2: TIPOS DE MÉTRICA ---
+
+class _Metric:
+    """Base comum: nome, descrição, nomes de labels e lock interno."""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def _fmt_labels(self, values: LabelValues, extra: str = "") -> str:
+        parts = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+class Counter(_Metric):
+    """Contador monotônico."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def set_total(self, total: float, *label_values: str):
+        """Define o total acumulado (para contadores mantidos por outro componente)."""
+        with self._lock:
+            self._values[label_values] = float(total)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{self._fmt_labels(k)} {_num(v)}" for k, v in items]
+
+class Gauge(Counter):
+    """Valor instantâneo que pode subir ou descer."""
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str):
+        with self._lock:
+            self._values[label_values] = float(value)
+
+class Histogram(_Metric):
+    """Histograma com buckets cumulativos no estilo Prometheus."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS_S):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Por conjunto de labels: [contagens por bucket (+Inf no fim), soma, contagem].
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        lines = self._header()
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{self._fmt_labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._fmt_labels(labels)} {_num(total)}")
+            lines.append(f"{self.name}_count{self._fmt_labels(labels)} {count}")
+        return lines
+
+# --- SEÇÃO 3: REGISTRO E MÉTRICAS DO PRODUTOR ---
+
+class MetricsRegistry:
+    """Coleção de métricas com coletores executados a cada leitura (scrape)."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS_S) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, fn: Callable[[], None]):
+        """Registra uma função que atualiza gauges imediatamente antes de cada leitura."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        """Gera o texto de exposição no formato do Prometheus."""
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception as e:
+                logging.debug("Falha no coletor de métricas: %s", e)
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+class ProducerMetrics:
+    """
+    Métricas de cada estágio do pipeline do produtor.
+
+    Os componentes recebem esta instância opcionalmente; quando ela é None, o
+    caminho quente não faz nenhuma medição.
+    """
+
+    def __init__(self):
+        r = self.registry = MetricsRegistry()
+        self.packets = r.counter("netvision_packets_total", "Pacotes processados pelo callback de captura.")
+        self.packet_errors = r.counter("netvision_packet_errors_total", "Pacotes descartados por erro de decodificação.")
+        self.packets_per_second = r.gauge("netvision_packets_per_second", "Taxa de pacotes da última janela encerrada.")
+        self.callback_latency = r.histogram("netvision_packet_callback_seconds", "Latência de `_packet_callback`.")
+        self.lock_wait = r.histogram("netvision_aggregator_lock_wait_seconds", "Tempo de espera pelo `Aggregator.lock`.")
+        self.lock_hold = r.histogram("netvision_aggregator_lock_hold_seconds", "Tempo com o `Aggregator.lock` retido.")
+        self.format_duration = r.histogram("netvision_format_payload_seconds", "Duração de `_format_payload` por janela.")
+        self.window_clients = r.gauge("netvision_window_clients", "Clientes na última janela encerrada.")
+        self.window_memory = r.gauge("netvision_window_memory_bytes", "Memória estimada das estruturas da última janela.")
+        self.emit_latency = r.histogram("netvision_emit_seconds", "Latência de entrega por sink.", labels=("sink",))
+        self.emit_failures = r.counter("netvision_emit_failures_total", "Entregas que falharam por sink.", labels=("sink",))
+        self.emit_retries = r.counter("netvision_emit_retries_total", "Retentativas acumuladas por sink.", labels=("sink",))
+        self.emit_dropped = r.counter("netvision_emit_dropped_total", "Janelas descartadas por fila cheia, por sink.", labels=("sink",))
+        self.rss = r.gauge("netvision_process_resident_memory_bytes", "Memória residente do processo.")
+        r.add_collector(self._collect_rss)
+
+    def observe_window(self, window_s: float, pkt_count: int, n_clients: int, memory_bytes: int):
+        """Registra as métricas de uma janela recém-encerrada."""
+        self.packets_per_second.set(pkt_count / window_s if window_s else 0.0)
+        self.window_clients.set(n_clients)
+        self.window_memory.set(memory_bytes)
+
+    def observe_emission(self, ticket) -> None:
+        """Callback de conclusão do `SinkRegistry`: latência e falhas por sink."""
+        for result in ticket.results.values():
+            self.emit_latency.observe(result.latency_s, result.name)
+            if not result.ok:
+                self.emit_failures.inc(1, result.name)
+
+    def track_sinks(self, sink_registry) -> None:
+        """Expõe os contadores mantidos pelo `SinkRegistry` (retentativas e descartes)."""
+        def _collect():
+            for name, st in sink_registry.stats().items():
+                self.emit_retries.set_total(st.get("retries", 0), name)
+                self.emit_dropped.set_total(st["dropped"], name)
+        self.registry.add_collector(_collect)
+
+    def _collect_rss(self):
+        try:
+            with open("/proc/self/statm") as f:
+                pages = int(f.read().split()[1])
+            self.rss.set(pages * os.sysconf("SC_PAGE_SIZE"))
+        except (OSError, ValueError, IndexError, AttributeError):
+            pass  # Sem /proc (ex: Windows, macOS): a métrica simplesmente não é exposta.
+
+# --- SEÇÃO 4: SERVIDOR HTTP DE MÉTRICAS ---
+
+class MetricsServer:
+    """Servidor HTTP local (thread daemon) que responde `GET /metrics`."""
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = DEFAULT_METRICS_HOST):
+        registry_ref = registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                logging.debug("Métricas: " + fmt, *args)
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        logging.info("Endpoint de métricas ativo em http://%s:%d/metrics", *self._server.server_address[:2])
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+# --- SEÇÃO 5: FUNÇÕES PRIVADAS (AUXILIARES) ---
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,240 @@
+# =====================================================================================
+# MÓDULO DE PERFILAMENTO EMBUTIDO (--profile)
+# Versão: 1.0.0
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece o `Profiler`, um perfilador por amostragem que roda
+#            dentro do produtor. Uma thread inspeciona periodicamente as pilhas de
+#            todas as threads (`sys._current_frames`) e atribui cada amostra a um
+#            estágio do pipeline (decode, classify, aggregate, format, serialize,
+#            send). Em paralelo, o `tracemalloc` registra as alocações. A cada
+#            período, um relatório em NDJSON é anexado ao disco.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+STAGES = ("decode", "classify", "aggregate", "format", "serialize", "send")
+DEFAULT_SAMPLE_INTERVAL_S = 0.01    # 100 amostras por segundo.
+DEFAULT_REPORT_INTERVAL_S = 60.0
+DEFAULT_TOP_N = 10
+DEFAULT_REPORT_NAME = "netvision.profile.ndjson"
+
+# Funções que delimitam cada estágio, indexadas por (arquivo, função). A pilha é
+# percorrida do quadro mais interno para o mais externo e o primeiro quadro
+# conhecido define o estágio; assim, `friendly_proto` chamado dentro do callback
+# conta como "classify" e o restante do callback (Scapy incluso) como "decode".
+STAGE_FUNCTIONS: Dict[Tuple[str, str], str] = {
+    ("captura.py", "_process_packet"): "decode",
+    ("util.py", "friendly_proto"): "classify",
+    ("Aggregator.py", "add"): "aggregate",
+    ("Aggregator.py", "_add_locked"): "aggregate",
+    ("Aggregator.py", "_format_window"): "format",
+    ("Aggregator.py", "_build_payload"): "format",
+    ("emissao.py", "submit"): "serialize",
+    ("emissao.py", "emit_json"): "serialize",
+    ("emissao.py", "emit_window"): "serialize",
+    ("emissao.py", "send"): "send",
+    ("emissao.py", "_post_with_retry"): "send",
+    ("sinks.py", "send"): "send",
+    ("transporte.py", "send"): "send",
+    ("memoria_compartilhada.py", "send"): "send",
+}
+
+# --- SEÇÃO 2: DEFINIÇÃO DA CLASSE PRINCIPAL ---
+
+class Profiler:
+    """
+    Perfilador por amostragem com atribuição por estágio e snapshots do `tracemalloc`.
+
+    As amostras medem tempo de relógio dentro de cada estágio (inclusive esperas de
+    I/O em "send"), não apenas CPU. Nenhum código do caminho quente é alterado.
+    """
+
+    def __init__(self, report_path: str, report_interval_s: float = DEFAULT_REPORT_INTERVAL_S,
+                 sample_interval_s: float = DEFAULT_SAMPLE_INTERVAL_S, top_n: int = DEFAULT_TOP_N):
+        """
+        :param report_path: Arquivo NDJSON onde os relatórios periódicos são anexados.
+        :param report_interval_s: Intervalo entre relatórios em segundos.
+        :param sample_interval_s: Intervalo entre amostras das pilhas em segundos.
+        :param top_n: Quantidade de funções e linhas de alocação listadas por relatório.
+        """
+        self.report_path = report_path
+        self.report_interval_s = max(1.0, report_interval_s)
+        self.sample_interval_s = max(0.001, sample_interval_s)
+        self.top_n = top_n
+
+        self._lock = threading.Lock()
+        self._samples = 0
+        self._stage_samples: Counter = Counter()
+        self._stage_functions: Dict[str, Counter] = {stage: Counter() for stage in STAGES}
+        self._period_start = time.time()
+        self._last_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- MÉTODOS PÚBLICOS (CICLO DE VIDA) ---
+
+    def start(self):
+        """Inicia o `tracemalloc` e a thread de amostragem e relatórios."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        self._last_snapshot = tracemalloc.take_snapshot()
+        self._period_start = time.time()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        logging.info("Perfilamento ativo. Relatórios a cada %.0fs em %s.", self.report_interval_s, self.report_path)
+
+    def stop(self):
+        """Encerra a amostragem e grava um relatório final com o período parcial."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.write_report()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    def sample_once(self):
+        """Captura uma amostra das pilhas de todas as threads, exceto a do próprio perfilador."""
+        own = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stage, where = _classify_stack(frame)
+                if stage is None:
+                    continue  # Thread ociosa ou fora do pipeline.
+                self._samples += 1
+                self._stage_samples[stage] += 1
+                self._stage_functions[stage][where] += 1
+
+    def build_report(self) -> Dict[str, Any]:
+        """Gera o relatório do período atual e zera os contadores de amostragem."""
+        now = time.time()
+        with self._lock:
+            samples = self._samples
+            stage_samples = self._stage_samples
+            stage_functions = self._stage_functions
+            period_start = self._period_start
+            self._samples = 0
+            self._stage_samples = Counter()
+            self._stage_functions = {stage: Counter() for stage in STAGES}
+            self._period_start = now
+
+        stages = {}
+        for stage in STAGES:
+            n = stage_samples.get(stage, 0)
+            stages[stage] = {
+                "samples": n,
+                "seconds": round(n * self.sample_interval_s, 6),
+                "share": round(n / samples, 4) if samples else 0.0,
+                "top_functions": [[where, c] for where, c in stage_functions[stage].most_common(self.top_n)],
+            }
+
+        return {
+            "ts": now,
+            "period_s": round(now - period_start, 3),
+            "sample_interval_s": self.sample_interval_s,
+            "samples": samples,
+            "stages": stages,
+            "memory": self._memory_report(),
+        }
+
+    def write_report(self) -> Optional[Dict[str, Any]]:
+        """Anexa o relatório do período ao arquivo NDJSON e registra um resumo no log."""
+        report = self.build_report()
+        try:
+            with open(self.report_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report, ensure_ascii=False))
+                f.write("\n")
+        except OSError as e:
+            logging.error("Falha ao gravar o relatório de perfilamento em %s: %s", self.report_path, e)
+            return None
+
+        summary = ", ".join(f"{s}={report['stages'][s]['share']:.0%}" for s in STAGES)
+        logging.info("Perfil (%d amostras em %.0fs): %s; memória rastreada %.1f MiB.",
+                     report["samples"], report["period_s"], summary,
+                     report["memory"]["current_bytes"] / (1024 * 1024))
+        return report
+
+    # --- MÉTODOS PRIVADOS (LÓGICA INTERNA) ---
+
+    def _run(self):
+        """Laço da thread: amostra as pilhas e grava um relatório a cada período."""
+        next_report = time.monotonic() + self.report_interval_s
+        while not self._stop_event.wait(self.sample_interval_s):
+            try:
+                self.sample_once()
+                if time.monotonic() >= next_report:
+                    next_report += self.report_interval_s
+                    self.write_report()
+            except Exception as e:
+                logging.debug("Falha na amostragem do perfilador: %s", e)
+
+    def _memory_report(self) -> Dict[str, Any]:
+        """Compara o snapshot do `tracemalloc` com o do período anterior."""
+        if not tracemalloc.is_tracing():
+            return {"current_bytes": 0, "peak_bytes": 0, "top_allocations": []}
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        if self._last_snapshot is not None:
+            stats = snapshot.compare_to(self._last_snapshot, "lineno")
+        else:
+            stats = snapshot.statistics("lineno")
+        self._last_snapshot = snapshot
+
+        top = []
+        for stat in stats[:self.top_n]:
+            frame = stat.traceback[0]
+            top.append({
+                "where": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                "size_bytes": stat.size,
+                "size_diff_bytes": getattr(stat, "size_diff", stat.size),
+                "count": stat.count,
+            })
+        return {"current_bytes": current, "peak_bytes": peak, "top_allocations": top}
+
+# --- SEÇÃO 3: FUNÇÕES PÚBLICAS (AUXILIARES) ---
+
+def report_path_for(ndjson_path: Optional[str]) -> str:
+    """
+    Define onde gravar os relatórios: ao lado da saída NDJSON (ex: "out.ndjson" ->
+    "out.profile.ndjson") ou, sem arquivo de saída, no diretório atual.
+    """
+    if not ndjson_path:
+        return os.path.abspath(DEFAULT_REPORT_NAME)
+    return os.path.splitext(ndjson_path)[0] + ".profile.ndjson"
+
+# --- SEÇÃO 4: FUNÇÕES PRIVADAS (AUXILIARES) ---
+
+def _classify_stack(frame) -> Tuple[Optional[str], str]:
+    """
+    Percorre a pilha a partir do quadro mais interno e retorna o estágio do
+    primeiro quadro conhecido, junto com a função mais interna ("arquivo:função").
+    """
+    code = frame.f_code
+    where = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+    while frame is not None:
+        code = frame.f_code
+        stage = STAGE_FUNCTIONS.get((os.path.basename(code.co_filename), code.co_name))
+        if stage is not None:
+            return stage, where
+        frame = frame.f_back
+    return None, where
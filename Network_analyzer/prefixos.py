@@ -0,0 +1,132 @@
+# =====================================================================================
+# MÓDULO DE ENDEREÇOS LOCAIS (PREFIXOS IPv4/IPv6)
+# Versão: 1.0.0
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece a classe `LocalAddresses`, que decide se um IP
+#            pertence ao host monitorado (VIPs, interfaces agregadas, endereços
+#            IPv6, sub-redes inteiras). É usada pelo `Sniffer` para definir a
+#            direção do tráfego (in/out) no caminho quente de cada pacote.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import socket
+import ipaddress
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+MAX_CACHE_ENTRIES = 65536  # Resultados de consulta memorizados antes de esvaziar o cache.
+
+# --- SEÇÃO 2: DEFINIÇÃO DA CLASSE PRINCIPAL ---
+
+class LocalAddresses:
+    """
+    Conjunto de endereços e prefixos locais com consulta de pertinência rápida.
+
+    Endereços exatos ficam num `set` de strings (caso mais comum: `--server-ip`
+    com IPs simples). Prefixos são guardados em tabelas hash por comprimento de
+    prefixo, por família; a consulta converte o IP em inteiro uma única vez e
+    testa `ip & máscara` em cada comprimento presente, do mais longo ao mais
+    curto. Como há poucos comprimentos distintos na prática, a busca custa
+    poucas operações de dicionário, e o resultado por IP é memorizado.
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        """
+        :param entries: IPs ou prefixos em notação CIDR (IPv4 ou IPv6), ex:
+                        "192.168.0.10", "10.20.0.0/16", "2001:db8::/32".
+        :raises ValueError: Se alguma entrada não for um IP ou prefixo válido.
+        """
+        self._exact: Set[str] = set()
+        # família -> lista de (comprimento, máscara, {rede inteira}) em ordem decrescente de comprimento.
+        self._tables: Dict[int, List[Tuple[int, int, Set[int]]]] = {4: [], 6: []}
+        self._networks: List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]] = []
+        self._cache: Dict[str, bool] = {}
+        for entry in entries:
+            self.add(entry)
+
+    # --- MÉTODOS PÚBLICOS (API DA CLASSE) ---
+
+    def add(self, entry: str):
+        """Adiciona um IP ou prefixo CIDR ao conjunto."""
+        try:
+            net = ipaddress.ip_network(entry.strip(), strict=False)
+        except ValueError as e:
+            raise ValueError(f"Endereço ou prefixo inválido: {entry!r} ({e})") from None
+
+        self._networks.append(net)
+        self._cache.clear()
+        if net.prefixlen == net.max_prefixlen:
+            # Endereço simples: a forma canônica cobre a comparação exata de strings.
+            self._exact.add(str(net.network_address))
+            return
+
+        table = self._tables[net.version]
+        for length, _, nets in table:
+            if length == net.prefixlen:
+                nets.add(int(net.network_address))
+                return
+        table.append((net.prefixlen, int(net.netmask), {int(net.network_address)}))
+        table.sort(key=lambda item: item[0], reverse=True)
+
+    def contains(self, ip: str) -> bool:
+        """Retorna True se `ip` for um endereço local ou pertencer a um prefixo local."""
+        if ip in self._exact:
+            return True
+        cached = self._cache.get(ip)
+        if cached is not None:
+            return cached
+
+        result = self._lookup(ip)
+        if len(self._cache) >= MAX_CACHE_ENTRIES:
+            self._cache.clear()
+        self._cache[ip] = result
+        return result
+
+    __contains__ = contains
+
+    @property
+    def networks(self) -> List[str]:
+        """Entradas configuradas, na forma canônica (para logs e metadados)."""
+        return [str(n.network_address) if n.prefixlen == n.max_prefixlen else str(n) for n in self._networks]
+
+    def bpf_filter(self) -> str:
+        """Gera um filtro BPF que captura apenas o tráfego dos endereços locais."""
+        parts = []
+        for net in self._networks:
+            if net.prefixlen == net.max_prefixlen:
+                parts.append(f"host {net.network_address}")
+            else:
+                parts.append(f"net {net}")
+        return " or ".join(parts)
+
+    def __bool__(self) -> bool:
+        return bool(self._networks)
+
+    def __len__(self) -> int:
+        return len(self._networks)
+
+    # --- MÉTODOS PRIVADOS (LÓGICA INTERNA) ---
+
+    def _lookup(self, ip: str) -> bool:
+        """Busca do prefixo mais longo nas tabelas da família do IP."""
+        if ":" in ip:
+            version, family = 6, socket.AF_INET6
+        else:
+            version, family = 4, socket.AF_INET
+        table = self._tables[version]
+        try:
+            packed = socket.inet_pton(family, ip)
+        except (OSError, ValueError):
+            return False
+        if version == 6 and self._exact:
+            # Grafias diferentes do mesmo IPv6 (zeros, maiúsculas) caem aqui.
+            if socket.inet_ntop(family, packed) in self._exact:
+                return True
+        if not table:
+            return False
+        value = int.from_bytes(packed, "big")
+        for _, mask, nets in table:
+            if value & mask in nets:
+                return True
+        return False
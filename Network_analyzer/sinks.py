@@ -0,0 +1,240 @@
+# =====================================================================================
+# MÓDULO DE DESTINOS DE EMISSÃO (SINKS)
+# Versão: 1.1.1 (Interface comum `Sink` para o registro de fan-out)
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo define a interface `Sink`, usada pelo registro de fan-out
+#            de `emissao.py`, e fornece destinos de longa duração. O `FileSink`
+#            mantém o arquivo NDJSON aberto entre janelas, escreve através de um
+#            buffer, rotaciona por tamanho ou tempo (com compressão opcional dos
+#            segmentos antigos) e substitui arquivos de snapshot de forma atômica.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import os
+import gzip
+import time
+import shutil
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, List, BinaryIO
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+DEFAULT_FILE_BUFFER_BYTES = 64 * 1024  # Buffer de escrita do arquivo NDJSON.
+FSYNC_POLICIES = ("never", "every-n", "interval")
+SNAPSHOT_TMP_SUFFIX = ".tmp"
+
+# --- SEÇÃO 2: INTERFACE BASE ---
+
+class Sink(ABC):
+    """
+    Interface mínima de um destino de emissão.
+
+    Cada sink recebe o payload original e, quando `needs_bytes` é True, o JSON já
+    serializado. Implementações devem retornar False em caso de falha em vez de
+    lançar exceções. Uma subclasse sem `send` falha já ao ser instanciada, e
+    não dentro da thread do registro.
+    """
+
+    needs_bytes = True
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        """Entrega uma janela ao destino. Retorna True em caso de sucesso."""
+
+    def close(self):
+        """Libera os recursos do destino. Por padrão, não faz nada."""
+
+# --- SEÇÃO 3: SINK DE ARQUIVO ---
+
+class FileSink(Sink):
+    """
+    Destino de arquivo de longa duração para os payloads serializados.
+
+    Em modo "append" (NDJSON) o arquivo permanece aberto e as escritas passam por
+    um buffer; em modo "snapshot" cada janela é escrita num arquivo temporário
+    que substitui o destino via `os.replace`, de modo que leitores nunca vejam
+    um arquivo truncado.
+    """
+
+    def __init__(self, path: str, append: bool = True,
+                 buffer_bytes: int = DEFAULT_FILE_BUFFER_BYTES,
+                 rotate_bytes: int = 0, rotate_interval_s: float = 0.0,
+                 compress: bool = False, fsync: str = "never",
+                 fsync_every: int = 1, fsync_interval_s: float = 1.0):
+        """
+        Inicializa o sink de arquivo.
+
+        :param path: Caminho do arquivo de destino.
+        :param append: Se True, anexa em formato NDJSON; senão, substitui o arquivo a cada janela.
+        :param buffer_bytes: Tamanho do buffer de escrita em bytes.
+        :param rotate_bytes: Rotaciona o arquivo ao atingir este tamanho (0 = desativado).
+        :param rotate_interval_s: Rotaciona o arquivo após este tempo em segundos (0 = desativado).
+        :param compress: Se True, comprime os segmentos rotacionados com gzip.
+        :param fsync: Política de fsync: "never", "every-n" ou "interval".
+        :param fsync_every: Número de escritas entre fsyncs na política "every-n".
+        :param fsync_interval_s: Intervalo mínimo em segundos entre fsyncs na política "interval".
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {fsync!r}")
+
+        super().__init__(f"file:{path}")
+        self.path = path
+        self.append = append
+        self.buffer_bytes = max(0, int(buffer_bytes))
+        self.rotate_bytes = max(0, int(rotate_bytes))
+        self.rotate_interval_s = max(0.0, float(rotate_interval_s))
+        self.compress = compress
+        self.fsync = fsync
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval_s = max(0.0, float(fsync_interval_s))
+
+        self._lock = threading.Lock()
+        self._fh: Optional[BinaryIO] = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._writes_since_sync = 0
+        self._last_sync = time.monotonic()
+        self._compressors: List[threading.Thread] = []
+
+    # --- MÉTODOS PÚBLICOS ---
+
+    def write(self, data: bytes) -> bool:
+        """
+        Escreve um payload serializado no destino.
+
+        :param data: O JSON já serializado em bytes.
+        :return: True em caso de sucesso, False se a escrita falhar.
+        """
+        try:
+            with self._lock:
+                if self.append:
+                    self._write_append(data)
+                else:
+                    self._write_snapshot(data)
+            return True
+        except Exception as e:
+            logging.error("Falha ao escrever no arquivo %s: %s", self.path, e)
+            return False
+
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        """Implementação de `Sink.send`: grava o JSON serializado no arquivo."""
+        return self.write(data)
+
+    def flush(self):
+        """Descarrega o buffer e aplica fsync, independentemente da política."""
+        with self._lock:
+            if self._fh:
+                self._sync(force=True)
+
+    def close(self):
+        """Descarrega o buffer, fecha o arquivo e aguarda compressões pendentes."""
+        with self._lock:
+            if self._fh:
+                try:
+                    self._sync(force=self.fsync != "never")
+                    self._fh.close()
+                except OSError as e:
+                    logging.error("Falha ao fechar o arquivo %s: %s", self.path, e)
+                self._fh = None
+        for t in self._compressors:
+            t.join()
+        self._compressors.clear()
+
+    # --- MÉTODOS PRIVADOS ---
+
+    def _write_append(self, data: bytes):
+        """Anexa uma linha NDJSON ao arquivo aberto, rotacionando quando necessário."""
+        if self._fh is None:
+            self._open()
+        elif self._should_rotate():
+            self._rotate()
+
+        self._fh.write(data)
+        self._fh.write(b"\n")
+        self._size += len(data) + 1
+        self._writes_since_sync += 1
+        self._maybe_sync()
+
+    def _write_snapshot(self, data: bytes):
+        """Escreve o snapshot num arquivo temporário e o move atomicamente para o destino."""
+        tmp_path = self.path + SNAPSHOT_TMP_SUFFIX
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if self.fsync != "never":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _open(self):
+        """Abre (ou reabre) o arquivo de destino em modo de apêndice."""
+        self._fh = open(self.path, "ab", buffering=self.buffer_bytes or -1)
+        self._size = self._fh.tell()
+        self._opened_at = time.monotonic()
+
+    def _should_rotate(self) -> bool:
+        """Verifica se o segmento atual atingiu o limite de tamanho ou de tempo."""
+        if self.rotate_bytes and self._size >= self.rotate_bytes:
+            return True
+        if self.rotate_interval_s and time.monotonic() - self._opened_at >= self.rotate_interval_s:
+            return True
+        return False
+
+    def _rotate(self):
+        """Fecha o segmento atual, renomeia-o com um sufixo de tempo e abre um novo."""
+        self._sync(force=self.fsync != "never")
+        self._fh.close()
+        self._fh = None
+
+        rotated = self._rotated_name()
+        os.replace(self.path, rotated)
+        logging.debug("Arquivo %s rotacionado para %s.", self.path, rotated)
+
+        if self.compress:
+            t = threading.Thread(target=_compress_segment, args=(rotated,), daemon=True)
+            t.start()
+            self._compressors = [c for c in self._compressors if c.is_alive()]
+            self._compressors.append(t)
+
+        self._open()
+
+    def _rotated_name(self) -> str:
+        """Gera um nome único para o segmento rotacionado."""
+        base = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        candidate, n = base, 1
+        while os.path.exists(candidate) or os.path.exists(candidate + ".gz"):
+            candidate = f"{base}.{n}"
+            n += 1
+        return candidate
+
+    def _maybe_sync(self):
+        """Aplica a política de fsync configurada após uma escrita."""
+        if self.fsync == "every-n":
+            if self._writes_since_sync >= self.fsync_every:
+                self._sync(force=True)
+        elif self.fsync == "interval":
+            if time.monotonic() - self._last_sync >= self.fsync_interval_s:
+                self._sync(force=True)
+
+    def _sync(self, force: bool):
+        """Descarrega o buffer do arquivo e, se `force`, garante a persistência com fsync."""
+        self._fh.flush()
+        if force:
+            os.fsync(self._fh.fileno())
+        self._writes_since_sync = 0
+        self._last_sync = time.monotonic()
+
+# --- SEÇÃO 4: FUNÇÕES PRIVADAS (AUXILIARES) ---
+
+def _compress_segment(path: str):
+    """Comprime um segmento rotacionado com gzip e remove o original."""
+    try:
+        with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+    except Exception as e:
+        logging.error("Falha ao comprimir o segmento %s: %s", path, e)
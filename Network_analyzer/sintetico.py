@@ -0,0 +1,323 @@
+# =====================================================================================
+# MÓDULO GERADOR DE TRÁFEGO SINTÉTICO (MOCK DE ALTA TAXA)
+# Versão: 1.0.1
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece a classe `SyntheticTraffic`, um gerador de carga
+#            reproduzível (semente fixa) para testes de capacidade: quantidade de
+#            clientes, clientes "pesados" com distribuição de Zipf, mistura de
+#            protocolos, distribuição de tamanhos de pacote, rajadas de varredura
+#            (scan) e inundação (flood) e taxa-alvo em pacotes por segundo. A carga
+#            pode alimentar o `Aggregator` diretamente ou ser gravada num pcap
+#            para exercitar o caminho do `Sniffer`.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import time
+import zlib
+import random
+import socket
+import struct
+import logging
+import threading
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from util import friendly_proto
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+DEFAULT_CLIENTS = 100
+DEFAULT_RATE_PPS = 1000
+DEFAULT_ZIPF_S = 1.1
+DEFAULT_SIZES = "imix"
+DEFAULT_SERVER_IP = "192.168.0.10"
+DEFAULT_SCAN_PORTS = 1000
+DEFAULT_FLOOD_PACKETS = 10000
+DEFAULT_PCAP_START_TS = 1_700_000_000.0  # Início fixo: o mesmo pcap byte a byte para a mesma semente.
+BATCH_INTERVAL_S = 0.01                  # Granularidade do ritmo ao alimentar o Aggregator.
+PCAP_CHUNK = 65536                       # Pacotes gerados por vez ao gravar o pcap.
+
+# Serviços disponíveis na mistura: nome -> (camada, porta do serviço).
+SERVICES: Dict[str, Tuple[str, int]] = {
+    "HTTPS": ("TCP", 443),
+    "HTTP": ("TCP", 80),
+    "QUIC": ("UDP", 443),
+    "DNS": ("UDP", 53),
+    "SSH": ("TCP", 22),
+    "FTP": ("TCP", 21),
+    "MySQL": ("TCP", 3306),
+    "Postgres": ("TCP", 5432),
+    "NTP": ("UDP", 123),
+    "ICMP": ("ICMP", 0),
+    "TCP": ("TCP", 51515),
+    "UDP": ("UDP", 40404),
+}
+DEFAULT_PROTO_MIX = "HTTPS=40,HTTP=15,QUIC=15,DNS=10,SSH=5,ICMP=5,TCP=10"
+
+# Tamanhos de quadro (bytes) e pesos da distribuição IMIX simples (7:4:1).
+IMIX = ((64, 7), (576, 4), (1500, 1))
+
+ETH_HEADER = b"\x02\x00\x00\x00\x00\x01\x02\x00\x00\x00\x00\x02\x08\x00"
+IP_HEADER = struct.Struct("!BBHHHBBH4s4s")
+TCP_HEADER = struct.Struct("!HHIIBBHHH")
+UDP_HEADER = struct.Struct("!HHHH")
+ICMP_HEADER = struct.Struct("!BBHHH")
+L4_PROTO = {"TCP": 6, "UDP": 17, "ICMP": 1}
+L4_SIZE = {"TCP": TCP_HEADER.size, "UDP": UDP_HEADER.size, "ICMP": ICMP_HEADER.size}
+
+# Registro gerado: (ts, ip do cliente, entrada?, camada, porta origem, porta destino, bytes do quadro).
+Record = Tuple[float, str, bool, str, int, int, int]
+
+# --- SEÇÃO 2: DEFINIÇÃO DA CLASSE PRINCIPAL ---
+
+class SyntheticTraffic:
+    """
+    Gerador de tráfego sintético determinístico.
+
+    Os clientes são escolhidos por uma distribuição de Zipf (poucos clientes
+    concentram a maior parte dos pacotes). Rajadas de scan (um IP de origem
+    varrendo portas sequenciais) e de flood (muitas origens forjadas) são
+    intercaladas nos instantes configurados e estressam, respectivamente, a
+    cardinalidade de protocolos e a de clientes do `Aggregator`.
+    """
+
+    def __init__(self, n_clients: int = DEFAULT_CLIENTS, zipf_s: float = DEFAULT_ZIPF_S,
+                 proto_mix: str = DEFAULT_PROTO_MIX, sizes: str = DEFAULT_SIZES,
+                 rate_pps: float = DEFAULT_RATE_PPS, scan_interval_s: float = 0.0,
+                 scan_ports: int = DEFAULT_SCAN_PORTS, flood_interval_s: float = 0.0,
+                 flood_packets: int = DEFAULT_FLOOD_PACKETS, server_ip: str = DEFAULT_SERVER_IP,
+                 seed: Optional[int] = None):
+        """
+        :param n_clients: Número de clientes legítimos (10.0.0.0/8).
+        :param zipf_s: Expoente da distribuição de Zipf (0 = uniforme).
+        :param proto_mix: Mistura "NOME=peso,..." com nomes de `SERVICES`.
+        :param sizes: Distribuição dos tamanhos de quadro: "imix", "fixed:N" ou "uniform:A-B".
+        :param rate_pps: Taxa-alvo em pacotes por segundo.
+        :param scan_interval_s: Intervalo entre rajadas de scan (0 = desativado).
+        :param scan_ports: Portas varridas por rajada de scan.
+        :param flood_interval_s: Intervalo entre rajadas de flood (0 = desativado).
+        :param flood_packets: Pacotes por rajada de flood.
+        :param server_ip: IP do servidor observado (extremidade local dos pacotes).
+        :param seed: Semente do gerador pseudoaleatório (reprodutibilidade).
+        :raises ValueError: Se a mistura de protocolos ou a distribuição de tamanhos for inválida.
+        """
+        self.n_clients = max(1, n_clients)
+        self.rate_pps = max(1.0, rate_pps)
+        self.scan_interval_s = max(0.0, scan_interval_s)
+        self.scan_ports = max(1, scan_ports)
+        self.flood_interval_s = max(0.0, flood_interval_s)
+        self.flood_packets = max(1, flood_packets)
+        self.server_ip = server_ip
+        self.generated = 0
+        self._rng = random.Random(seed)
+        self._clients = [f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}" for i in range(self.n_clients)]
+        # Porta efêmera fixa por cliente (determinística), como numa conexão de longa duração.
+        self._eph = {ip: 32768 + (zlib.crc32(ip.encode()) & 0x3FFF) for ip in self._clients}
+        self._client_cum = list(itertools.accumulate(1.0 / (k ** zipf_s) for k in range(1, self.n_clients + 1)))
+        self._services, self._service_cum = _parse_proto_mix(proto_mix)
+        self._size_sampler = _parse_sizes(sizes)
+        self._next_scan: Optional[float] = None
+        self._next_flood: Optional[float] = None
+        self._bursts = 0
+
+    # --- MÉTODOS PÚBLICOS (GERAÇÃO) ---
+
+    def records(self, n: int, start_ts: float) -> List[Record]:
+        """
+        Gera `n` pacotes espaçados pela taxa-alvo a partir de `start_ts`, mais as
+        rajadas de scan/flood que caírem nesse intervalo.
+        """
+        rng = self._rng
+        dt = 1.0 / self.rate_pps
+        clients = rng.choices(self._clients, cum_weights=self._client_cum, k=n)
+        services = rng.choices(self._services, cum_weights=self._service_cum, k=n)
+        sizes = self._size_sampler(rng, n)
+        inbound = [rng.random() < 0.5 for _ in range(n)]
+
+        out: List[Record] = []
+        for i in range(n):
+            ip, (layer, port), is_in = clients[i], services[i], inbound[i]
+            eph = self._eph[ip]
+            sport, dport = (eph, port) if is_in else (port, eph)
+            out.append((start_ts + i * dt, ip, is_in, layer, sport, dport, sizes[i]))
+
+        end_ts = start_ts + n * dt
+        bursts = self._bursts_between(start_ts, end_ts)
+        if bursts:
+            out.extend(bursts)
+            out.sort(key=lambda r: r[0])
+        self.generated += len(out)
+        return out
+
+    def events(self, n: int, start_ts: float) -> List[Tuple[float, str, str, int, str]]:
+        """Gera eventos prontos para `Aggregator.add_many`: (ts, client_ip, direction, nbytes, proto)."""
+        return [(ts, ip, "in" if is_in else "out", nbytes, friendly_proto(layer, sport, dport))
+                for ts, ip, is_in, layer, sport, dport, nbytes in self.records(n, start_ts)]
+
+    def drive(self, aggr, stop_event: threading.Event, duration_s: Optional[float] = None):
+        """
+        Alimenta o `Aggregator` na taxa-alvo até `stop_event` (ou `duration_s`).
+
+        A cada `BATCH_INTERVAL_S` um lote proporcional à taxa é inserido com uma
+        única aquisição do lock (`add_many`), com timestamps que terminam no
+        instante atual. Se o gerador não acompanhar a taxa,
+        o déficit é registrado no log em vez de acumulado.
+        """
+        per_tick = self.rate_pps * BATCH_INTERVAL_S
+        carry = 0.0
+        started = time.monotonic()
+        next_tick = started
+        behind_logged = False
+        while not stop_event.is_set():
+            if duration_s is not None and time.monotonic() - started >= duration_s:
+                break
+            carry += per_tick
+            n, carry = int(carry), carry - int(carry)
+            if n:
+                # O lote cobre o tick que acabou de passar: nenhum timestamp à frente do relógio.
+                aggr.add_many(self.events(n, time.time() - n / self.rate_pps))
+
+            next_tick += BATCH_INTERVAL_S
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                stop_event.wait(delay)
+            elif -delay > 1.0:
+                if not behind_logged:
+                    logging.warning("Gerador sintético abaixo da taxa-alvo de %.0f pps.", self.rate_pps)
+                    behind_logged = True
+                next_tick = time.monotonic()
+
+        elapsed = time.monotonic() - started
+        if elapsed > 0:
+            logging.info("Gerador sintético: %d pacotes em %.1fs (%.0f pps).",
+                         self.generated, elapsed, self.generated / elapsed)
+
+    def write_pcap(self, path: str, n_packets: int, start_ts: float = DEFAULT_PCAP_START_TS) -> int:
+        """
+        Grava `n_packets` pacotes (mais as rajadas) num pcap clássico Ethernet,
+        em blocos, sem depender do Scapy.
+
+        :return: O número total de pacotes gravados.
+        """
+        server = socket.inet_aton(self.server_ip)
+        addr_cache: Dict[str, bytes] = {}
+        written = 0
+        with open(path, "wb") as f:
+            f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+            remaining, ts = n_packets, start_ts
+            while remaining > 0:
+                chunk = min(PCAP_CHUNK, remaining)
+                for record in self.records(chunk, ts):
+                    ip = record[1]
+                    client = addr_cache.get(ip)
+                    if client is None:
+                        client = addr_cache[ip] = socket.inet_aton(ip)
+                    frame = _build_frame(record, client, server, written)
+                    sec = int(record[0])
+                    f.write(struct.pack("<IIII", sec, int((record[0] - sec) * 1e6), len(frame), len(frame)))
+                    f.write(frame)
+                    written += 1
+                remaining -= chunk
+                ts += chunk / self.rate_pps
+        return written
+
+    # --- MÉTODOS PRIVADOS (LÓGICA INTERNA) ---
+
+    def _bursts_between(self, start_ts: float, end_ts: float) -> List[Record]:
+        """
+        Gera as rajadas de scan e flood agendadas em [start_ts, end_ts). Cada
+        rajada cabe no restante do intervalo: ela nunca se estende além do lote
+        (e do relógio, em `drive`), mesmo que a taxa-alvo não a comporte.
+        """
+        out: List[Record] = []
+        if self.scan_interval_s:
+            if self._next_scan is None:
+                self._next_scan = start_ts + self.scan_interval_s
+            while self._next_scan < end_ts:
+                out.extend(self._scan_burst(self._next_scan, end_ts))
+                self._next_scan += self.scan_interval_s
+        if self.flood_interval_s:
+            if self._next_flood is None:
+                self._next_flood = start_ts + self.flood_interval_s
+            while self._next_flood < end_ts:
+                out.extend(self._flood_burst(self._next_flood, end_ts))
+                self._next_flood += self.flood_interval_s
+        return out
+
+    def _scan_burst(self, ts: float, end_ts: float) -> List[Record]:
+        """Um único IP externo envia SYNs para portas sequenciais do servidor."""
+        self._bursts += 1
+        scanner = f"198.18.{(self._bursts >> 8) & 255}.{self._bursts & 255}"
+        dt = self._burst_spacing(ts, end_ts, self.scan_ports)
+        return [(ts + i * dt, scanner, True, "TCP", 40000, port, 60)
+                for i, port in enumerate(range(1, self.scan_ports + 1))]
+
+    def _flood_burst(self, ts: float, end_ts: float) -> List[Record]:
+        """Muitas origens forjadas (198.19.0.0/16) enviam pequenos pacotes UDP/ICMP."""
+        rng = self._rng
+        dt = self._burst_spacing(ts, end_ts, self.flood_packets)
+        out = []
+        for i in range(self.flood_packets):
+            src = rng.getrandbits(16)
+            layer = "UDP" if i & 1 else "ICMP"
+            out.append((ts + i * dt, f"198.19.{src >> 8}.{src & 255}", True, layer,
+                        rng.randrange(1024, 65535), 53 if layer == "UDP" else 0, 64))
+        return out
+
+    def _burst_spacing(self, ts: float, end_ts: float, n: int) -> float:
+        """Espaçamento da taxa-alvo, comprimido se `n` pacotes não couberem até `end_ts`."""
+        return min(1.0 / self.rate_pps, (end_ts - ts) / n)
+
+# --- SEÇÃO 3: FUNÇÕES PRIVADAS (AUXILIARES) ---
+
+def _parse_proto_mix(spec: str) -> Tuple[List[Tuple[str, int]], List[float]]:
+    """Converte "NOME=peso,..." em (serviços, pesos cumulativos)."""
+    services, weights = [], []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in SERVICES:
+            raise ValueError(f"Protocolo desconhecido na mistura: {name!r} (disponíveis: {', '.join(SERVICES)})")
+        try:
+            w = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Peso inválido para {name!r}: {weight!r}") from None
+        if w > 0:
+            services.append(SERVICES[name])
+            weights.append(w)
+    if not services:
+        raise ValueError("A mistura de protocolos está vazia.")
+    return services, list(itertools.accumulate(weights))
+
+def _parse_sizes(spec: str):
+    """Converte a especificação de tamanhos numa função `(rng, n) -> List[int]`."""
+    kind, _, arg = spec.partition(":")
+    try:
+        if kind == "imix":
+            values = [s for s, _ in IMIX]
+            cum = list(itertools.accumulate(w for _, w in IMIX))
+            return lambda rng, n: rng.choices(values, cum_weights=cum, k=n)
+        if kind == "fixed":
+            size = max(60, int(arg))
+            return lambda rng, n: [size] * n
+        if kind == "uniform":
+            lo, hi = (int(v) for v in arg.split("-"))
+            lo, hi = max(60, lo), max(60, hi)
+            return lambda rng, n: [rng.randint(lo, hi) for _ in range(n)]
+    except ValueError:
+        pass
+    raise ValueError(f"Distribuição de tamanhos inválida: {spec!r} (use imix, fixed:N ou uniform:A-B)")
+
+def _build_frame(record: Record, client: bytes, server: bytes, ident: int) -> bytes:
+    """Monta um quadro Ethernet/IPv4/(TCP|UDP|ICMP) com o tamanho total do registro."""
+    _, _, is_in, layer, sport, dport, nbytes = record
+    src, dst = (client, server) if is_in else (server, client)
+    payload_len = max(0, nbytes - len(ETH_HEADER) - IP_HEADER.size - L4_SIZE[layer])
+    if layer == "TCP":
+        l4 = TCP_HEADER.pack(sport, dport, 0, 0, 0x50, 0x18, 65535, 0, 0)
+    elif layer == "UDP":
+        l4 = UDP_HEADER.pack(sport, dport, UDP_HEADER.size + payload_len, 0)
+    else:
+        l4 = ICMP_HEADER.pack(8, 0, 0, 0, ident & 0xFFFF)
+    ip = IP_HEADER.pack(0x45, 0, IP_HEADER.size + len(l4) + payload_len, ident & 0xFFFF, 0,
+                        64, L4_PROTO[layer], 0, src, dst)
+    return ETH_HEADER + ip + l4 + bytes(payload_len)
@@ -0,0 +1,93 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA O AGENDADOR DE JANELAS
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida o `WindowScheduler` com relógios
+#            simulados: alinhamento às fronteiras do relógio de parede, ausência
+#            de deriva com tempo de processamento e contagem de ticks perdidos.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import threading
+import pytest
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agendador import WindowScheduler
+
+# --- SEÇÃO 1: FIXTURES DE TESTE ---
+
+class FakeClock:
+    """ Relógio simulado: o tempo só avança quando alguém "dorme" ou processa. """
+    def __init__(self, start: float):
+        self.now = start
+
+    def wall(self) -> float:
+        return self.now
+
+    def mono(self) -> float:
+        return self.now - 900.0  # Origem arbitrária, como em time.monotonic().
+
+class FakeStopEvent(threading.Event):
+    """ Evento cuja espera avança o relógio simulado em vez de bloquear. """
+    def __init__(self, clock: FakeClock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        self.clock.now += timeout
+        return self.is_set()
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock(start=1000.03)
+
+# --- SEÇÃO 2: TESTES UNITÁRIOS ---
+
+def test_ticks_align_to_boundaries_without_drift(clock: FakeClock):
+    """
+    Testa se os ticks caem sempre nas fronteiras, mesmo com processamento entre eles.
+    """
+    scheduler = WindowScheduler(0.5, grace_s=0.0, wall_clock=clock.wall, monotonic_clock=clock.mono)
+    stop = FakeStopEvent(clock)
+
+    ticks = []
+    for _ in range(4):
+        ticks.append(scheduler.wait(stop))
+        clock.now += 0.2  # Simula o custo de snapshot + emissão.
+
+    assert ticks == [1000.5, 1001.0, 1001.5, 1002.0]
+    assert scheduler.missed == 0
+
+def test_overrun_skips_missed_ticks(clock: FakeClock):
+    """
+    Testa se um ciclo mais lento que o período pula os ticks perdidos em vez de dispará-los em rajada.
+    """
+    scheduler = WindowScheduler(0.1, grace_s=0.0, wall_clock=clock.wall, monotonic_clock=clock.mono)
+    stop = FakeStopEvent(clock)
+
+    assert scheduler.wait(stop) == 1000.1
+    clock.now += 0.35  # Processamento de 350 ms.
+    assert scheduler.wait(stop) == 1000.5
+    assert scheduler.missed == 3
+
+def test_stop_event_interrupts_wait(clock: FakeClock):
+    """
+    Garante que a espera retorna None quando o evento de parada é sinalizado.
+    """
+    scheduler = WindowScheduler(1.0, wall_clock=clock.wall, monotonic_clock=clock.mono)
+    stop = FakeStopEvent(clock)
+    stop.set()
+
+    assert scheduler.wait(stop) is None
+
+def test_rejects_period_below_minimum():
+    """
+    Garante que períodos abaixo de 100 ms são rejeitados.
+    """
+    with pytest.raises(ValueError):
+        WindowScheduler(0.05)
@@ -134,3 +134,35 @@ def test_max_clients_limit(aggregator: Aggregator):
     assert "192.168.1.20" in payload["clients"]
     assert "192.168.1.10" not in payload["clients"]
 
+
+def test_fractional_window_alignment():
+    """
+    Testa se janelas fracionárias são alinhadas a múltiplos exatos do tamanho da janela.
+    """
+    aggregator_fast = Aggregator(window_s=0.25)
+    start = aggregator_fast._current["start"]
+    aggregator_fast.add(ts=start + 0.3, client_ip="192.168.1.10", direction="in", nbytes=100, proto="TCP")
+
+    payloads = aggregator_fast.collect_closed_windows(now=start + 0.5)
+
+    assert len(payloads) == 1
+    assert payloads[0]["window_start"] == round(start + 0.25, 6)
+    assert payloads[0]["window_end"] == round(start + 0.5, 6)
+    assert payloads[0]["window_start"] % 0.25 == pytest.approx(0, abs=1e-6)
+
+def test_collect_closed_windows_keeps_windows_rolled_by_packets(aggregator: Aggregator):
+    """
+    Testa se janelas encerradas pela chegada de pacotes futuros não são descartadas.
+    """
+    start = aggregator._current["start"]
+    aggregator.add(ts=start + 1, client_ip="192.168.1.10", direction="in", nbytes=100, proto="TCP")
+    # Um pacote duas janelas adiante encerra a primeira janela.
+    aggregator.add(ts=start + 11, client_ip="192.168.1.20", direction="out", nbytes=50, proto="UDP")
+
+    payloads = aggregator.collect_closed_windows(now=start + 15, meta={"host": "test-host"})
+
+    assert [p["window_start"] for p in payloads] == [start, start + 10]
+    assert payloads[0]["clients"]["192.168.1.10"]["in_bytes"] == 100
+    assert payloads[1]["clients"]["192.168.1.20"]["out_bytes"] == 50
+    assert all(p["host"] == "test-host" for p in payloads)
+    assert aggregator.collect_closed_windows(now=start + 15) == []
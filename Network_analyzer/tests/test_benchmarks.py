@@ -0,0 +1,42 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA A SUÍTE DE BENCHMARKS
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida a comparação com a linha de base usada
+#            por `benchmarks/bench.py`.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+# Adiciona o diretório raiz e o de benchmarks ao path para permitir a importação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+import bench
+
+# --- SEÇÃO 1: TESTES UNITÁRIOS ---
+
+def test_compare_flags_only_drops_beyond_tolerance():
+    """
+    Testa se apenas quedas de vazão acima da tolerância são reportadas como regressão.
+    """
+    baseline = {"a": {"ops_per_s": 1000.0}, "b": {"ops_per_s": 1000.0}, "c": {"ops_per_s": 1000.0}}
+    results = {"a": {"ops_per_s": 850.0}, "b": {"ops_per_s": 700.0}, "c": {"skipped": "Scapy indisponível"}}
+
+    regressions = bench.compare(results, baseline, tolerance=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b:")
+
+def test_baseline_from_another_host_is_not_compared():
+    """
+    Testa se uma linha de base de outro host (ou sem a identificação do host) é
+    recusada e se uma do mesmo host é aceita.
+    """
+    meta = {"node": "a", "machine": "x86_64", "system": "Linux", "implementation": "CPython", "python": "3.11.7"}
+
+    assert bench.same_host(meta, dict(meta)) == []
+    assert bench.same_host(meta, dict(meta, node="b")) == ["node"]
+    assert bench.same_host(meta, {k: v for k, v in meta.items() if k != "node"}) == ["node"]
@@ -21,7 +21,10 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Importa a função principal a ser testada
-from emissao import emit_json
+import time
+import threading
+from emissao import emit_json, emit_window, SinkRegistry
+from sinks import Sink
 
 # --- SEÇÃO 1: FIXTURES E DADOS DE TESTE ---
 
@@ -139,3 +142,81 @@ def test_json_serialization_error():
     
     assert result == 1 # Espera 1 (falha)
 
+
+# --- SEÇÃO 3: TESTES DO FAN-OUT CONCORRENTE ---
+
+class _RecordingSink(Sink):
+    """ Sink de teste que registra as janelas recebidas e pode bloquear sob demanda. """
+    def __init__(self, name, gate=None, ok=True):
+        super().__init__(name)
+        self.received = []
+        self.gate = gate
+        self.ok = ok
+
+    def send(self, payload, data):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.received.append(data)
+        return self.ok
+
+def test_registry_slow_sink_does_not_delay_others(mock_payload):
+    """
+    Testa se um sink bloqueado não impede a entrega aos demais sinks.
+    """
+    gate = threading.Event()
+    slow, fast = _RecordingSink("slow", gate=gate), _RecordingSink("fast")
+    registry = SinkRegistry()
+    registry.register(slow)
+    registry.register(fast)
+
+    ticket = registry.submit(mock_payload)
+
+    # O sink rápido conclui enquanto o lento continua bloqueado.
+    assert not ticket.wait(timeout=0.2)
+    assert fast.received == [json.dumps(mock_payload, ensure_ascii=False).encode("utf-8")]
+    assert set(ticket.results) == {"fast"}
+
+    gate.set()
+    assert ticket.wait(timeout=5)
+    assert ticket.ok
+    assert all(r.latency_s >= 0 for r in ticket.results.values())
+    registry.close(timeout=5)
+
+def test_registry_reports_per_sink_failures(mock_payload):
+    """
+    Testa se a falha de um sink é reportada isoladamente no ticket de conclusão.
+    """
+    registry = SinkRegistry()
+    registry.register(_RecordingSink("good"))
+    registry.register(_RecordingSink("bad", ok=False))
+    completed = []
+    registry.on_complete = completed.append
+
+    ticket = registry.submit(mock_payload)
+
+    assert ticket.wait(timeout=5)
+    assert ticket.results["good"].ok
+    assert not ticket.results["bad"].ok
+    assert not ticket.ok
+    assert completed == [ticket]
+    registry.close(timeout=5)
+
+def test_registry_drops_when_sink_queue_is_full(mock_payload):
+    """
+    Testa se uma fila cheia descarta a janela em vez de bloquear o chamador.
+    """
+    gate = threading.Event()
+    registry = SinkRegistry(queue_size=1)
+    stuck = registry.register(_RecordingSink("stuck", gate=gate))
+
+    # 1ª janela ocupa a thread, 2ª ocupa a fila, 3ª é descartada no sink bloqueado.
+    results = [emit_window(mock_payload, registry)]
+    while registry.stats()["stuck"]["pending"]:
+        time.sleep(0.001)
+    results += [emit_window(mock_payload, registry) for _ in range(2)]
+
+    assert results == [0, 0, 1]
+    assert registry.stats()["stuck"]["dropped"] == 1
+    gate.set()
+    registry.close(timeout=5)
+    assert len(stuck.received) == 2
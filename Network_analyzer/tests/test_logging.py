@@ -0,0 +1,57 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA A CONFIGURAÇÃO DE LOGGING
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida o handler de fila não bloqueante e a
+#            agregação de erros repetitivos com limite de taxa.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import queue
+import logging
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Logging import NonBlockingQueueHandler, RateLimitedErrors
+
+# --- SEÇÃO 1: TESTES UNITÁRIOS ---
+
+def test_queue_handler_drops_when_full_without_formatting():
+    """
+    Testa se o handler não formata a mensagem no chamador e descarta registros com a fila cheia.
+    """
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    first = logging.LogRecord("t", logging.ERROR, __file__, 1, "erro %s", ("a",), None)
+    second = logging.LogRecord("t", logging.ERROR, __file__, 2, "erro %s", ("b",), None)
+
+    handler.handle(first)
+    handler.handle(second)
+
+    queued = handler.queue.get_nowait()
+    assert queued is first and queued.args == ("a",)
+    assert handler.dropped == 1
+
+def test_rate_limited_errors_aggregate_repeated_occurrences(caplog):
+    """
+    Testa se erros repetidos geram uma linha imediata e depois apenas um resumo por intervalo.
+    """
+    now = [0.0]
+    errors = RateLimitedErrors("callback de pacotes", interval_s=10, clock=lambda: now[0])
+
+    with caplog.at_level(logging.WARNING):
+        for _ in range(1000):
+            errors.record("ValueError", "campo inválido")
+        assert len(caplog.records) == 1
+
+        now[0] = 10.0
+        errors.record("ValueError", "último detalhe")
+
+    assert len(caplog.records) == 2
+    summary = caplog.records[1].getMessage()
+    assert "1001 erro(s)" in summary and "último detalhe" in summary
+    assert errors.total == 1001
+    assert errors.snapshot() == {}
@@ -0,0 +1,76 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA AS MÉTRICAS DO PRODUTOR
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida a exposição no formato do Prometheus,
+#            a instrumentação do Aggregator (lock e formatação) e o endpoint HTTP
+#            local de métricas.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+from urllib import request
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Aggregator import Aggregator
+from metricas import MetricsRegistry, ProducerMetrics, MetricsServer
+
+# --- SEÇÃO 1: TESTES UNITÁRIOS ---
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    Testa se o histograma é exposto com buckets cumulativos, soma e contagem.
+    """
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo.", labels=("sink",), buckets=(0.1, 1.0))
+    hist.observe(0.05, "a")
+    hist.observe(0.5, "a")
+    hist.observe(2.0, "a")
+
+    text = registry.render()
+
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{sink="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{sink="a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{sink="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{sink="a"} 3' in text
+
+def test_aggregator_records_lock_and_format_metrics():
+    """
+    Testa se o Aggregator instrumentado registra espera/retenção do lock e a formatação da janela.
+    """
+    metrics = ProducerMetrics()
+    aggregator = Aggregator(window_s=5, metrics=metrics)
+    start = aggregator._current["start"]
+    for i in range(10):
+        aggregator.add(ts=start + 1, client_ip=f"10.0.0.{i}", direction="in", nbytes=100, proto="TCP")
+
+    aggregator.collect_closed_windows(now=start + 5)
+    text = metrics.registry.render()
+
+    assert "netvision_aggregator_lock_wait_seconds_count 10" in text
+    assert "netvision_aggregator_lock_hold_seconds_count 10" in text
+    assert "netvision_format_payload_seconds_count 1" in text
+    assert "netvision_window_clients 10" in text
+    assert "netvision_packets_per_second 2" in text
+
+def test_metrics_server_serves_prometheus_text():
+    """
+    Testa se o endpoint local responde /metrics no formato texto do Prometheus.
+    """
+    metrics = ProducerMetrics()
+    metrics.packets.inc(3)
+    server = MetricsServer(metrics.registry, port=0)
+    server.start()
+    try:
+        with request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=2) as resp:
+            body = resp.read().decode("utf-8")
+            assert resp.headers["Content-Type"].startswith("text/plain")
+    finally:
+        server.stop()
+
+    assert "netvision_packets_total 3" in body
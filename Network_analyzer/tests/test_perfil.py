@@ -0,0 +1,79 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA O PERFILADOR EMBUTIDO
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida a atribuição das amostras aos estágios do
+#            pipeline e o relatório periódico em NDJSON do `Profiler`.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import json
+import time
+import threading
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Aggregator import Aggregator
+from perfil import Profiler, STAGES, report_path_for
+
+# --- SEÇÃO 1: TESTES UNITÁRIOS ---
+
+def test_profiler_attributes_samples_to_aggregate_stage(tmp_path):
+    """
+    Testa se amostras tiradas enquanto outra thread executa `Aggregator.add` caem no estágio "aggregate".
+    """
+    aggregator = Aggregator(window_s=3600)
+    ts = aggregator._current["start"] + 1
+    stop = threading.Event()
+
+    def _busy():
+        i = 0
+        while not stop.is_set():
+            aggregator.add(ts, client_ip=f"10.0.{i % 256}.{i % 7}", direction="in", nbytes=64, proto="TCP")
+            i += 1
+
+    worker = threading.Thread(target=_busy)
+    worker.start()
+    profiler = Profiler(str(tmp_path / "out.profile.ndjson"))
+    try:
+        # Amostra até obter algumas amostras do pipeline (a thread pode demorar a obter o GIL).
+        deadline = time.monotonic() + 5
+        while profiler._samples < 20 and time.monotonic() < deadline:
+            profiler.sample_once()
+            time.sleep(0.001)
+    finally:
+        stop.set()
+        worker.join()
+
+    report = profiler.build_report()
+
+    assert set(report["stages"]) == set(STAGES)
+    assert report["stages"]["aggregate"]["samples"] > 0
+    assert report["stages"]["aggregate"]["top_functions"][0][0].startswith("Aggregator.py:")
+
+def test_profiler_appends_ndjson_report_with_memory(tmp_path):
+    """
+    Testa se `stop()` anexa um relatório com as alocações do `tracemalloc`.
+    """
+    path = tmp_path / "out.profile.ndjson"
+    profiler = Profiler(str(path), report_interval_s=3600)
+    profiler.start()
+    _allocated = [bytearray(1024) for _ in range(100)]
+    profiler.stop()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    report = json.loads(lines[0])
+    assert report["memory"]["current_bytes"] > 0
+    assert report["memory"]["top_allocations"]
+
+def test_report_path_is_next_to_ndjson_output():
+    """
+    Garante que o relatório é gravado ao lado da saída NDJSON.
+    """
+    assert report_path_for("/var/log/netvision/out.ndjson") == "/var/log/netvision/out.profile.ndjson"
+    assert os.path.isabs(report_path_for(None))
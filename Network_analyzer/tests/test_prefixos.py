@@ -0,0 +1,102 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA ENDEREÇOS LOCAIS E DIREÇÃO DO TRÁFEGO
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida a consulta de endereços e prefixos locais
+#            (IPv4/IPv6) do `LocalAddresses` e a decisão de direção do `Sniffer`
+#            com vários endereços locais.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+from types import SimpleNamespace
+import pytest
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from prefixos import LocalAddresses
+from captura import Sniffer
+
+# --- SEÇÃO 1: DUBLÊS DE TESTE (SCAPY) ---
+
+class _Layer:
+    """Classe de camada fictícia; as instâncias carregam os campos do cabeçalho."""
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+class _IP(_Layer): pass
+class _IPv6(_Layer): pass
+class _TCP(_Layer): pass
+class _UDP(_Layer): pass
+class _ICMP(_Layer): pass
+
+class _Packet:
+    """Pacote fictício com a interface mínima usada por `Sniffer._process_packet`."""
+    def __init__(self, *layers, size=100):
+        self.time = 1000.0
+        self._layers = {type(layer): layer for layer in layers}
+        self._size = size
+
+    def __bytes__(self):
+        return b"\x00" * self._size
+
+    def getlayer(self, cls):
+        return self._layers.get(cls)
+
+    def haslayer(self, cls):
+        return cls in self._layers
+
+_FAKE_SCAPY = SimpleNamespace(IP=_IP, IPv6=_IPv6, TCP=_TCP, UDP=_UDP, ICMP=_ICMP)
+
+# --- SEÇÃO 2: TESTES UNITÁRIOS ---
+
+def test_local_addresses_match_hosts_and_prefixes():
+    """
+    Testa a pertinência de IPs exatos e de prefixos IPv4/IPv6, incluindo grafias IPv6 equivalentes.
+    """
+    local = LocalAddresses(["192.168.0.10", "10.20.0.0/16", "2001:db8::/32", "fe80::1"])
+
+    assert "192.168.0.10" in local
+    assert "10.20.255.1" in local
+    assert "10.21.0.1" not in local
+    assert "2001:db8:abcd::5" in local
+    assert "2001:db9::5" not in local
+    assert "FE80:0:0::1" in local
+    assert "not-an-ip" not in local
+
+def test_local_addresses_build_bpf_filter():
+    """
+    Testa o filtro BPF gerado para vários endereços e prefixos.
+    """
+    local = LocalAddresses(["192.168.0.10", "10.20.0.0/16", "2001:db8::/32"])
+    assert local.bpf_filter() == "host 192.168.0.10 or net 10.20.0.0/16 or net 2001:db8::/32"
+
+def test_local_addresses_reject_invalid_entry():
+    """
+    Garante que uma entrada inválida é rejeitada com ValueError.
+    """
+    with pytest.raises(ValueError):
+        LocalAddresses(["10.0.0.300"])
+
+def test_sniffer_direction_with_multiple_local_addresses(mocker):
+    """
+    Testa a direção (in/out) com vários endereços locais, IPv4 e IPv6, no mesmo Aggregator.
+    """
+    aggr = mocker.Mock()
+    mocker.patch.object(Sniffer, "_lazy_import_scapy", return_value=_FAKE_SCAPY)
+    sniffer = Sniffer(aggr, server_ip=["192.168.0.10", "2001:db8::/64"], iface=["eth0", "eth1"])
+
+    sniffer._packet_callback(_Packet(_IP(src="8.8.8.8", dst="192.168.0.10"), _TCP(sport=51000, dport=443)))
+    sniffer._packet_callback(_Packet(_IPv6(src="2001:db8::7", dst="2001:4860::1", nh=58)))
+    sniffer._packet_callback(_Packet(_IP(src="1.1.1.1", dst="9.9.9.9"), _UDP(sport=53, dport=5353)))
+
+    calls = [c.kwargs for c in aggr.add.call_args_list]
+    assert [(c["client_ip"], c["direction"], c["proto"]) for c in calls] == [
+        ("8.8.8.8", "in", "HTTPS"),
+        ("2001:4860::1", "out", "ICMP"),
+    ]
+    assert sniffer.iface == ["eth0", "eth1"]
+    assert sniffer._bpf == "host 192.168.0.10 or net 2001:db8::/64"
@@ -0,0 +1,155 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA OS SINKS DE EMISSÃO
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida o `FileSink`: escrita bufferizada em
+#            NDJSON, rotação por tamanho com compressão, políticas de fsync e a
+#            substituição atômica de arquivos de snapshot; e os sinks de
+#            transporte local (UDS e UDP).
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import gzip
+import json
+import socket
+import struct
+import pytest
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sinks import Sink, FileSink
+from transporte import UnixSocketSink, UdpSink, parse_host_port
+
+# --- SEÇÃO 1: TESTES UNITÁRIOS ---
+
+def test_file_sink_append_keeps_handle_open(tmp_path, mocker):
+    """
+    Testa se o modo NDJSON abre o arquivo uma única vez e grava uma linha por janela.
+    """
+    path = str(tmp_path / "out.ndjson")
+    spy_open = mocker.spy(FileSink, "_open")
+    sink = FileSink(path, append=True)
+
+    for i in range(3):
+        assert sink.write(json.dumps({"i": i}).encode("utf-8"))
+    sink.close()
+
+    assert spy_open.call_count == 1
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line)["i"] for line in lines] == [0, 1, 2]
+
+def test_file_sink_rotates_by_size_and_compresses(tmp_path):
+    """
+    Testa a rotação por tamanho e a compressão gzip dos segmentos rotacionados.
+    """
+    path = str(tmp_path / "out.ndjson")
+    sink = FileSink(path, append=True, rotate_bytes=10, compress=True)
+
+    sink.write(b'{"a": 1234567}')
+    sink.write(b'{"b": 2}')
+    sink.close()
+
+    rotated = [name for name in os.listdir(tmp_path) if name.endswith(".gz")]
+    assert len(rotated) == 1
+    with gzip.open(tmp_path / rotated[0], "rb") as f:
+        assert f.read() == b'{"a": 1234567}\n'
+    with open(path, "rb") as f:
+        assert f.read() == b'{"b": 2}\n'
+
+def test_file_sink_fsync_every_n(tmp_path, mocker):
+    """
+    Testa se a política "every-n" aplica fsync apenas a cada N escritas.
+    """
+    mock_fsync = mocker.patch("os.fsync")
+    sink = FileSink(str(tmp_path / "out.ndjson"), fsync="every-n", fsync_every=2)
+
+    for _ in range(4):
+        sink.write(b"{}")
+
+    assert mock_fsync.call_count == 2
+    sink.close()
+
+def test_file_sink_snapshot_is_replaced_atomically(tmp_path, mocker):
+    """
+    Testa se o modo snapshot escreve num arquivo temporário e o move com `os.replace`.
+    """
+    path = str(tmp_path / "snapshot.json")
+    spy_replace = mocker.spy(os, "replace")
+    sink = FileSink(path, append=False)
+
+    sink.write(b'{"v": 1}')
+    sink.write(b'{"v": 2}')
+
+    assert spy_replace.call_count == 2
+    spy_replace.assert_called_with(path + ".tmp", path)
+    with open(path, "rb") as f:
+        assert f.read() == b'{"v": 2}'
+    assert not os.path.exists(path + ".tmp")
+
+def test_file_sink_rejects_unknown_fsync_policy(tmp_path):
+    """
+    Garante que uma política de fsync desconhecida é rejeitada na construção.
+    """
+    with pytest.raises(ValueError):
+        FileSink(str(tmp_path / "out.ndjson"), fsync="always")
+
+def test_sink_without_send_fails_on_construction():
+    """
+    Garante que um sink sem `send` é recusado ao ser criado, e não ao emitir.
+    """
+    class IncompleteSink(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink("incompleto")
+
+def test_unix_socket_sink_sends_length_prefixed_frames(tmp_path):
+    """
+    Testa se o `UnixSocketSink` envia frames `[uint32 tamanho][JSON]` numa conexão persistente.
+    """
+    path = str(tmp_path / "netvision.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    sink = UnixSocketSink(path)
+
+    assert sink.send({}, b'{"a": 1}')
+    assert sink.send({}, b'{"b": 2}')
+    conn, _ = server.accept()
+    conn.settimeout(2)
+    received = b""
+    while len(received) < 2 * 4 + 16:
+        received += conn.recv(1024)
+
+    assert received == struct.pack("!I", 8) + b'{"a": 1}' + struct.pack("!I", 8) + b'{"b": 2}'
+    sink.close()
+    conn.close()
+    server.close()
+
+def test_udp_sink_sends_one_datagram_per_window():
+    """
+    Testa se o `UdpSink` envia cada janela como um único datagrama.
+    """
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(2)
+    sink = UdpSink(parse_host_port(f"127.0.0.1:{receiver.getsockname()[1]}"))
+
+    assert sink.send({}, b'{"w": 1}')
+
+    assert receiver.recv(2048) == b'{"w": 1}'
+    sink.close()
+    receiver.close()
+
+def test_parse_host_port_rejects_missing_port():
+    """
+    Garante que endereços sem porta válida são rejeitados.
+    """
+    assert parse_host_port("[::1]:9000") == ("::1", 9000)
+    with pytest.raises(ValueError):
+        parse_host_port("localhost")
@@ -0,0 +1,108 @@
+# =====================================================================================
+# TESTE UNITÁRIO AUTOMATIZADO PARA O GERADOR DE TRÁFEGO SINTÉTICO
+# Versão: 1.0.0
+#
+# Autor: Equipe de Redes/QA
+# Descrição: Esta suíte de testes valida a reprodutibilidade, a distribuição de
+#            Zipf, as rajadas de scan/flood e o pcap do `SyntheticTraffic`, além
+#            da ingestão em lote `Aggregator.add_many`.
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import time
+import struct
+import threading
+from collections import Counter
+import pytest
+
+# Adiciona o diretório raiz ao path para permitir a importação dos módulos da aplicação
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from Aggregator import Aggregator
+from sintetico import SyntheticTraffic
+
+# --- SEÇÃO 1: TESTES UNITÁRIOS ---
+
+def test_same_seed_produces_same_events():
+    """
+    Garante que a mesma semente gera exatamente a mesma carga.
+    """
+    a = SyntheticTraffic(n_clients=50, seed=7).events(500, 1000.0)
+    b = SyntheticTraffic(n_clients=50, seed=7).events(500, 1000.0)
+    assert a == b
+
+def test_zipf_concentrates_traffic_on_heavy_hitters():
+    """
+    Testa se o cliente de maior peso recebe muito mais pacotes que a média.
+    """
+    events = SyntheticTraffic(n_clients=1000, zipf_s=1.2, seed=1).events(20000, 0.0)
+    counts = Counter(e[1] for e in events)
+    assert counts["10.0.0.0"] > 20 * (20000 / 1000)
+
+def test_scan_and_flood_bursts_are_interleaved():
+    """
+    Testa se as rajadas de scan (portas sequenciais) e flood (origens forjadas) entram no intervalo.
+    """
+    gen = SyntheticTraffic(n_clients=10, rate_pps=1000, scan_interval_s=0.5, scan_ports=100,
+                           flood_interval_s=0.5, flood_packets=200, seed=3)
+    records = gen.records(1000, 0.0)
+
+    scan = [r for r in records if r[1].startswith("198.18.")]
+    flood = {r[1] for r in records if r[1].startswith("198.19.")}
+    assert len(scan) == 100
+    assert {r[5] for r in scan} == set(range(1, 101))
+    assert len(flood) > 100
+    assert [r[0] for r in records] == sorted(r[0] for r in records)
+
+def test_invalid_proto_mix_is_rejected():
+    """
+    Garante que um protocolo desconhecido na mistura é rejeitado.
+    """
+    with pytest.raises(ValueError):
+        SyntheticTraffic(proto_mix="HTTPS=1,GOPHER=2")
+
+def test_write_pcap_produces_valid_records(tmp_path):
+    """
+    Testa se o pcap gerado tem o cabeçalho global e um registro por pacote, com o tamanho pedido.
+    """
+    path = tmp_path / "synthetic.pcap"
+    written = SyntheticTraffic(n_clients=4, sizes="fixed:128", seed=1).write_pcap(str(path), 10)
+
+    data = path.read_bytes()
+    magic, _, _, _, _, _, linktype = struct.unpack_from("<IHHiIII", data, 0)
+    assert (magic, linktype) == (0xA1B2C3D4, 1)
+
+    offset, lengths = 24, []
+    while offset < len(data):
+        _, _, incl_len, _ = struct.unpack_from("<IIII", data, offset)
+        lengths.append(incl_len)
+        offset += 16 + incl_len
+    assert written == 10 and lengths == [128] * 10 and offset == len(data)
+
+def test_drive_feeds_aggregator_in_batches():
+    """
+    Testa se `drive` alimenta o Aggregator via `add_many` na taxa-alvo.
+    """
+    aggregator = Aggregator(window_s=3600)
+    gen = SyntheticTraffic(n_clients=20, rate_pps=2000, seed=5)
+
+    gen.drive(aggregator, threading.Event(), duration_s=0.2)
+    payload = aggregator.snapshot()
+
+    assert 0 < payload["pkt_count"] == gen.generated
+    assert payload["n_clients"] <= 20
+
+def test_drive_with_flood_keeps_window_at_wall_clock():
+    """
+    Testa se uma rajada de flood maior que o lote (10.000 pacotes a 1000 pps)
+    é comprimida no lote, sem empurrar a janela atual do Aggregator para o futuro.
+    """
+    aggregator = Aggregator(window_s=1.0)
+    gen = SyntheticTraffic(n_clients=10, rate_pps=1000, flood_interval_s=0.5, seed=9)
+
+    gen.drive(aggregator, threading.Event(), duration_s=1.2)
+
+    assert gen.generated > 10000  # Ao menos uma rajada entrou.
+    assert aggregator._current["start"] <= time.time() < aggregator._current["start"] + 2 * aggregator.window_s
@@ -0,0 +1,124 @@
+# =====================================================================================
+# MÓDULO DE TRANSPORTE LOCAL (UNIX DOMAIN SOCKET / UDP)
+# Versão: 1.0.0
+#
+# Autor: Equipe de Análise de Rede
+# Descrição: Este módulo fornece sinks de baixa latência para quando o produtor e o
+#            backend rodam na mesma máquina. O `UnixSocketSink` envia cada janela
+#            como um frame prefixado pelo tamanho sobre uma conexão persistente;
+#            o `UdpSink` envia um datagrama por janela (entrega não garantida).
+# =====================================================================================
+
+# --- SEÇÃO 0: IMPORTAÇÕES ---
+import socket
+import struct
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+from sinks import Sink
+
+# --- SEÇÃO 1: CONSTANTES DE MÓDULO ---
+FRAME_HEADER = struct.Struct("!I")  # Tamanho do frame: uint32 big-endian.
+MAX_FRAME_BYTES = 16 * 1024 * 1024  # Deve coincidir com o limite do backend.
+MAX_DATAGRAM_BYTES = 65507          # Maior payload UDP sobre IPv4.
+DEFAULT_CONNECT_TIMEOUT_S = 2.0
+
+# --- SEÇÃO 2: SINKS DE TRANSPORTE ---
+
+class UnixSocketSink(Sink):
+    """
+    Envia janelas por um Unix domain socket (SOCK_STREAM) usando frames
+    `[uint32 tamanho][JSON]`. A conexão é mantida aberta e refeita sob demanda.
+    """
+
+    def __init__(self, path: str, timeout: float = DEFAULT_CONNECT_TIMEOUT_S):
+        """
+        :param path: Caminho do socket em que o backend está escutando.
+        :param timeout: Timeout em segundos para conectar e enviar.
+        """
+        super().__init__(f"uds:{path}")
+        self.path = path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        if len(data) > MAX_FRAME_BYTES:
+            logging.error("Janela de %d bytes excede o limite do frame UDS (%d).", len(data), MAX_FRAME_BYTES)
+            return False
+
+        frame = FRAME_HEADER.pack(len(data)) + data
+        # Uma reconexão é tentada se a conexão anterior tiver sido fechada pelo backend.
+        for attempt in range(2):
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall(frame)
+                return True
+            except OSError as e:
+                self._disconnect()
+                if attempt:
+                    logging.error("Envio via UDS para %s falhou: %s", self.path, e)
+        return False
+
+    def close(self):
+        self._disconnect()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        logging.info("Conectado ao backend via UDS em %s.", self.path)
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+class UdpSink(Sink):
+    """
+    Envia cada janela como um único datagrama UDP. Não há confirmação nem
+    retransmissão: janelas podem ser perdidas, o que é aceitável para
+    painéis em tempo quase real com janelas curtas.
+    """
+
+    def __init__(self, addr: Tuple[str, int]):
+        """:param addr: Tupla (host, porta) do listener UDP do backend."""
+        super().__init__(f"udp:{addr[0]}:{addr[1]}")
+        self.addr = addr
+        family = socket.AF_INET6 if ":" in addr[0] else socket.AF_INET
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+
+    def send(self, payload: Dict[str, Any], data: Optional[bytes]) -> bool:
+        if len(data) > MAX_DATAGRAM_BYTES:
+            logging.warning("Janela de %d bytes excede o tamanho máximo de datagrama. Descartada no UDP.", len(data))
+            return False
+        try:
+            self._sock.sendto(data, self.addr)
+            return True
+        except OSError as e:
+            logging.error("Envio UDP para %s:%d falhou: %s", self.addr[0], self.addr[1], e)
+            return False
+
+    def close(self):
+        self._sock.close()
+
+# --- SEÇÃO 3: FUNÇÕES PÚBLICAS (AUXILIARES) ---
+
+def parse_host_port(value: str) -> Tuple[str, int]:
+    """
+    Converte "host:porta" (ou "[ipv6]:porta") em uma tupla (host, porta).
+
+    :raises ValueError: Se o valor não tiver uma porta válida.
+    """
+    host, sep, port = value.rpartition(":")
+    if not sep or not host or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"Endereço inválido (esperado host:porta): {value!r}")
+    return host.strip("[]"), int(port)
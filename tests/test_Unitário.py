@@ -12,12 +12,33 @@
 # --- SEÇÃO 0: IMPORTAÇÕES ---
 import pytest
 from fastapi.testclient import TestClient
+import asyncio
+import json
+import struct
 import sys
 import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Adiciona o diretório raiz do projeto ao caminho do Python para importação.
+# Adiciona o diretório raiz do projeto ao caminho do Python para importação,
+# e o do backend, cujos módulos são importados pelo nome (como no uvicorn).
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'BackEnd_RESTful')))
 from BackEnd_RESTful.main import app, clear_traffic_data  # Importa a função de limpeza
+from BackEnd_RESTful.main import data_store, ingest_pipeline
+import BackEnd_RESTful.main as main_module
+import respostas
+from modelos import ClientRecord, HistoryRecord
+from historico import ClientHistory, downsample_lttb
+from persistencia import HistoryDatabase
+from mapa_persistente import PersistentMap, MapWriter, EMPTY_MAP
+from armazenamento import TrafficDataStore
+from visoes import traffic_page, build_traffic_view, build_history_view, build_hosts_view
+from transmissao import StreamBroadcaster
+from transporte_local import start_local_transports, stop_local_transports, ShmRingReader
+from estado_compartilhado import SharedState
+from respostas import accepted_encoding
 
 # --- SEÇÃO 1: FIXTURES DO PYTEST ---
 
@@ -116,6 +137,27 @@ def test_get_protocol_drilldown_data(client: TestClient, valid_payload: dict):
     assert udp_data["y"] == 200 + 500  # Total de tráfego UDP
 
 
+def test_unchanged_poll_returns_304(client: TestClient, valid_payload: dict):
+    """
+    Testa se as rotas de consulta enviam ETag, respondem 304 enquanto o store
+    não muda e voltam a responder 200 após uma nova ingestão.
+    """
+    client.post("/api/ingest", json=valid_payload)
+    for path in ["/api/traffic", "/api/traffic/history", "/api/traffic/protocols/summary",
+                 "/api/traffic/192.168.1.101/protocols"]:
+        first = client.get(path)
+        etag = first.headers["etag"]
+        cached = client.get(path, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert client.get(path).content == first.content
+
+    client.post("/api/ingest", json=valid_payload)
+    changed = client.get("/api/traffic", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
 # --- SEÇÃO 3: TESTES DE CASOS DE BORDA (EDGE CASES) ---
 
 def test_get_traffic_when_empty(client: TestClient):
@@ -143,3 +185,718 @@ def test_get_protocol_for_nonexistent_client(client: TestClient, valid_payload:
     # Atualizamos a mensagem de erro esperada para corresponder à resposta real da API.
     assert response.json() == {"detail": "O IP '999.999.999.999' não foi encontrado."}
 
+
+def test_ingest_rejects_invalid_payload(client: TestClient, valid_payload: dict):
+    """
+    Garante que uma janela fora do formato é rejeitada na borda com 422
+    e não altera o armazenamento.
+    """
+    valid_payload["clients"]["10.0.0.5"]["protocols"]["DNS"] = {"in": "muito", "out": 0}
+    response = client.post("/api/ingest", json=valid_payload)
+    assert response.status_code == 422
+    assert client.get("/api/traffic").json() == []
+
+
+
+# --- SEÇÃO 4: TESTES DO TRANSPORTE LOCAL ---
+
+def test_uds_listener_feeds_data_store(client: TestClient, valid_payload: dict, tmp_path):
+    """
+    Envia uma janela como frame prefixado pelo tamanho via Unix domain socket e
+    verifica se ela aparece em /api/traffic sem passar pela rota HTTP.
+    """
+    sock_path = str(tmp_path / "netvision.sock")
+
+    async def send_frame():
+        closers = await start_local_transports(ingest_pipeline, uds_path=sock_path, udp_addr=None)
+        try:
+            _, writer = await asyncio.open_unix_connection(sock_path)
+            data = json.dumps(valid_payload).encode("utf-8")
+            writer.write(struct.pack("!I", len(data)) + data)
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.05)  # Dá tempo ao listener de processar o frame.
+        finally:
+            await stop_local_transports(closers, uds_path=sock_path)
+
+    asyncio.run(send_frame())
+
+    data = client.get("/api/traffic").json()
+    assert {item["ip"] for item in data} == {"192.168.1.101", "10.0.0.5"}
+    assert not os.path.exists(sock_path)
+
+def test_shm_ring_reader_consumes_producer_records(client: TestClient, tmp_path):
+    """
+    Escreve uma janela com o `ShmRingWriter` do produtor e verifica se o leitor
+    do backend a consome do mapeamento e libera o slot.
+    """
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Network_analyzer')))
+    from memoria_compartilhada import ShmRingWriter
+
+    ring_path = str(tmp_path / "netvision.ring")
+    writer = ShmRingWriter(ring_path, n_slots=2, max_clients=4, max_protos=8)
+    window = {
+        "window_start": 1757439600.0, "window_end": 1757439605.0, "host": "test-host", "iface": "lo",
+        "total_in": 1000, "total_out": 5000, "pkt_count": 3, "byte_count": 6000,
+        "clients": {"192.168.1.101": {"in_bytes": 1000, "out_bytes": 5000,
+                                      "protocols": {"TCP": {"in": 800, "out": 4500}, "UDP": {"in": 200, "out": 500}}}}
+    }
+    assert writer.write(window)
+    assert writer.write(window)
+    assert not writer.write(window)  # Anel cheio: o produtor descarta em vez de bloquear.
+
+    reader = ShmRingReader(ring_path, ingest_pipeline)
+    assert reader.drain() == 2
+    assert writer.write(window)  # Slots liberados pelo consumidor.
+    reader.close()
+    writer.close()
+
+    data = client.get("/api/traffic/192.168.1.101/protocols").json()
+    assert {item["name"]: item["y"] for item in data} == {"TCP": 5300, "UDP": 700}
+
+
+# --- SEÇÃO 5: TESTES DA INGESTÃO ASSÍNCRONA ---
+
+def test_concurrent_ingest_through_writer_task(valid_payload: dict):
+    """
+    Com o lifespan ativo, dezenas de produtores enviam janelas ao mesmo tempo;
+    a tarefa escritora aplica todas e publica snapshots com versão crescente.
+    """
+    n_producers = 40
+    with TestClient(app) as live_client:
+        version_before = data_store.snapshot.version
+
+        def push(i: int) -> int:
+            payload = dict(valid_payload, window_end=valid_payload["window_end"] + 5 * i,
+                           clients={f"10.1.0.{i}": valid_payload["clients"]["10.0.0.5"]})
+            return live_client.post("/api/ingest", json=payload).status_code
+
+        with ThreadPoolExecutor(max_workers=n_producers) as pool:
+            assert set(pool.map(push, range(n_producers))) == {204}
+
+        deadline = time.time() + 5
+        while len(live_client.get("/api/traffic").json()) < n_producers and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert len(live_client.get("/api/traffic").json()) == n_producers
+        assert len(data_store.get_history()) == data_store.HISTORY_LENGTH
+        assert data_store.snapshot.version > version_before
+
+def test_snapshot_is_immutable_for_readers(client: TestClient, valid_payload: dict):
+    """
+    Testa se o snapshot obtido por um leitor não muda com ingestões
+    posteriores nem pode ser alterado por ele.
+    """
+    client.post("/api/ingest", json=valid_payload)
+    snapshot = data_store.snapshot
+    client.post("/api/ingest", json=dict(valid_payload, clients={}))
+    assert len(snapshot.clients) == 2
+    assert len(snapshot.history) == 1
+    with pytest.raises(TypeError):
+        snapshot.clients["1.2.3.4"] = None
+
+
+# --- SEÇÃO 6: TESTES DO STREAMING (SERVER-SENT EVENTS) ---
+
+def test_stream_broadcaster_fans_out_and_coalesces_slow_consumers():
+    """
+    Testa se cada versão do store vira uma única mensagem compartilhada pelos
+    inscritos e se um inscrito lento fica apenas com a mensagem mais recente.
+    """
+    async def scenario():
+        broadcaster = StreamBroadcaster(data_store, queue_size=1)
+        fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+        assert b'"traffic":[]' in fast.get_nowait()
+
+        for i in range(3):
+            data_store.update_data({f"10.0.0.{i}": ClientRecord(i, 0, {})}, 1757439600 + i)
+            broadcaster.publish()
+            message = fast.get_nowait()
+        broadcaster.publish()  # Sem versão nova: nada é enviado.
+
+        assert fast.empty()
+        assert slow.qsize() == 1
+        assert slow.get_nowait() is message  # Mesma mensagem serializada para todos.
+        assert b'"ip":"10.0.0.2"' in message
+        assert broadcaster.coalesced == 3
+
+        broadcaster.close()
+        assert fast.get_nowait() is None
+
+    asyncio.run(scenario())
+
+
+# --- SEÇÃO 7: TESTES DO HISTÓRICO EM MÚLTIPLAS RESOLUÇÕES ---
+
+def test_history_rollups_and_range_queries(client: TestClient, valid_payload: dict):
+    """
+    Ingere uma hora de janelas de 5s e verifica o padrão (último minuto), a
+    agregação incremental por minuto e a validação dos parâmetros.
+    """
+    start = 1757439600
+    for i in range(720):
+        data_store.update_data({"10.0.0.5": ClientRecord(10, 1, {})}, start + 5 * (i + 1))
+
+    default = client.get("/api/traffic/history").json()
+    assert len(default) == 12
+    assert default[-1] == {"timestamp": start + 3600, "total_inbound": 10, "total_outbound": 1}
+
+    minutes = client.get("/api/traffic/history", params={"from": start, "to": start + 3599, "resolution": 60}).json()
+    assert len(minutes) == 60
+    assert all(p["total_inbound"] == 120 for p in minutes[1:])  # 12 janelas de 5s por minuto.
+
+    auto = client.get("/api/traffic/history", params={"from": start - 7 * 86400}).json()
+    assert sum(p["total_inbound"] for p in auto) == 7200  # Nível de 1h: cobre a semana inteira.
+
+    assert client.get("/api/traffic/history", params={"resolution": 7}).status_code == 400
+    assert client.get("/api/traffic/history", params={"from": 2, "to": 1}).status_code == 400
+
+
+# --- SEÇÃO 8: TESTES DA PERSISTÊNCIA (SQLITE) ---
+
+def test_history_database_warm_start_and_old_range_queries(tmp_path):
+    """
+    Grava janelas com a persistência ativa, reinicia o store a partir do banco
+    e verifica a partida a quente e a leitura de intervalos fora do anel em memória.
+    """
+    db_path = str(tmp_path / "netvision.db")
+    now = time.time()
+    old = now - 40 * 86400  # Fora dos 30 dias do nível de 1h em memória.
+
+    database = HistoryDatabase(db_path, flush_interval_s=0.01)
+    store = TrafficDataStore()
+    store.attach_database(database)
+    database.start()
+    store.update_data({"10.0.0.1": ClientRecord(100, 10, {"TCP": (100, 10)})}, old)
+    store.update_data({"10.0.0.1": ClientRecord(200, 20, {"TCP": (200, 20)})}, now)
+    database.stop()
+
+    restarted = TrafficDataStore()
+    database = HistoryDatabase(db_path)
+    restarted.attach_database(database)
+    try:
+        assert restarted.get_data()["10.0.0.1"].protocols == {"TCP": (200, 20)}
+        assert [p.total_inbound for p in restarted.get_history()] == [200]
+        old_points = restarted.history.query(old - 3600, old + 3600, 3600)
+        assert [(p.total_inbound, p.total_outbound) for p in old_points] == [(100, 10)]
+    finally:
+        database.stop()
+
+def test_history_database_migrates_unpartitioned_clients(tmp_path):
+    """
+    Testa se um banco do formato anterior (tabela `clients`, sem versão) é
+    migrado uma única vez, mantendo os clientes na partição sem rótulo.
+    """
+    db_path = str(tmp_path / "netvision.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("CREATE TABLE clients (ip TEXT PRIMARY KEY, last_seen REAL NOT NULL,"
+                   " in_bytes INTEGER NOT NULL, out_bytes INTEGER NOT NULL, protocols TEXT NOT NULL)")
+    legacy.execute("INSERT INTO clients VALUES ('10.0.0.1', ?, 100, 10, '{\"TCP\": [100, 10]}')", (time.time(),))
+    legacy.commit()
+    legacy.close()
+
+    for _ in range(2):  # A segunda abertura não migra de novo nem perde dados.
+        database = HistoryDatabase(db_path)
+        try:
+            [(key, ip, _, record)] = database.load_clients(0)
+            assert (key, ip, record.protocols) == (("", ""), "10.0.0.1", {"TCP": (100, 10)})
+            assert database._reader.execute("PRAGMA user_version").fetchone()[0] == HistoryDatabase.SCHEMA_VERSION
+        finally:
+            database.stop()
+
+
+# --- SEÇÃO 9: TESTES DO HISTÓRICO POR CLIENTE ---
+
+def test_client_history_endpoint(client: TestClient, valid_payload: dict):
+    """
+    Testa se cada janela ingerida vira um ponto na série do cliente e se
+    IPs sem histórico retornam 404.
+    """
+    for i in range(3):
+        client.post("/api/ingest", json=dict(valid_payload, window_end=valid_payload["window_end"] + 5 * i))
+
+    points = client.get("/api/traffic/192.168.1.101/history").json()
+    assert [p["total_inbound"] for p in points] == [1000, 1000, 1000]
+    assert points[-1]["timestamp"] == valid_payload["window_end"] + 10
+
+    ranged = client.get("/api/traffic/192.168.1.101/history", params={"from": valid_payload["window_end"] + 5})
+    assert len(ranged.json()) == 2
+    assert client.get("/api/traffic/8.8.8.8/history").status_code == 404
+
+class _ReaderSharedState:
+    """ Worker leitor simulado: conta as consultas ao dono e responde com a versão pedida. """
+    is_owner = False
+
+    def __init__(self, rows):
+        self.rows, self.queries, self.version = rows, 0, None
+
+    async def query_client_history(self, ip, from_ts, to_ts, max_points):
+        self.queries += 1
+        snapshot = data_store.snapshot
+        return {"boot_id": snapshot.boot_id, "version": self.version or snapshot.version, "rows": self.rows}
+
+def test_reader_client_history_checks_etag_and_memo_before_asking_owner(client: TestClient, valid_payload: dict,
+                                                                        monkeypatch):
+    """
+    Testa se um worker leitor só consulta o dono quando nem a ETag nem o memo
+    do snapshot respondem e se linhas de uma versão mais nova do dono saem com
+    a ETag dela, sem entrar no memo do snapshot local.
+    """
+    client.post("/api/ingest", json=valid_payload)
+    owner = _ReaderSharedState([{"timestamp": 1.0, "total_inbound": 5, "total_outbound": 6}])
+    monkeypatch.setattr(main_module, "shared_state", owner)
+    url = "/api/traffic/192.168.1.101/history"
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.json() == owner.rows and owner.queries == 1
+    assert client.get(url).json() == owner.rows and owner.queries == 1  # Memo do snapshot.
+    assert client.get(url, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert owner.queries == 1
+
+    owner.version = data_store.snapshot.version + 1  # Dono à frente deste worker.
+    ahead = client.get(url, params={"max_points": 5})
+    assert ahead.headers["etag"] == f'"{data_store.snapshot.boot_id}-{owner.version}"'
+    client.get(url, params={"max_points": 5})
+    assert owner.queries == 3  # Não memorizado: a versão não é a do snapshot local.
+
+    owner.rows = None
+    assert client.get(url, params={"from": 0}).status_code == 404
+
+def test_client_history_is_bounded():
+    """
+    Testa se o número de clientes com histórico respeita o limite (o menos
+    recente é reciclado) e se clientes fora do anel são liberados.
+    """
+    history = ClientHistory(max_clients=2, points=4, resolution_s=5)
+    history.add_window(100, {"a": ClientRecord(1, 0, {}), "b": ClientRecord(2, 0, {})})
+    history.add_window(105, {"a": ClientRecord(3, 0, {}), "c": ClientRecord(4, 0, {})})
+    assert "b" not in history and history.evicted == 1
+    assert [p.total_inbound for p in history.query("c")] == [4]  # Linha reciclada começa zerada.
+
+    history.add_window(200, {"a": ClientRecord(5, 0, {})})
+    assert history.evict_expired() == 1
+    assert "c" not in history
+    assert [p.total_inbound for p in history.query("a")] == [5]
+
+# --- SEÇÃO 10: TESTES DAS PARTIÇÕES POR PRODUTOR ---
+
+def test_multiple_hosts_are_merged_in_global_views(client: TestClient, valid_payload: dict):
+    """
+    Testa se dois produtores que reportam o mesmo IP na mesma janela somam
+    seus bytes na visão global, no histórico e nos protocolos, sem que um
+    sobrescreva o outro, e se `?host` restringe a resposta a um produtor.
+    """
+    other = dict(valid_payload, host="other-host", iface="eth1")
+    client.post("/api/ingest", json=valid_payload)
+    client.post("/api/ingest", json=other)
+
+    merged = {c["ip"]: c for c in client.get("/api/traffic").json()}
+    assert merged["192.168.1.101"]["inbound"] == 2000
+    assert merged["192.168.1.101"]["outbound"] == 10000
+    protocols = {p["name"]: p for p in client.get("/api/traffic/192.168.1.101/protocols").json()}
+    assert protocols["TCP"]["inbound"] == 1600
+
+    history = client.get("/api/traffic/history").json()
+    assert len(history) == 1 and history[0]["total_inbound"] == 2500
+
+    only = client.get("/api/traffic", params={"host": "other-host"}).json()
+    assert {c["ip"]: c["inbound"] for c in only} == {"192.168.1.101": 1000, "10.0.0.5": 250}
+    assert client.get("/api/traffic/history", params={"host": "other-host"}).json()[0]["total_inbound"] == 1250
+    assert client.get("/api/traffic", params={"host": "unknown"}).status_code == 404
+
+    hosts = {(h["host"], h["iface"]): h for h in client.get("/api/hosts").json()}
+    assert set(hosts) == {("test-host", "test-iface"), ("other-host", "eth1")}
+    assert hosts[("other-host", "eth1")]["clients"] == 2
+
+def test_inactive_partition_is_removed_from_global_totals(monkeypatch):
+    """
+    Testa se, quando apenas um dos produtores deixa de reportar um IP, o
+    timeout remove só a parcela dele e a visão global volta ao valor do outro.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = TrafficDataStore(timeout_seconds=60)
+    store.update_data({"192.168.1.101": ClientRecord(1000, 0, {})}, 100, "a", "eth0")
+    now[0] += 50
+    store.update_data({"192.168.1.101": ClientRecord(300, 0, {})}, 100, "b", "eth0")
+    assert store.get_data()["192.168.1.101"].in_bytes == 1300
+
+    now[0] += 20
+    store.cleanup_inactive_clients()
+    assert store.get_data()["192.168.1.101"].in_bytes == 300
+    assert set(store.snapshot.partitions) == {("b", "eth0")}
+
+def _new_nodes(old: PersistentMap, new: PersistentMap) -> int:
+    """ Conta os nós (listas e folhas) de `new` que não são compartilhados com `old`. """
+    def nodes(m):
+        stack, found = [m._root], []
+        while stack:
+            node = stack.pop()
+            found.append(node)
+            stack.extend(slot for slot in node if isinstance(slot, list))
+            found.extend(slot for slot in node if isinstance(slot, dict))
+        return found
+    shared = {id(node) for node in nodes(old)}
+    return sum(1 for node in nodes(new) if id(node) not in shared)
+
+def _ips(n: int) -> list:
+    return [f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}" for i in range(n)]
+
+def test_persistent_map_matches_dict_and_keeps_old_versions():
+    """
+    Testa se o `PersistentMap` se comporta como um dict em inserções, trocas e
+    remoções (inclusive ao dividir folhas) e se as versões anteriores ficam intactas.
+    """
+    writer = MapWriter(EMPTY_MAP)
+    expected = {}
+    for i, ip in enumerate(_ips(5000)):
+        writer[ip] = i
+        expected[ip] = i
+    first = writer.persistent()
+
+    for ip in _ips(5000)[::3]:
+        assert writer.pop(ip) == expected.pop(ip)
+    assert writer.pop("192.0.2.1") is None
+    assert writer.put("10.0.0.1", -1) is False and writer.put("192.0.2.1", 7) is True
+    expected.update({"10.0.0.1": -1, "192.0.2.1": 7})
+    second = writer.persistent()
+
+    assert dict(second.items()) == expected and len(second) == len(expected)
+    assert sorted(second) == sorted(expected) and sorted(second.values()) == sorted(expected.values())
+    assert len(first) == 5000 and first["10.0.0.3"] == 3 and "192.0.2.1" not in first
+    assert second.get("10.0.0.3") is None and second.get("10.0.0.1") == -1
+
+def test_single_client_window_does_not_copy_the_whole_store():
+    """
+    Testa se uma janela com um único cliente, num store grande, publica o
+    snapshot copiando só o caminho desse IP (custo independente do total de clientes).
+    """
+    store = TrafficDataStore()
+    store.update_data({ip: ClientRecord(1, 1, {}) for ip in _ips(20000)}, 100, "a", "eth0")
+    before = store.snapshot
+    store.update_data({"10.0.0.7": ClientRecord(5, 5, {})}, 105, "a", "eth0")
+    after = store.snapshot
+
+    assert len(after.clients) == 20000 and after.clients["10.0.0.7"].in_bytes == 5
+    assert before.clients["10.0.0.7"].in_bytes == 1  # O snapshot anterior não muda.
+    assert _new_nodes(before.clients, after.clients) <= 4
+    assert _new_nodes(before.partitions[("a", "eth0")], after.partitions[("a", "eth0")]) <= 4
+
+# --- SEÇÃO 11: TESTES DA EXPIRAÇÃO DE CLIENTES ---
+
+def test_expiry_heap_only_touches_due_clients(monkeypatch):
+    """
+    Testa se a limpeza remove apenas clientes vencidos, reagenda os que foram
+    vistos de novo (remoção preguiçosa) e mantém uma entrada por cliente.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = TrafficDataStore(timeout_seconds=10)
+    store.update_data({f"10.0.0.{i}": ClientRecord(1, 0, {}) for i in range(100)}, 100)
+    now[0] += 8
+    store.update_data({"10.0.0.1": ClientRecord(1, 0, {})}, 105)
+    assert len(store._expiry) == 100
+
+    now[0] += 5
+    store.cleanup_inactive_clients()
+    assert set(store.get_data()) == {"10.0.0.1"}
+    assert store._expiry == [(1008.0, ("", ""), "10.0.0.1")]
+
+    version = store.snapshot.version
+    store.cleanup_inactive_clients()  # Nada vencido: nenhum snapshot novo.
+    assert store.snapshot.version == version
+
+    now[0] += 10
+    store.cleanup_inactive_clients()
+    assert not store.get_data() and not store._expiry
+
+def test_expiring_one_client_does_not_copy_the_whole_store(monkeypatch):
+    """
+    Testa se remover um único cliente vencido, num store grande, copia só o
+    caminho desse IP em vez da visão global inteira.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = TrafficDataStore(timeout_seconds=10)
+    store.update_data({"10.255.0.1": ClientRecord(1, 1, {})}, 100)
+    now[0] += 8
+    store.update_data({ip: ClientRecord(1, 1, {}) for ip in _ips(20000)}, 105)
+    before = store.snapshot
+
+    now[0] += 5
+    store.cleanup_inactive_clients()
+    after = store.snapshot
+    assert len(after.clients) == 20000 and "10.255.0.1" not in after.clients
+    assert "10.255.0.1" in before.clients
+    assert _new_nodes(before.clients, after.clients) <= 4
+
+# --- SEÇÃO 12: TESTES DO RANKING E DA PAGINAÇÃO ---
+
+def test_traffic_pagination_sort_and_prefix(client: TestClient, valid_payload: dict):
+    """
+    Testa se `/api/traffic` devolve o top-N ordenado, se o cursor continua a
+    página seguinte sem repetir clientes e se o filtro por prefixo CIDR funciona.
+    """
+    valid_payload["clients"] = {
+        f"10.0.{i // 10}.{i}": {"in_bytes": i * 100, "out_bytes": 1000 - i * 10, "protocols": {}} for i in range(20)
+    }
+    client.post("/api/ingest", json=valid_payload)
+
+    top = client.get("/api/traffic", params={"sort": "inbound", "limit": 3})
+    assert [c["ip"] for c in top.json()] == ["10.0.1.19", "10.0.1.18", "10.0.1.17"]
+    assert top.headers["x-total-count"] == "20"
+
+    second = client.get("/api/traffic", params={"sort": "inbound", "limit": 3, "cursor": top.headers["x-next-cursor"]})
+    assert [c["ip"] for c in second.json()] == ["10.0.1.16", "10.0.1.15", "10.0.1.14"]
+    offset = client.get("/api/traffic", params={"sort": "inbound", "limit": 3, "offset": 3})
+    assert offset.json() == second.json()
+
+    outbound = client.get("/api/traffic", params={"sort": "outbound", "limit": 1}).json()
+    assert outbound[0]["ip"] == "10.0.0.0"
+
+    filtered = client.get("/api/traffic", params={"prefix": "10.0.0.0/24"})
+    assert filtered.headers["x-total-count"] == "10"
+    assert [c["ip"] for c in filtered.json()][:2] == ["10.0.0.9", "10.0.0.8"]  # Padrão: ordem por total.
+
+    assert client.get("/api/traffic", params={"sort": "bytes"}).status_code == 422
+    assert client.get("/api/traffic", params={"cursor": "x", "offset": 1}).status_code == 400
+
+def test_ranking_index_matches_full_sort():
+    """
+    Testa se o índice de ranking, atualizado de forma incremental ou
+    reordenado após lotes grandes, coincide com a ordenação completa.
+    """
+    store = TrafficDataStore()
+    store.update_data({f"10.0.0.{i}": ClientRecord(i, 100 - i, {}) for i in range(100)}, 100)
+    store.update_data({"10.0.0.3": ClientRecord(500, 0, {}), "10.0.1.1": ClientRecord(1, 1, {})}, 105)
+
+    for sort, value in (("total", lambda c: c.in_bytes + c.out_bytes), ("inbound", lambda c: c.in_bytes)):
+        expected = sorted(store.get_data().items(), key=lambda item: (-value(item[1]), item[0]))
+        page = traffic_page(store.snapshot, store.ranking, sort, limit=10)
+        assert [row["ip"] for row in page.rows] == [ip for ip, _ in expected[:10]]
+        assert page.total == 101
+
+def test_traffic_page_exactly_full_last_page_has_no_cursor():
+    """
+    Testa se uma última página exatamente cheia não gera cursor, tanto pelo
+    índice de ranking quanto pelo caminho filtrado.
+    """
+    store = TrafficDataStore()
+    store.update_data({f"10.0.0.{i}": ClientRecord(i, 0, {}) for i in range(6)}, 100)
+
+    for match in (None, lambda ip: True):
+        first = traffic_page(store.snapshot, store.ranking, "inbound", limit=3, match=match)
+        assert first.next_cursor is not None
+        last = traffic_page(store.snapshot, store.ranking, "inbound", limit=3, cursor=first.next_cursor, match=match)
+        assert [row["ip"] for row in last.rows] == ["10.0.0.2", "10.0.0.1", "10.0.0.0"]
+        assert last.next_cursor is None
+
+# --- SEÇÃO 13: TESTES DA REDUÇÃO DE PONTOS (LTTB) ---
+
+def test_downsample_lttb_keeps_endpoints_and_peaks():
+    """
+    Testa se o LTTB limita a série a `max_points`, mantém o primeiro e o
+    último ponto e preserva um pico isolado.
+    """
+    points = [HistoryRecord(float(i * 5), 10, 10) for i in range(1000)]
+    points[437] = HistoryRecord(437 * 5.0, 90000, 10)
+    reduced = downsample_lttb(points, 50)
+    assert len(reduced) == 50
+    assert reduced[0] == points[0] and reduced[-1] == points[-1]
+    assert points[437] in reduced
+    assert downsample_lttb(points[:20], 50) == points[:20]
+
+def test_history_max_points(client: TestClient, valid_payload: dict):
+    """
+    Testa se `max_points` limita a resposta do histórico global e por cliente.
+    """
+    for i in range(30):
+        client.post("/api/ingest", json=dict(valid_payload, window_end=valid_payload["window_end"] + 5 * i))
+    params = {"from": valid_payload["window_end"], "max_points": 10}
+    assert len(client.get("/api/traffic/history", params=params).json()) == 10
+    assert len(client.get("/api/traffic/192.168.1.101/history", params={"max_points": 10}).json()) == 10
+    assert len(client.get("/api/traffic/history", params={"from": valid_payload["window_end"]}).json()) == 30
+    assert client.get("/api/traffic/history", params={"max_points": 2}).status_code == 422
+
+# --- SEÇÃO 14: TESTES DA COMPRESSÃO DAS RESPOSTAS ---
+
+def test_large_views_are_gzip_compressed(client: TestClient, valid_payload: dict, monkeypatch):
+    """
+    Testa se visões acima do limite saem com gzip quando o cliente aceita, se
+    a versão comprimida é memorizada no snapshot e se respostas pequenas ou
+    sem Accept-Encoding seguem sem compressão.
+    """
+    monkeypatch.setattr(respostas, "brotli", None)
+    valid_payload["clients"] = {
+        f"10.1.{i // 256}.{i % 256}": {"in_bytes": i, "out_bytes": i, "protocols": {}} for i in range(200)
+    }
+    client.post("/api/ingest", json=valid_payload)
+
+    compressed = client.get("/api/traffic", headers={"Accept-Encoding": "br, gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+    assert len(compressed.json()) == 200
+    assert "traffic#gzip" in data_store.snapshot.views
+
+    plain = client.get("/api/traffic", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.json() == compressed.json()
+    small = client.get("/api/traffic/history", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+def test_accepted_encoding_negotiation(monkeypatch):
+    """
+    Testa a escolha da codificação a partir do Accept-Encoding, incluindo q=0.
+    """
+    monkeypatch.setattr(respostas, "brotli", None)
+    assert accepted_encoding("gzip, deflate") == "gzip"
+    assert accepted_encoding("gzip;q=0, deflate") is None
+    assert accepted_encoding("br") is None  # Sem o pacote brotli instalado.
+    assert accepted_encoding("*") == "gzip"
+    assert accepted_encoding(None) is None
+
+# --- SEÇÃO 15: TESTES DO ENDPOINT UNIFICADO DO DASHBOARD ---
+
+def test_dashboard_returns_sections_from_one_snapshot(client: TestClient, valid_payload: dict):
+    """
+    Testa se `/api/dashboard` traz as seções pedidas com a mesma versão, igual
+    às rotas individuais, e responde 304 quando `since_version` é a atual.
+    """
+    client.post("/api/ingest", json=valid_payload)
+
+    full = client.get("/api/dashboard").json()
+    assert set(full) == {"version", "boot_id", "traffic", "history", "protocols", "hosts", "server_info"}
+    assert full["version"] == data_store.snapshot.version
+    assert full["traffic"] == client.get("/api/traffic").json()
+    assert full["protocols"] == client.get("/api/traffic/protocols/summary").json()
+
+    partial = client.get("/api/dashboard", params={"sections": "history,traffic"}).json()
+    assert list(partial) == ["version", "boot_id", "traffic", "history"]
+
+    token = f"{full['boot_id']}-{full['version']}"
+    unchanged = client.get("/api/dashboard", params={"since_version": token})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["etag"] == f'"{token}"'
+    # A mesma versão de outra execução do backend (ex: antes de um reinício) não é 304.
+    restarted = client.get("/api/dashboard", params={"since_version": f"outro-{full['version']}"})
+    assert restarted.status_code == 200
+    client.post("/api/ingest", json=valid_payload)
+    assert client.get("/api/dashboard", params={"since_version": token}).status_code == 200
+    assert client.get("/api/dashboard", params={"sections": "traffic,charts"}).status_code == 400
+
+# --- SEÇÃO 16: TESTES DO ESTADO COMPARTILHADO ENTRE WORKERS ---
+
+def test_export_import_state_reproduces_snapshot():
+    """
+    Testa se um store que importa o estado exportado por outro publica a mesma
+    versão e as mesmas visões de tráfego, histórico e hosts.
+    """
+    owner = TrafficDataStore()
+    now = time.time()
+    owner.update_data({"10.0.0.1": ClientRecord(100, 10, {"TCP": (100, 10)})}, now - 5, "a", "eth0")
+    owner.update_data({"10.0.0.2": ClientRecord(50, 5, {"UDP": (50, 5)})}, now, "b", "eth1")
+
+    reader = TrafficDataStore()
+    reader.update_data({"10.9.9.9": ClientRecord(1, 1, {})}, now)  # Estado antigo, substituído.
+    reader.import_state(json.loads(json.dumps(owner.export_state())))
+
+    mine, theirs = owner.snapshot, reader.snapshot
+    assert theirs.version == mine.version
+    assert build_traffic_view(theirs) == build_traffic_view(mine)
+    assert build_history_view(theirs) == build_history_view(mine)
+    assert build_hosts_view(theirs) == build_hosts_view(mine)
+    assert reader.host_history["b"].query(now - 60) == owner.host_history["b"].query(now - 60)
+
+def test_import_state_keeps_history_of_previous_snapshot():
+    """
+    Testa se a importação troca o histórico junto com o snapshot, sem alterar
+    o histórico que um leitor do snapshot anterior ainda está consultando.
+    """
+    now = time.time()
+    owner, reader = TrafficDataStore(), TrafficDataStore()
+    owner.update_data({"10.0.0.1": ClientRecord(100, 10, {})}, now, "a", "eth0")
+    reader.update_data({"10.9.9.9": ClientRecord(7, 7, {})}, now, "z", "eth0")
+    before = reader.snapshot
+    old_points = before.tiers.query(now - 60)
+
+    reader.import_state(json.loads(json.dumps(owner.export_state())))
+    assert before.tiers.query(now - 60) == old_points
+    assert "z" in before.host_tiers and "z" not in reader.snapshot.host_tiers
+    assert reader.snapshot.tiers.query(now - 60) == owner.history.query(now - 60)
+    assert reader.snapshot.boot_id == owner.snapshot.boot_id
+
+def test_journal_deltas_reproduce_owner_snapshot(monkeypatch):
+    """
+    Testa se as entradas do diário, aplicadas em ordem por outro store,
+    reproduzem as visões do dono (inclusive remoções por timeout) e se uma
+    lacuna de versão pede o estado completo.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    owner = TrafficDataStore(timeout_seconds=10)
+    owner.update_data({"10.0.0.1": ClientRecord(100, 10, {"TCP": (100, 10)})}, 995, "a", "eth0")
+    owner.start_journal()
+    reader = TrafficDataStore()
+    reader.import_state(json.loads(json.dumps(owner.export_state())))
+
+    now[0] += 8
+    owner.update_data({"10.0.0.1": ClientRecord(5, 5, {"UDP": (5, 5)}),
+                       "10.0.0.2": ClientRecord(50, 5, {})}, 1005, "b", "eth1")
+    now[0] += 5
+    owner.cleanup_inactive_clients()  # Remove 10.0.0.1 apenas da partição ("a", "eth0").
+    journal = json.loads(json.dumps(owner.take_journal()))
+    assert [delta["version"] for delta in journal] == [owner.snapshot.version - 1, owner.snapshot.version]
+    assert all(len(delta["clients"]) == 1 for delta in journal)  # Só a partição tocada vai no diário.
+
+    assert reader.apply_delta(journal[1]) is None  # Lacuna: a versão anterior ainda não chegou.
+    assert [reader.apply_delta(delta) for delta in journal] == [True, True]
+    assert reader.apply_delta(journal[1]) is False
+    mine, theirs = owner.snapshot, reader.snapshot
+    assert (theirs.version, theirs.boot_id) == (mine.version, mine.boot_id)
+    for build in (build_traffic_view, build_history_view, build_hosts_view):
+        assert build(theirs) == build(mine)
+    assert theirs.host_tiers["b"].query(900) == mine.host_tiers["b"].query(900)
+
+    owner.clear()
+    assert owner.take_journal() == [{"version": owner.snapshot.version, "reset": True}]
+
+def test_shared_state_owner_publishes_and_reader_loads(tmp_path):
+    """
+    Testa se só um `SharedState` obtém o lock de dono, se o leitor carrega o
+    checkpoint gravado pelo dono (com o boot id dele), se as versões seguintes
+    chegam pelo diário e se uma nova chamada sem mudanças não altera nada.
+    """
+    owner_store, reader_store = TrafficDataStore(), TrafficDataStore()
+    owner = SharedState(str(tmp_path), owner_store)
+    reader = SharedState(str(tmp_path), reader_store)
+    assert owner.try_acquire_ownership() is True
+    assert reader.try_acquire_ownership() is False
+    assert reader.sync() is False  # Nada publicado ainda.
+
+    owner_store.update_data({"10.0.0.1": ClientRecord(100, 10, {"TCP": (100, 10)})}, time.time())
+    owner_store.start_journal()
+    owner.write_checkpoint()
+    assert reader.sync() is True
+    assert reader.sync() is False
+    assert reader_store.snapshot.boot_id == owner_store.snapshot.boot_id
+    assert reader_store.snapshot.clients["10.0.0.1"].in_bytes == 100
+
+    checkpoint = os.stat(tmp_path / "state.bin").st_ino
+    owner_store.update_data({"10.0.0.2": ClientRecord(50, 5, {})}, time.time(), "b", "eth1")
+    owner_store.update_data({"10.0.0.1": ClientRecord(1, 1, {})}, time.time())
+    owner.write_deltas()
+    assert os.stat(tmp_path / "state.bin").st_ino == checkpoint  # Versões novas só no diário.
+    assert reader.sync() is True
+    assert reader.sync() is False
+    assert reader_store.snapshot.version == owner_store.snapshot.version
+    assert build_traffic_view(reader_store.snapshot) == build_traffic_view(owner_store.snapshot)
+
+    owner_store.clear()  # Reinício do diário: o dono grava outro checkpoint.
+    owner.write_deltas()
+    assert len(list(tmp_path.glob("deltas.*.log"))) == 1
+    assert reader.sync() is True
+    assert len(reader_store.snapshot.clients) == 0
+
+    asyncio.run(owner.stop())
+    assert reader.try_acquire_ownership() is True  # Lock liberado: o leitor assume.
+    asyncio.run(reader.stop())